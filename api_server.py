@@ -0,0 +1,384 @@
+"""Headless HTTP API for lesson generation, for LMS integrations.
+
+Examples:
+    python api_server.py --port 8600
+    python api_server.py --stub --gemini-latency 0.3   # offline, no API keys
+
+Endpoints (JSON unless noted):
+    POST /lessons               {"curriculum", "grade", "subject", "topic",
+                                 "include_visuals", "include_references",
+                                 "reuse_similar"} -> 202 job
+    GET  /jobs/<job_id>         job status; "lesson_url" once it is done
+    GET  /lessons/<lesson_id>   the stored lesson payload
+    GET  /lessons/<lesson_id>/deck   the PowerPoint deck (chunked)
+    GET  /health                queue depth and worker count
+
+Jobs wait in a bounded queue for a fixed pool of worker threads; when the
+queue is full, POST /lessons answers 429 with Retry-After. Identical
+requests submitted while one is pending share its job. A stored lesson
+with the same normalized topic is returned instead of generating; a
+near-duplicate only with "reuse_similar": true, and otherwise reported as
+"similar_lesson_id" next to the new lesson.
+"""
+import argparse
+import json
+import os
+import queue
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+import metrics
+import deck_output
+import lesson_library
+from lesson_pipeline import build_lesson
+from topic_keys import topic_key
+from topic_validator import validate_topic_fast
+
+API_WORKERS = int(os.getenv("EDUGENIUS_API_WORKERS", "4"))
+API_QUEUE_SIZE = int(os.getenv("EDUGENIUS_API_QUEUE_SIZE", "32"))
+# Finished jobs are forgotten after this many seconds; their lessons stay in the library
+JOB_TTL = float(os.getenv("EDUGENIUS_API_JOB_TTL", "3600"))
+RETRY_AFTER = 5  # seconds suggested to clients turned away by a full queue
+# Decks kept ready for download; the least recently requested beyond this are dropped
+MAX_DECKS = int(os.getenv("EDUGENIUS_API_MAX_DECKS", "64"))
+
+REQUIRED_FIELDS = ("curriculum", "grade", "subject", "topic")
+FLAG_DEFAULTS = {"include_visuals": True, "include_references": True, "reuse_similar": False}
+MAX_FIELD_LENGTH = 200
+MAX_BODY_BYTES = 16 * 1024
+
+class QueueFull(Exception):
+    pass
+
+class JobManager:
+    """Bounded job queue served by a fixed pool of worker threads"""
+
+    def __init__(self, workers: int = API_WORKERS, queue_size: int = API_QUEUE_SIZE):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.jobs: Dict[str, Dict] = {}
+        self.pending: Dict[str, str] = {}  # request key -> id of its queued or running job
+        self.lock = threading.Lock()
+        self.workers = [
+            threading.Thread(target=self._work, name=f"edugenius-api-worker-{n}", daemon=True)
+            for n in range(workers)
+        ]
+        for worker in self.workers:
+            worker.start()
+
+    def submit(self, request: Dict) -> Tuple[Dict, bool]:
+        """Queue a lesson request; returns (job, created). Raises QueueFull."""
+        key = topic_key(request["curriculum"], request["grade"], request["subject"], request["topic"])
+        key += f"|{request['include_visuals']}|{request['include_references']}|{request['reuse_similar']}"
+        with self.lock:
+            self._expire_jobs()
+            job_id = self.pending.get(key)
+            if job_id:
+                metrics.record("api.job_shared", 1)
+                return dict(self.jobs[job_id]), False
+            job = {
+                "id": uuid.uuid4().hex, "status": "queued", "request": request,
+                "lesson_id": None, "cached": False, "similar_lesson_id": None, "error": None,
+                "submitted_at": time.time(), "finished_at": None,
+            }
+            try:
+                self.queue.put_nowait((job["id"], key))
+            except queue.Full:
+                metrics.record("api.rejected", 1)
+                raise QueueFull()
+            self.jobs[job["id"]] = job
+            self.pending[key] = job["id"]
+            return dict(job), True
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _update(self, job_id: str, **fields):
+        with self.lock:
+            self.jobs[job_id].update(fields)
+
+    def _expire_jobs(self):
+        cutoff = time.time() - JOB_TTL
+        for job_id in [job_id for job_id, job in self.jobs.items()
+                       if job["finished_at"] and job["finished_at"] < cutoff]:
+            del self.jobs[job_id]
+
+    def _work(self):
+        while True:
+            job_id, key = self.queue.get()
+            self._update(job_id, status="running", started_at=time.time())
+            try:
+                with metrics.timed("api.job"):
+                    result = run_job(self.jobs[job_id]["request"])
+                self._update(job_id, status="done", **result)
+            except Exception as e:
+                print(f"Error in lesson job {job_id}: {str(e)}")
+                self._update(job_id, status="failed", error=str(e))
+            finally:
+                with self.lock:
+                    self.jobs[job_id]["finished_at"] = time.time()
+                    self.pending.pop(key, None)
+                self.queue.task_done()
+
+def run_job(request: Dict) -> Dict:
+    """Validate the topic, reuse a stored lesson on it or generate and store a new one"""
+    curriculum, grade, subject, topic = (request[field] for field in REQUIRED_FIELDS)
+    verdict = validate_topic_fast(curriculum, grade, subject, topic)
+    if verdict != "valid":
+        raise ValueError(f"topic was rejected as {verdict}")
+
+    similar = lesson_library.find_similar_lesson(curriculum, grade, subject, topic)
+    # A near-duplicate may still be a different lesson, so it is only reused on request
+    if similar and (similar[1] >= 1.0 or request["reuse_similar"]):
+        return {"lesson_id": similar[0], "cached": True}
+
+    lesson = build_lesson(curriculum, grade, subject, topic,
+                          request["include_visuals"], request["include_references"])
+    if lesson is None:
+        raise RuntimeError("lesson generation is unavailable right now, try again later")
+    return {"lesson_id": lesson_library.save_lesson(lesson), "cached": False,
+            "similar_lesson_id": similar[0] if similar else None}
+
+def parse_lesson_request(body: bytes) -> Dict:
+    """Validate a POST /lessons body; raises ValueError with a message for the client"""
+    try:
+        data = json.loads(body or b"{}")
+    except ValueError:
+        raise ValueError("request body must be JSON")
+    if not isinstance(data, dict):
+        raise ValueError("request body must be a JSON object")
+    request = {}
+    for field in REQUIRED_FIELDS:
+        value = data.get(field)
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f"'{field}' is required")
+        if len(value) > MAX_FIELD_LENGTH:
+            raise ValueError(f"'{field}' is longer than {MAX_FIELD_LENGTH} characters")
+        request[field] = value.strip()
+    for flag, default in FLAG_DEFAULTS.items():
+        value = data.get(flag, default)
+        # bool("false") is True, so anything but a JSON boolean is refused
+        if not isinstance(value, bool):
+            raise ValueError(f"'{flag}' must be true or false")
+        request[flag] = value
+    return request
+
+_deck_artifacts = OrderedDict()  # lesson id -> deck_output artifact id, least recently used first
+_deck_locks: Dict[str, list] = {}  # lesson id -> [build lock, requests using it]
+_deck_lock = threading.Lock()
+
+@contextmanager
+def _deck_build_lock(lesson_id: str):
+    """Serialize builds of one lesson's deck; the lock is dropped when no request holds it"""
+    with _deck_lock:
+        entry = _deck_locks.setdefault(lesson_id, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _deck_lock:
+            entry[1] -= 1
+            if not entry[1]:
+                del _deck_locks[lesson_id]
+
+def _remember_deck(lesson_id: str, artifact_id: str):
+    """Record a new deck, forgetting expired ones and discarding the oldest beyond MAX_DECKS"""
+    with _deck_lock:
+        _deck_artifacts[lesson_id] = artifact_id
+        _deck_artifacts.move_to_end(lesson_id)
+        for expired in [key for key, value in _deck_artifacts.items()
+                        if deck_output.artifact_size(value) is None]:
+            del _deck_artifacts[expired]
+        evicted = []
+        while len(_deck_artifacts) > MAX_DECKS:
+            evicted.append(_deck_artifacts.popitem(last=False)[1])
+    for old_id in evicted:
+        deck_output.discard_artifact(old_id)
+
+def lesson_deck(lesson_id: str, lesson: Dict) -> str:
+    """Artifact id of the lesson's deck, built once and reused until it expires"""
+    with _deck_build_lock(lesson_id):
+        with _deck_lock:
+            artifact_id = _deck_artifacts.get(lesson_id)
+            if artifact_id:
+                _deck_artifacts.move_to_end(lesson_id)
+        if artifact_id and deck_output.artifact_size(artifact_id) is not None:
+            return artifact_id
+        from ppt_maker import generate_ppt
+        with metrics.timed("api.deck"):
+            with deck_output.spooled_export() as spool:
+                generate_ppt(lesson, output=spool)
+        artifact_id = deck_output.register_artifact(spool)
+        _remember_deck(lesson_id, artifact_id)
+        return artifact_id
+
+def deck_filename(lesson: Dict) -> str:
+    name = re.sub(r"[^\w]+", "_", f"{lesson.get('subject', '')}_{lesson.get('topic', '')}").strip("_")
+    return f"EduGenius_Lesson_{name[:60]}.pptx"
+
+class APIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive and chunked deck downloads
+    server_version = "EduGeniusAPI/1.0"
+    jobs: JobManager = None  # set by serve()
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, payload: Dict, headers: Dict = None):
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, message: str, headers: Dict = None):
+        self._send_json(status, {"error": message}, headers)
+
+    def _job_view(self, job: Dict) -> Dict:
+        view = {key: job[key] for key in ("id", "status", "cached", "error", "lesson_id", "similar_lesson_id",
+                                          "submitted_at", "finished_at")}
+        view["status_url"] = f"/jobs/{job['id']}"
+        if job["lesson_id"]:
+            view["lesson_url"] = f"/lessons/{job['lesson_id']}"
+            view["deck_url"] = f"/lessons/{job['lesson_id']}/deck"
+        return view
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/lessons":
+            return self._error(404, "not found")
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True  # the body can't be skipped without its length
+            return self._error(400, "invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            return self._error(413, f"request body is larger than {MAX_BODY_BYTES} bytes")
+        try:
+            request = parse_lesson_request(self.rfile.read(length))
+        except ValueError as e:
+            return self._error(400, str(e))
+        try:
+            job, created = self.jobs.submit(request)
+        except QueueFull:
+            return self._error(429, "too many lessons queued, retry later",
+                               {"Retry-After": str(RETRY_AFTER)})
+        self._send_json(202 if created else 200, self._job_view(job),
+                        {"Location": f"/jobs/{job['id']}"})
+
+    def do_GET(self):
+        parts = [part for part in self.path.split("?")[0].split("/") if part]
+        try:
+            if parts == ["health"]:
+                return self._send_json(200, {
+                    "status": "ok", "queued": self.jobs.queue.qsize(),
+                    "queue_size": self.jobs.queue.maxsize, "workers": len(self.jobs.workers),
+                })
+            if len(parts) == 2 and parts[0] == "jobs":
+                job = self.jobs.get(parts[1])
+                if job is None:
+                    return self._error(404, "unknown job")
+                return self._send_json(200, self._job_view(job))
+            if len(parts) in (2, 3) and parts[0] == "lessons" and parts[2:] in ([], ["deck"]):
+                lesson = lesson_library.load_lesson(parts[1])
+                if lesson is None:
+                    return self._error(404, "unknown lesson")
+                if len(parts) == 2:
+                    return self._send_json(200, dict(lesson, id=parts[1]))
+                return self._send_deck(parts[1], lesson)
+            return self._error(404, "not found")
+        except Exception as e:
+            print(f"Error serving {self.path}: {str(e)}")
+            return self._error(500, "internal error")
+
+    def _send_deck(self, lesson_id: str, lesson: Dict):
+        # Read the first chunk before answering: from then on the artifact stays
+        # open until the download ends, and one that expired in between is rebuilt
+        for _ in range(2):
+            chunks = deck_output.iter_artifact(lesson_deck(lesson_id, lesson))
+            try:
+                first = next(chunks, b"")
+                break
+            except FileNotFoundError:
+                continue
+        else:
+            return self._error(503, "deck could not be prepared, retry later")
+
+        self.send_response(200)
+        self.send_header("Content-Type",
+                         "application/vnd.openxmlformats-officedocument.presentationml.presentation")
+        self.send_header("Content-Disposition", f'attachment; filename="{deck_filename(lesson)}"')
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            chunk = first
+            while chunk:
+                self.wfile.write(f"{len(chunk):X}\r\n".encode() + chunk + b"\r\n")
+                chunk = next(chunks, b"")
+            self.wfile.write(b"0\r\n\r\n")
+        except Exception as e:
+            # Headers are out, so no error response can follow; drop the connection
+            # and let the client see a truncated download
+            print(f"Error streaming deck {lesson_id}: {str(e)}")
+            self.close_connection = True
+        finally:
+            chunks.close()
+
+def serve(host: str = "127.0.0.1", port: int = 8600, workers: int = API_WORKERS,
+          queue_size: int = API_QUEUE_SIZE, verbose: bool = False) -> ThreadingHTTPServer:
+    """Start the job workers and return a server ready for serve_forever()"""
+    handler = type("Handler", (APIHandler,), {"jobs": JobManager(workers, queue_size)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.verbose = verbose
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve lesson generation over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--workers", type=int, default=API_WORKERS, help="Lessons generated at once")
+    parser.add_argument("--queue-size", type=int, default=API_QUEUE_SIZE,
+                        help="Jobs allowed to wait before POST /lessons returns 429")
+    parser.add_argument("--stub", action="store_true",
+                        help="Use the offline stub backends and a temporary lesson library")
+    parser.add_argument("--gemini-latency", type=float, default=0.0, help="Stub Gemini latency (seconds)")
+    parser.add_argument("--http-latency", type=float, default=0.0, help="Stub HTTP latency (seconds)")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args(argv)
+
+    if args.stub:
+        import stub_backends
+        stub_backends.install(gemini_latency=args.gemini_latency, http_latency=args.http_latency)
+        lesson_library.LIBRARY_PATH = os.path.join(tempfile.mkdtemp(prefix="edugenius-api-"), "library.db")
+
+    server = serve(args.host, args.port, args.workers, args.queue_size, args.verbose)
+    print(f"EduGenius API on http://{args.host}:{server.server_port} "
+          f"({args.workers} workers, queue of {args.queue_size}{', stub backends' if args.stub else ''})",
+          flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
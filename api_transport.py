@@ -0,0 +1,229 @@
+"""Single choke point for outbound API traffic, with record and replay modes.
+
+EDUGENIUS_API_MODE selects the behaviour:
+    live    call the real APIs (default)
+    record  call the real APIs and append every request, response and its
+            latency to a gzipped JSON-lines cassette
+    replay  serve responses from cassettes with no network, sleeping for the
+            recorded latency times EDUGENIUS_REPLAY_LATENCY_SCALE (0 = instant)
+
+EDUGENIUS_CASSETTE is a cassette file or a directory (an existing one, or
+a path ending in a separator). Recording into a directory writes one file
+per process; replaying a directory loads every cassette in it. Non-JSON
+bodies such as images are stored once per content hash under blobs/ next
+to the cassettes. API keys are stripped from URLs and parameters before
+anything is written.
+"""
+import os
+import json
+import gzip
+import time
+import base64
+import atexit
+import hashlib
+import threading
+from collections import defaultdict, deque
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import metrics
+
+MODE = os.getenv("EDUGENIUS_API_MODE", "live").lower()
+CASSETTE = os.getenv("EDUGENIUS_CASSETTE", os.path.join("cassettes", ""))
+REPLAY_LATENCY_SCALE = float(os.getenv("EDUGENIUS_REPLAY_LATENCY_SCALE", "1.0"))
+
+# Query/param names whose values never reach a cassette
+SECRET_PARAMS = {"key", "api_key", "apikey", "client_id", "access_token", "cx"}
+
+class ReplayMiss(LookupError):
+    """Replay mode got a request that no cassette recorded"""
+
+class RecordedError(Exception):
+    """Replayed failure of a call that raised while recording"""
+
+_write_lock = threading.Lock()
+_writer = None
+_load_lock = threading.Lock()
+_tape = None  # key -> deque of recorded entries, in recording order
+
+def _is_directory(path: str) -> bool:
+    return os.path.isdir(path) or path.endswith(os.sep)
+
+def _blob_path(digest: str) -> str:
+    root = CASSETTE if _is_directory(CASSETTE) else os.path.dirname(CASSETTE)
+    return os.path.join(root, "blobs", digest[:2], digest)
+
+def _write_blob(data: bytes) -> str:
+    """Store a response body once per content hash and return the hash"""
+    digest = hashlib.sha256(data).hexdigest()
+    path = _blob_path(digest)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    return digest
+
+def _read_blob(digest: str) -> bytes:
+    try:
+        with open(_blob_path(digest), "rb") as f:
+            return f.read()
+    except OSError:
+        metrics.record("transport.replay_miss", 1)
+        raise ReplayMiss(f"recorded body {digest} is missing from {CASSETTE}")
+
+def _get_writer():
+    global _writer
+    if _writer is None:
+        path = CASSETTE
+        if _is_directory(path):
+            os.makedirs(path, exist_ok=True)
+            path = os.path.join(path, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.jsonl.gz")
+        else:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        _writer = gzip.open(path, "at", encoding="utf-8")
+        atexit.register(_writer.close)
+    return _writer
+
+def _write(entry: Dict):
+    with _write_lock:
+        writer = _get_writer()
+        writer.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        writer.flush()
+
+def _read_cassette(path: str):
+    """Yield entries from one cassette, tolerating a file cut short by a crash"""
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    except (EOFError, gzip.BadGzipFile, json.JSONDecodeError) as e:
+        print(f"Cassette {path} is truncated: {str(e)}")
+
+def _load_tape():
+    global _tape
+    with _load_lock:
+        if _tape is None:
+            tape = defaultdict(deque)
+            if os.path.isdir(CASSETTE):
+                paths = sorted(os.path.join(CASSETTE, name) for name in os.listdir(CASSETTE)
+                               if name.endswith(".jsonl.gz"))
+            else:
+                paths = [CASSETTE]
+            for path in paths:
+                for entry in _read_cassette(path):
+                    tape[entry["key"]].append(entry)
+            _tape = tape
+    return _tape
+
+def _next_entry(key: str) -> Dict:
+    """Recorded entries for a key are served in order; the last one repeats"""
+    entries = _load_tape().get(key)
+    if not entries:
+        metrics.record("transport.replay_miss", 1)
+        raise ReplayMiss(f"no recorded response for {key}")
+    with _load_lock:
+        return entries.popleft() if len(entries) > 1 else entries[0]
+
+def _sleep_recorded(entry: Dict):
+    if REPLAY_LATENCY_SCALE > 0:
+        time.sleep(entry.get("elapsed", 0) * REPLAY_LATENCY_SCALE)
+
+def redact_url(url: str) -> str:
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k.lower() not in SECRET_PARAMS]
+    return urlunsplit(parts._replace(query=urlencode(sorted(query))))
+
+def _request_key(kind: str, *parts) -> str:
+    return f"{kind}:" + hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+def generate_text(model_name: str, prompt: str, live: Callable[[], str], key_model: str = None) -> str:
+    """Run a Gemini generation through the transport; `live` performs the real call.
+
+    Cassettes are keyed on `key_model` (default `model_name`), so a caller
+    that swaps models under load can still replay what it recorded.
+    """
+    if MODE == "live":
+        return live()
+
+    key = _request_key("gemini", key_model or model_name, prompt)
+    if MODE == "replay":
+        entry = _next_entry(key)
+        _sleep_recorded(entry)
+        if "error" in entry:
+            raise RecordedError(entry["error"])
+        return entry["text"]
+
+    entry = {"key": key, "api": "gemini", "model": model_name, "prompt": prompt[:200], "at": time.time()}
+    start = time.perf_counter()
+    try:
+        text = live()
+        entry["text"] = text
+        return text
+    except Exception as e:
+        entry["error"] = str(e)
+        raise
+    finally:
+        entry["elapsed"] = round(time.perf_counter() - start, 4)
+        _write(entry)
+
+class ReplayResponse:
+    """The parts of requests.Response the app uses"""
+
+    def __init__(self, entry: Dict):
+        self.status_code = entry["status"]
+        self.url = entry["url"]
+        if "json" in entry:
+            self.content = json.dumps(entry["json"]).encode()
+            self._json = entry["json"]
+        elif "body_sha256" in entry:
+            self.content = _read_blob(entry["body_sha256"])
+            self._json = None
+        else:  # cassettes recorded before bodies moved to blobs/
+            self.content = base64.b64decode(entry.get("body", ""))
+            self._json = None
+        self.text = self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return self._json if self._json is not None else json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            import requests
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+def get(url: str, params: Optional[Dict] = None, **kwargs):
+    """requests.get through the transport"""
+    if MODE == "live":
+        import requests
+        return requests.get(url, params=params, **kwargs)
+
+    safe_url = redact_url(url)
+    safe_params = {k: v for k, v in (params or {}).items() if k.lower() not in SECRET_PARAMS}
+    key = _request_key("http", safe_url, safe_params)
+    if MODE == "replay":
+        entry = _next_entry(key)
+        _sleep_recorded(entry)
+        if "error" in entry:
+            raise RecordedError(entry["error"])
+        return ReplayResponse(entry)
+
+    import requests
+    entry = {"key": key, "api": "http", "url": safe_url, "params": safe_params, "at": time.time()}
+    start = time.perf_counter()
+    try:
+        response = requests.get(url, params=params, **kwargs)
+        entry["status"] = response.status_code
+        try:
+            entry["json"] = json.loads(response.content)
+        except ValueError:
+            entry["body_sha256"] = _write_blob(response.content)
+        return response
+    except Exception as e:
+        entry["error"] = str(e)
+        raise
+    finally:
+        entry["elapsed"] = round(time.perf_counter() - start, 4)
+        _write(entry)
@@ -1,19 +1,34 @@
 import streamlit as st
-from streamlit_extras.add_vertical_space import add_vertical_space
+from streamlit.errors import StreamlitAPIException
 from prompts import (
-    validate_topic,
     suggest_topics,
     generate_lesson_objectives,
     generate_subtopics,
-    fetch_unsplash_image,
     generate_quiz_questions,
     generate_lesson_summary
 )
 from quiz_component import render_quiz, handle_quiz_events
 from reference_search import search_references, render_references
-from ppt_maker import generate_ppt
+from prefetch import (run_concurrently, prefetch_objectives, resolve_objectives, cancel_prefetches,
+                      get_prefetch_executor)
+from metrics import timed, summary as metrics_summary
+from profiling import profiled, profiled_fragment, profile_requested
+from lesson_pipeline import (
+    IMAGE_OPTIONS,
+    quiz_lesson_content,
+    subtopic_image_key,
+    fetch_image_options,
+    regenerate_subtopic,
+    regenerate_quiz_section
+)
+from topic_validator import validate_topic_fast
+from image_cache import image_variant, get_image_bytes
+from lesson_library import save_lesson, load_lesson, search_lessons, find_similar_lesson, list_lessons
+from deck_output import spooled_export, register_artifact, artifact_reader, artifact_size, discard_artifact
 import os
 import json
+import time
+from functools import lru_cache
 
 # --- App Setup ---
 st.set_page_config(
@@ -22,9 +37,38 @@ st.set_page_config(
     layout="centered"
 )
 
+# Partial reruns need st.fragment (Streamlit 1.37+); older versions fall back to full reruns
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+
+def rerun_fragment():
+    """Rerun only the enclosing fragment when possible, otherwise the whole app"""
+    if fragment is not None:
+        try:
+            st.rerun(scope="fragment")
+        except (TypeError, StreamlitAPIException):
+            # Fragment scope is only allowed during a fragment rerun (or not supported at all)
+            pass
+    st.rerun()
+
+def as_fragment(func):
+    return fragment(func) if fragment is not None else func
+
+def in_fragment_rerun() -> bool:
+    """True while Streamlit reruns only fragments, not the whole script"""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    return bool(ctx and getattr(ctx, "fragment_ids_this_run", None))
+
+def add_vertical_space(num_lines=1):
+    # streamlit_extras is imported on first use to keep app start-up light
+    from streamlit_extras.add_vertical_space import add_vertical_space as extras_vertical_space
+    extras_vertical_space(num_lines)
+
 # --- UI Styling ---
+@lru_cache(maxsize=1)
 def get_css_styles():
-    with open('styles.css', 'r') as f:
+    css_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'styles.css')
+    with open(css_path, 'r') as f:
         return f"<style>{f.read()}</style>"
 
 def create_header():
@@ -58,9 +102,9 @@ def create_objectives_card(objectives):
     """
 
 def create_subtopic_card(subtopic, i):
-    key_concepts = ', '.join(subtopic.get('key_concepts', ['N/A']))
-    example = subtopic.get('examples', ['N/A'])[0]
-    misconception = subtopic.get('misconceptions', ['N/A'])[0]
+    key_concepts = ', '.join(subtopic.get('key_concepts') or ['N/A'])
+    example = (subtopic.get('examples') or ['N/A'])[0]
+    misconception = (subtopic.get('misconceptions') or ['N/A'])[0]
     
     return f"""
     <div class="slide-card">
@@ -81,9 +125,11 @@ def create_summary_card(summary):
     cleaned_summary = summary.replace("#*", "").replace("🧠", "").strip()
     if not cleaned_summary.endswith("</div>"):
         cleaned_summary += "</div>"
-    while cleaned_summary.count("</div>") > 1:
-        last_div = cleaned_summary.rfind("</div>")
-        cleaned_summary = cleaned_summary[:last_div]
+    # Keep everything before the second closing div (single pass)
+    first_div = cleaned_summary.find("</div>")
+    second_div = cleaned_summary.find("</div>", first_div + len("</div>"))
+    if second_div != -1:
+        cleaned_summary = cleaned_summary[:second_div]
     
     return f"""
     <div class="slide-card" style="background-color:#f8f9fa;border-left:4px solid #3a0ca3">
@@ -123,6 +169,118 @@ def init_session_state():
         st.session_state.lesson_summary = None
     if 'all_references' not in st.session_state:
         st.session_state.all_references = []
+    if 'prefetched_objectives' not in st.session_state:
+        st.session_state.prefetched_objectives = {}
+    if 'lesson_version' not in st.session_state:
+        st.session_state.lesson_version = 0
+    if 'subtopics' not in st.session_state:
+        st.session_state.subtopics = None
+    if 'subtopic_references' not in st.session_state:
+        st.session_state.subtopic_references = {}
+    if 'render_cache' not in st.session_state:
+        st.session_state.render_cache = {}
+    if 'library_id' not in st.session_state:
+        st.session_state.library_id = None
+    if 'library_hits' not in st.session_state:
+        st.session_state.library_hits = []
+    if 'pending_request' not in st.session_state:
+        st.session_state.pending_request = None
+    if 'deck_artifact' not in st.session_state:
+        st.session_state.deck_artifact = None
+    if 'unit_artifact' not in st.session_state:
+        st.session_state.unit_artifact = None
+
+def start_new_lesson():
+    """Bump the lesson version and drop everything derived from the previous lesson"""
+    st.session_state.lesson_version += 1
+    st.session_state.subtopics = None
+    st.session_state.subtopic_references = {}
+    st.session_state.render_cache = {}
+    st.session_state.lesson_summary = None
+    st.session_state.all_references = []
+    st.session_state.library_id = None
+    st.session_state.library_hits = []
+
+def current_lesson_payload():
+    """Everything needed to redisplay or export the current lesson"""
+    subtopics = st.session_state.subtopics or {}
+    return {
+        "curriculum": st.session_state.current_curriculum,
+        "grade": st.session_state.current_grade,
+        "subject": st.session_state.current_subject,
+        "topic": st.session_state.valid_topic,
+        "objectives": st.session_state.objectives,
+        "subtopics": subtopics.get("subtopics", []),
+        "summary": st.session_state.lesson_summary,
+        "references": st.session_state.all_references,
+        "subtopic_references": st.session_state.subtopic_references,
+        "quiz_data": st.session_state.quiz_data,
+        "selected_images": st.session_state.selected_images,
+        "unsplash_images": st.session_state.unsplash_images
+    }
+
+def save_current_lesson():
+    """Store the finished lesson in the local library (best effort)"""
+    try:
+        st.session_state.library_id = save_lesson(
+            current_lesson_payload(), st.session_state.library_id
+        )
+    except Exception as e:
+        print(f"Error saving lesson to library: {str(e)}")
+
+def keep_export(key, spool):
+    """Register an export's spool in place of the session's previous one.
+
+    Returns a deferred download source, so Streamlit reads the file only
+    when the download is clicked instead of holding a copy in media storage.
+    """
+    if st.session_state.get(key):
+        discard_artifact(st.session_state[key])
+    st.session_state[key] = register_artifact(spool)
+    return artifact_reader(st.session_state[key])
+
+def check_export(key):
+    """Download callback: flag an export that expired before the user clicked"""
+    if artifact_size(st.session_state.get(key)) is None:
+        st.session_state.expired_export = key
+
+def show_expired_export(key, what):
+    if st.session_state.get("expired_export") == key:
+        del st.session_state.expired_export
+        st.warning(f"That {what} download has expired. Please regenerate the {what}.")
+
+def reuse_library_lesson(lesson_id):
+    """Load a stored lesson into the session instead of generating it again"""
+    lesson = load_lesson(lesson_id)
+    if not lesson:
+        st.error("That saved lesson could not be loaded.")
+        return
+    st.session_state.valid_topic = lesson["topic"]
+    st.session_state.show_suggestions = False
+    st.session_state.objectives = lesson.get("objectives")
+    st.session_state.quiz_data = lesson.get("quiz_data")
+    st.session_state.unsplash_images = lesson.get("unsplash_images") or {}
+    st.session_state.selected_images = lesson.get("selected_images") or {}
+    st.session_state.image_attempts = {
+        key: len(images) for key, images in st.session_state.unsplash_images.items()
+    }
+    start_new_lesson()
+    st.session_state.subtopics = {"subtopics": lesson.get("subtopics", [])}
+    st.session_state.lesson_summary = lesson.get("summary")
+    # JSON turns the integer subtopic indexes into strings
+    st.session_state.subtopic_references = {
+        int(i): refs for i, refs in (lesson.get("subtopic_references") or {}).items()
+    }
+    st.session_state.library_id = lesson_id
+
+def cached_html(key, builder, *args):
+    """Build an HTML fragment once per lesson version and reuse it on later reruns"""
+    cache = st.session_state.render_cache
+    if key not in cache:
+        # Stripped so joined fragments never leave an indented line after a blank one,
+        # which markdown would turn into a code block
+        cache[key] = builder(*args).strip()
+    return cache[key]
 
 def main():
     st.markdown(get_css_styles(), unsafe_allow_html=True)
@@ -135,13 +293,13 @@ def main():
         col1, col2 = st.columns(2)
         with col1:
             curriculum = st.selectbox("📚 Curriculum Standard", 
-                                    ["CBSE", "ICSE", "IGCSE", "State Board", "IB"])
+                                    ["CBSE", "ICSE", "IGCSE", "State Board", "IB"], key="form_curriculum")
         with col2:
             grade = st.selectbox("🎒 Grade Level", 
-                               [f"Grade {i}" for i in range(1, 13)] + ["College"])
+                               [f"Grade {i}" for i in range(1, 13)] + ["College"], key="form_grade")
         
-        subject = st.text_input("📝 Subject", placeholder="e.g., Quantum Physics, Art History")
-        topic = st.text_input("🔍 Topic", placeholder="e.g., Heisenberg Principle, Renaissance Art")
+        subject = st.text_input("📝 Subject", placeholder="e.g., Quantum Physics, Art History", key="form_subject")
+        topic = st.text_input("🔍 Topic", placeholder="e.g., Heisenberg Principle, Renaissance Art", key="form_topic")
         
         col3, col4 = st.columns(2)
         with col3:
@@ -149,22 +307,80 @@ def main():
         with col4:
             st.session_state.include_references = st.checkbox("📚 Include Reference Links", value=True)
             
-        submitted = st.form_submit_button("✨ Generate Lesson Plan", type="primary")
+        submitted = st.form_submit_button("✨ Generate Lesson Plan", type="primary", key="form_submit")
 
     if submitted:
         process_form_submission(curriculum, grade, subject, topic)
 
+    display_library_hits()
     display_suggestions(topic, curriculum, grade, subject)
 
     if st.session_state.valid_topic:
         display_lesson_plan(curriculum, grade, subject)
 
-def process_form_submission(curriculum, grade, subject, topic):
+    display_unit_export(curriculum, grade)
+
+    if os.getenv("EDUGENIUS_SHOW_TIMINGS"):
+        display_timings()
+
+def display_unit_export(curriculum, grade):
+    """Sidebar export of several saved lessons as a zip of decks or one merged deck"""
+    with st.sidebar:
+        st.subheader("📦 Unit Export")
+        try:
+            saved = list_lessons(curriculum, grade)
+        except Exception as e:
+            print(f"Error listing lessons: {str(e)}")
+            saved = []
+        if not saved:
+            st.caption(f"No saved {curriculum} {grade} lessons yet.")
+            return
+        labels = {row['id']: f"{row['topic']} · {row['subject']}" for row in saved}
+        chosen = st.multiselect("Lessons in this unit", list(labels), format_func=labels.get, key="unit_lessons")
+        merged = st.radio("Format", ["Zip of decks", "One merged deck"], key="unit_format") == "One merged deck"
+        show_expired_export("unit_artifact", "unit")
+        if st.button("📦 Export Unit", disabled=not chosen, use_container_width=True):
+            with st.spinner(f"🖨️ Building {len(chosen)} deck(s)..."):
+                try:
+                    # Process pool and python-pptx start only when a unit is exported
+                    from unit_export import export_unit
+                    lessons = [lesson for lesson in map(load_lesson, chosen) if lesson]
+                    with spooled_export() as spool:
+                        unit_file = export_unit(lessons, merged=merged, output=spool)
+                    st.download_button(
+                        label="⬇️ Download Unit",
+                        data=keep_export("unit_artifact", unit_file),
+                        file_name=f"EduGenius_Unit_{curriculum}_{grade.replace(' ', '_')}.{'pptx' if merged else 'zip'}",
+                        mime=("application/vnd.openxmlformats-officedocument.presentationml.presentation"
+                              if merged else "application/zip"),
+                        on_click=check_export, args=("unit_artifact",),
+                        use_container_width=True
+                    )
+                except Exception as e:
+                    st.error(f"Error exporting unit: {str(e)}")
+
+def display_timings():
+    """Show recent rerun latencies in the sidebar (EDUGENIUS_SHOW_TIMINGS=1)"""
+    with st.sidebar:
+        st.subheader("⏱️ Rerun Timings")
+        for name, stats in metrics_summary().items():
+            st.caption(
+                f"{name}: n={stats['count']} p50={stats['p50'] * 1000:.0f}ms "
+                f"p95={stats['p95'] * 1000:.0f}ms max={stats['max'] * 1000:.0f}ms"
+            )
+
+def process_form_submission(curriculum, grade, subject, topic, use_library=True):
+    st.session_state.pending_request = None
+    st.session_state.library_notice = None
+    st.session_state.library_hits = []
     if not subject or not topic:
         st.warning("Please enter both subject and topic")
+    elif use_library and offer_saved_lessons(curriculum, grade, subject, topic):
+        # Offer saved lessons first; generation continues only if the user asks for it
+        st.session_state.pending_request = (curriculum, grade, subject, topic)
     else:
         with st.spinner("🔍 Analyzing topic relevance..."):
-            validation = validate_topic(curriculum, grade, subject, topic)
+            validation = validate_topic_fast(curriculum, grade, subject, topic)
             
             if validation == "valid":
                 st.session_state.valid_topic = topic
@@ -172,8 +388,7 @@ def process_form_submission(curriculum, grade, subject, topic):
                 st.session_state.unsplash_images = {}
                 st.session_state.selected_images = {}
                 st.session_state.image_attempts = {}
-                st.session_state.lesson_summary = None
-                st.session_state.all_references = []
+                start_new_lesson()
                 
                 with st.spinner("📝 Crafting learning objectives..."):
                     st.session_state.objectives = generate_lesson_objectives(
@@ -181,30 +396,116 @@ def process_form_submission(curriculum, grade, subject, topic):
                     )
                 
                 with st.spinner("📝 Generating assessment questions..."):
-                    lesson_content = f"Topic: {topic}\nSubject: {subject}\nGrade: {grade}\nObjectives: {st.session_state.objectives}"
+                    lesson_content = quiz_lesson_content(topic, subject, grade, st.session_state.objectives)
                     st.session_state.quiz_data = generate_quiz_questions(
                         curriculum, grade, subject, topic, lesson_content
                     )
                 
             elif validation == "irrelevant":
-                with st.spinner("💡 Generating possible subtopics for your input..."):
-                    st.session_state.temp_subtopics = generate_subtopics(
-                        curriculum, grade, subject, topic, ""
+                with st.spinner("💡 Generating possible subtopics and better matching topics..."):
+                    st.session_state.temp_subtopics, suggestions = run_concurrently(
+                        (generate_subtopics, (curriculum, grade, subject, topic, "")),
+                        (suggest_topics, (curriculum, grade, subject))
                     )
                 
                 if isinstance(st.session_state.temp_subtopics, dict):
                     st.warning(f"⚠️ '{topic}' may not perfectly match {subject}. But here are some related subtopics we found:")
                     st.session_state.show_suggestions = True
+                    st.session_state.suggestions = suggestions
                     
-                    with st.spinner("🔎 Finding better matching topics..."):
-                        st.session_state.suggestions = suggest_topics(
-                            curriculum, grade, subject
-                        )
+                    # Warm up objectives for the likeliest picks while the user reads
+                    subtopic_topics = [
+                        f"{topic}: {subtopic['title']}"
+                        for subtopic in st.session_state.temp_subtopics.get("subtopics", [])
+                    ]
+                    cancel_prefetches(st.session_state.prefetched_objectives)
+                    pending = {}
+                    prefetch_objectives(generate_lesson_objectives, curriculum, grade, subject,
+                                        suggestions, pending)
+                    prefetch_objectives(generate_lesson_objectives, curriculum, grade, subject,
+                                        subtopic_topics, pending)
+                    st.session_state.prefetched_objectives = pending
                 else:
                     st.error("Couldn't generate related content. Please try a different topic.")
             
             elif validation == "harmful":
                 st.error("⚠️ This topic isn't appropriate for the selected grade level")
+            
+            elif validation == "unavailable":
+                st.error("⚠️ Lesson generation is temporarily unavailable. Please try again in a minute.")
+
+def similar_lesson_hit(curriculum, grade, subject, topic):
+    """The stored near-duplicate of this request as a library hit, if there is one"""
+    try:
+        match = find_similar_lesson(curriculum, grade, subject, topic)
+        lesson = load_lesson(match[0]) if match else None
+    except Exception as e:
+        print(f"Error looking up similar lessons: {str(e)}")
+        lesson = None
+    if not lesson:
+        return None
+    return {
+        "id": match[0], "curriculum": lesson.get("curriculum", curriculum), "grade": lesson.get("grade", grade),
+        "subject": lesson.get("subject", subject), "topic": lesson.get("topic", ""), "similarity": match[1],
+    }
+
+def offer_saved_lessons(curriculum, grade, subject, topic):
+    """Put saved lessons on this topic in front of the user; True if there are any.
+
+    Nothing is loaded until the user picks one, since a near-duplicate can
+    still be a different lesson.
+    """
+    hits = find_library_hits(curriculum, grade, subject, topic)
+    similar = similar_lesson_hit(curriculum, grade, subject, topic)
+    if similar:
+        st.session_state.library_hits = [similar] + [hit for hit in hits if hit['id'] != similar['id']]
+        st.session_state.library_notice = (
+            f"♻️ Your saved lesson on '{similar['topic']}' looks like the same topic "
+            f"({similar['similarity']:.0%} match for '{topic}'). Reuse it, or generate a new lesson."
+        )
+    return bool(st.session_state.library_hits)
+
+def find_library_hits(curriculum, grade, subject, topic):
+    """Search the local library for lessons on the same topic at the same level"""
+    start = time.perf_counter()
+    try:
+        # Only lessons whose topic has every word of this one; the subject or one
+        # shared word would match most lessons at the level
+        hits = search_lessons(topic, curriculum, grade, topic_only=True)
+    except Exception as e:
+        print(f"Error searching lesson library: {str(e)}")
+        hits = []
+    st.session_state.library_hits = hits
+    st.session_state.library_search_ms = (time.perf_counter() - start) * 1000
+    return hits
+
+def display_library_hits():
+    if not (st.session_state.library_hits or st.session_state.pending_request):
+        return
+    with st.expander("♻️ Reuse an Existing Lesson", expanded=True):
+        if st.session_state.get('library_notice'):
+            st.info(st.session_state.library_notice)
+        if st.session_state.library_hits:
+            st.caption(
+                f"Found {len(st.session_state.library_hits)} saved lesson(s) "
+                f"in {st.session_state.get('library_search_ms', 0):.0f} ms"
+            )
+        for hit in st.session_state.library_hits:
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                st.markdown(f"**{hit['topic']}** · {hit['subject']} · {hit['grade']} ({hit['curriculum']})")
+            with col2:
+                if st.button("Reuse", key=f"reuse_{hit['id']}"):
+                    st.session_state.pending_request = None
+                    st.session_state.library_notice = None
+                    reuse_library_lesson(hit['id'])
+                    st.rerun()
+        if st.session_state.pending_request and st.button("✨ Generate a New Lesson Instead"):
+            request = st.session_state.pending_request
+            st.session_state.pending_request = None
+            st.session_state.library_hits = []
+            st.session_state.library_notice = None
+            process_form_submission(*request, use_library=False)
 
 def display_suggestions(topic, curriculum, grade, subject):
     if st.session_state.show_suggestions:
@@ -216,10 +517,12 @@ def display_suggestions(topic, curriculum, grade, subject):
                     if st.button(f"Use This Subtopic", key=f"subtopic_{i}"):
                         st.session_state.valid_topic = f"{topic}: {subtopic['title']}"
                         st.session_state.show_suggestions = False
+                        start_new_lesson()
                         with st.spinner("📝 Creating objectives for selected subtopic..."):
-                            st.session_state.objectives = generate_lesson_objectives(
-                                curriculum, grade, subject, 
-                                st.session_state.valid_topic
+                            st.session_state.objectives = resolve_objectives(
+                                generate_lesson_objectives, curriculum, grade, subject,
+                                st.session_state.valid_topic,
+                                st.session_state.prefetched_objectives
                             )
                         st.rerun()
                     st.write("---")
@@ -231,106 +534,199 @@ def display_suggestions(topic, curriculum, grade, subject):
                 if st.button("✅ Use This Topic Instead"):
                     st.session_state.valid_topic = selected
                     st.session_state.show_suggestions = False
+                    start_new_lesson()
                     with st.spinner("📝 Creating objectives for selected topic..."):
-                        st.session_state.objectives = generate_lesson_objectives(
-                            curriculum, grade, subject, 
-                            st.session_state.valid_topic
+                        st.session_state.objectives = resolve_objectives(
+                            generate_lesson_objectives, curriculum, grade, subject,
+                            st.session_state.valid_topic,
+                            st.session_state.prefetched_objectives
                         )
                     st.rerun()
 
 def display_lesson_plan(curriculum, grade, subject):
+    st.session_state.current_curriculum = curriculum
     st.session_state.current_subject = subject
     st.session_state.current_grade = grade
     
-    st.markdown(create_lesson_overview(
-        curriculum, grade, subject, st.session_state.valid_topic
-    ), unsafe_allow_html=True)
-    
+    # Overview and objectives go out as a single frontend message
+    header_html = cached_html(
+        ("overview", curriculum, grade, subject, st.session_state.valid_topic),
+        create_lesson_overview, curriculum, grade, subject, st.session_state.valid_topic
+    )
     if st.session_state.objectives:
-        st.markdown(create_objectives_card(
-            st.session_state.objectives
-        ), unsafe_allow_html=True)
-    
-    with st.spinner("📚 Developing detailed lesson content..."):
-        subtopics = generate_subtopics(
-            curriculum, grade, subject, 
-            st.session_state.valid_topic,
-            st.session_state.objectives
+        header_html += "\n" + cached_html(
+            ("objectives",), create_objectives_card, st.session_state.objectives
         )
+    st.markdown(header_html, unsafe_allow_html=True)
+    
+    if st.session_state.subtopics is None:
+        with st.spinner("📚 Developing detailed lesson content..."):
+            st.session_state.subtopics = generate_subtopics(
+                curriculum, grade, subject, 
+                st.session_state.valid_topic,
+                st.session_state.objectives
+            )
+    subtopics = st.session_state.subtopics
     
     if isinstance(subtopics, dict) and "subtopics" in subtopics:
+        card_batch = []
         for i, subtopic in enumerate(subtopics["subtopics"], 1):
-            with st.container():
-                # Collect references if enabled
-                if st.session_state.include_references:
-                    with st.spinner(f"🔍 Finding references for: {subtopic['title']}"):
-                        references = search_references(
-                            subtopic['title'], 
-                            subject, 
-                            grade
-                        )
-                        st.session_state.all_references.extend(references)
-                
-                st.markdown(create_subtopic_card(subtopic, i), unsafe_allow_html=True)
-                
-                if st.session_state.include_visuals:
+            # Collect references once per lesson if enabled
+            if st.session_state.include_references and i not in st.session_state.subtopic_references:
+                with st.spinner(f"🔍 Finding references for: {subtopic['title']}"):
+                    st.session_state.subtopic_references[i] = search_references(
+                        subtopic['title'], 
+                        subject, 
+                        grade
+                    )
+            
+            card_batch.append(cached_html(("subtopic", i), create_subtopic_card, subtopic, i))
+            
+            # Image pickers sit between cards, so flush the batch before each one
+            if st.session_state.include_visuals:
+                with st.container():
+                    st.markdown("\n".join(card_batch), unsafe_allow_html=True)
+                    card_batch = []
                     handle_image_selection(subtopic, i)
+        if card_batch:
+            st.markdown("\n".join(card_batch), unsafe_allow_html=True)
 
-        with st.spinner("📝 Generating comprehensive lesson summary..."):
-            st.session_state.lesson_summary = generate_lesson_summary(
-                curriculum, grade, subject,
-                st.session_state.valid_topic,
-                subtopics["subtopics"]
-            )
+        st.session_state.all_references = [
+            ref for i in sorted(st.session_state.subtopic_references)
+            for ref in st.session_state.subtopic_references[i]
+        ]
+
+        # Empty when Gemini was unavailable last time; try again on this rerun
+        if not st.session_state.lesson_summary:
+            with st.spinner("📝 Generating comprehensive lesson summary..."):
+                st.session_state.lesson_summary = generate_lesson_summary(
+                    curriculum, grade, subject,
+                    st.session_state.valid_topic,
+                    subtopics["subtopics"]
+                )
+            st.session_state.render_cache.pop(("summary",), None)
+            # Degraded lessons (Gemini unavailable) are not worth keeping
+            if st.session_state.lesson_summary and st.session_state.objectives:
+                save_current_lesson()
         
         add_vertical_space(2)
-        st.markdown(create_summary_card(st.session_state.lesson_summary), unsafe_allow_html=True)
-        
-        # Display all references together at the end
+        # Summary and the reference list share one frontend message
+        closing_html = cached_html(("summary",), create_summary_card, st.session_state.lesson_summary)
         if st.session_state.include_references and st.session_state.all_references:
-            st.markdown("---")
-            st.markdown(render_references(st.session_state.all_references), unsafe_allow_html=True)
+            closing_html += "\n\n---\n\n" + cached_html(
+                ("references", len(st.session_state.all_references)),
+                render_references, st.session_state.all_references
+            )
+        st.markdown(closing_html, unsafe_allow_html=True)
         
         # Render quiz if it exists
         if st.session_state.quiz_data:
             render_quiz(st.session_state.quiz_data)
         
+        display_regenerate_controls(subtopics["subtopics"])
+        
         # Add PPT download button at the very end
         add_vertical_space(2)
         with st.container():
             st.markdown("---")
             st.subheader("📊 Presentation Export")
             
-            ppt_data = {
-                "curriculum": curriculum,
-                "grade": grade,
-                "subject": subject,
-                "topic": st.session_state.valid_topic,
-                "objectives": st.session_state.objectives,
-                "subtopics": subtopics["subtopics"],
-                "summary": st.session_state.lesson_summary,
-                "references": st.session_state.all_references,
-                "quiz_data": st.session_state.quiz_data,
-                "selected_images": st.session_state.selected_images,
-                "unsplash_images": st.session_state.unsplash_images
-            }
+            ppt_data = current_lesson_payload()
             
-            if st.button("🎨 Generate PowerPoint Presentation", use_container_width=True):
+            if st.button("🎨 Generate PowerPoint Presentation", use_container_width=True, key="export_ppt"):
                 with st.spinner("🖨️ Creating beautiful PowerPoint presentation..."):
                     try:
-                        ppt_file = generate_ppt(ppt_data)
+                        # python-pptx and PIL load only when a deck is actually exported
+                        from ppt_maker import generate_ppt
+                        with spooled_export() as spool:
+                            ppt_file = generate_ppt(ppt_data, output=spool)
                         st.download_button(
                             label="⬇️ Download PowerPoint",
-                            data=ppt_file,
+                            data=keep_export("deck_artifact", ppt_file),
                             file_name=f"EduGenius_Lesson_{subject.replace(' ', '_')}_{st.session_state.valid_topic[:20].replace(' ', '_')}.pptx",
                             mime="application/vnd.openxmlformats-officedocument.presentationml.presentation",
+                            on_click=check_export, args=("deck_artifact",),
                             use_container_width=True
                         )
                     except Exception as e:
                         st.error(f"Error generating PPT: {str(e)}")
+            show_expired_export("deck_artifact", "deck")
+    else:
+        st.error("Couldn't generate the lesson content right now.")
+        if st.button("🔄 Try Again"):
+            st.session_state.subtopics = None
+            st.rerun()
+
+QUIZ_SECTION_LABELS = {
+    "mcq": "Multiple Choice Questions",
+    "fillblank": "Fill in the Blank",
+    "descriptive": "Descriptive Questions"
+}
+
+def display_regenerate_controls(subtopics):
+    """Regenerate a single subtopic or quiz section instead of the whole lesson"""
+    options = [("subtopic", i) for i in range(1, len(subtopics) + 1)]
+    options += [("quiz", section) for section in QUIZ_SECTION_LABELS
+                if (st.session_state.quiz_data or {}).get(section)]
+
+    def label(option):
+        kind, value = option
+        if kind == "subtopic":
+            return f"Part {value}: {subtopics[value - 1]['title']}"
+        return f"Quiz: {QUIZ_SECTION_LABELS[value]}"
+
+    with st.expander("🔁 Not happy with a section? Regenerate just that part"):
+        choice = st.selectbox("Section to regenerate", options, format_func=label)
+        if st.button("🔁 Regenerate Section"):
+            kind, value = choice
+            lesson = current_lesson_payload()
+            with st.spinner(f"🔁 Regenerating {label(choice)}..."):
+                if kind == "subtopic":
+                    updated = regenerate_subtopic(
+                        lesson, value,
+                        st.session_state.include_visuals,
+                        st.session_state.include_references
+                    )
+                else:
+                    updated = regenerate_quiz_section(lesson, value)
+            if updated is None:
+                st.error("Couldn't regenerate that section right now. Please try again.")
+                return
+            apply_lesson_update(updated, value if kind == "subtopic" else None)
+            st.rerun()
+
+def apply_lesson_update(lesson, changed_subtopic=None):
+    """Take a partially regenerated lesson and drop only the cached cards it affects"""
+    st.session_state.subtopics = {"subtopics": lesson["subtopics"]}
+    st.session_state.lesson_summary = lesson.get("summary")
+    st.session_state.quiz_data = lesson.get("quiz_data")
+    st.session_state.unsplash_images = lesson.get("unsplash_images") or {}
+    st.session_state.selected_images = lesson.get("selected_images") or {}
+    st.session_state.subtopic_references = lesson.get("subtopic_references") or {}
+    st.session_state.all_references = lesson.get("references") or []
 
+    if changed_subtopic is not None:
+        new_key = subtopic_image_key(lesson["subtopics"][changed_subtopic - 1], changed_subtopic)
+        st.session_state.image_attempts[new_key] = IMAGE_OPTIONS
+        cache = st.session_state.render_cache
+        for key in list(cache):
+            if key in (("subtopic", changed_subtopic), ("summary",)) or key[0] == "references":
+                del cache[key]
+
+    if st.session_state.library_id:
+        save_current_lesson()
+
+@as_fragment
 def handle_image_selection(subtopic, i):
-    subtopic_key = f"{subtopic['title']}_{i}"
+    # Runs as a fragment: its buttons rerun this picker only, not the whole lesson page.
+    # Fragment reruns and the picker's share of full reruns are timed separately
+    with timed("rerun.fragment.image_picker" if in_fragment_rerun() else "render.image_picker"), profiled_fragment(
+            "image_picker", enabled=profile_requested(), session=session_tag(),
+            topic=st.session_state.get("valid_topic")):
+        _render_image_picker(subtopic, i)
+
+def _render_image_picker(subtopic, i):
+    subtopic_key = subtopic_image_key(subtopic, i)
     
     if subtopic_key not in st.session_state.unsplash_images:
         st.session_state.unsplash_images[subtopic_key] = []
@@ -339,39 +735,44 @@ def handle_image_selection(subtopic, i):
     
     if not st.session_state.unsplash_images[subtopic_key]:
         with st.spinner(f"🖼️ Finding visual options for: {subtopic['title']}..."):
-            for _ in range(3):
-                attempt = st.session_state.image_attempts[subtopic_key]
-                img_data = fetch_unsplash_image(
-                    subtopic['title'],
-                    st.session_state.current_subject,
-                    st.session_state.current_grade,
-                    attempt
-                )
-                if img_data:
-                    st.session_state.unsplash_images[subtopic_key].append(img_data)
-                st.session_state.image_attempts[subtopic_key] += 1
+            start_attempt = st.session_state.image_attempts[subtopic_key]
+            st.session_state.unsplash_images[subtopic_key] = fetch_image_options(
+                subtopic['title'],
+                st.session_state.current_subject,
+                st.session_state.current_grade,
+                start_attempt
+            )
+            st.session_state.image_attempts[subtopic_key] = start_attempt + IMAGE_OPTIONS
     
     if st.session_state.unsplash_images[subtopic_key]:
         st.subheader("🎨 Select Visual Aid")
         
+        options = st.session_state.unsplash_images[subtopic_key][:3]
+        # Thumbnails come from the local image cache and are served as Streamlit media
+        # files; the CDN URL is only used if a download failed
+        thumbnails = run_concurrently(*[
+            (get_image_bytes, (image_variant(img_data, 'small'),)) for img_data in options
+        ])
         cols = st.columns(3)
-        for idx, img_data in enumerate(st.session_state.unsplash_images[subtopic_key][:3]):
+        for idx, img_data in enumerate(options):
             with cols[idx]:
                 is_selected = st.session_state.selected_images.get(subtopic_key) == idx
+                st.image(thumbnails[idx] or image_variant(img_data, 'small'))
                 st.markdown(f"""
-                <div class="image-option {'selected' if is_selected else ''}">
-                    <img src="{img_data['url']}" class="diagram-img">
-                    <p class="unsplash-credit">Photo by {img_data['credit']}</p>
-                </div>
+                <p class="unsplash-credit">{'✅ Selected · ' if is_selected else ''}Photo by {img_data['credit']}</p>
                 """, unsafe_allow_html=True)
                 
                 if st.button(f"Select This", key=f"select_{subtopic_key}_{idx}"):
                     st.session_state.selected_images[subtopic_key] = idx
-                    st.rerun()
+                    # Pull the full-size variant into the image cache now so export doesn't wait on it
+                    get_prefetch_executor().submit(get_image_bytes, image_variant(img_data, 'regular'))
+                    if st.session_state.library_id:
+                        save_current_lesson()
+                    rerun_fragment()
         
         if st.button("🔄 Show Different Images", key=f"refresh_{subtopic_key}"):
             st.session_state.unsplash_images[subtopic_key] = []
-            st.rerun()
+            rerun_fragment()
     
     if (subtopic_key in st.session_state.selected_images and 
         st.session_state.selected_images[subtopic_key] is not None and
@@ -383,7 +784,8 @@ def handle_image_selection(subtopic, i):
         st.markdown(f"""
         <div class="image-container">
             <h4>📷 Selected Visual: {subtopic['title']}</h4>
-            <img src="{selected_img['url']}" 
+            <img src="{image_variant(selected_img, 'regular')}"
+                 loading="lazy" 
                  class="diagram-img" 
                  style="max-height:400px"
                  alt="Selected visual for {subtopic['title']}">
@@ -393,5 +795,12 @@ def handle_image_selection(subtopic, i):
         </div>
         """, unsafe_allow_html=True)
 
+def session_tag():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    return ctx.session_id[:8] if ctx else "local"
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with timed("rerun.full"), profiled("rerun", enabled=profile_requested(), session=session_tag(),
+                                        topic=lambda: st.session_state.get("valid_topic")):
+        main()
\ No newline at end of file
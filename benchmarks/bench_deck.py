@@ -0,0 +1,57 @@
+"""Deck build cost per slide: CPU time and slide XML size for generate_ppt.
+
+Uses a synthetic lesson and locally cached images, so no network or keys.
+
+Usage:
+    python benchmarks/bench_deck.py [--runs 20] [--images]
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+import zipfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("EDUGENIUS_IMAGE_CACHE_DIR", tempfile.mkdtemp(prefix="edugenius-bench-"))
+
+def slide_xml_sizes(deck: bytes):
+    """Uncompressed size of every slide part in a saved deck"""
+    with zipfile.ZipFile(io.BytesIO(deck)) as archive:
+        return [info.file_size for info in archive.infolist()
+                if info.filename.startswith("ppt/slides/slide") and info.filename.endswith(".xml")]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--images", action="store_true", help="Add locally served subtopic images")
+    args = parser.parse_args(argv)
+
+    from bench_unit_export import serve_images, synthetic_lesson
+    from ppt_maker import generate_ppt
+    import unit_export
+
+    lesson = synthetic_lesson(1, serve_images() if args.images else None)
+    unit_export.prefetch_images([lesson])
+    generate_ppt(dict(lesson))  # first build pays for imports and template loading
+
+    timings = []
+    for _ in range(args.runs):
+        start = time.process_time()
+        deck = generate_ppt(dict(lesson)).getvalue()
+        timings.append(time.process_time() - start)
+
+    sizes = slide_xml_sizes(deck)
+    median = statistics.median(timings)
+    print(f"{len(sizes)} slides: {median * 1000:.1f} ms CPU per deck, "
+          f"{median * 1000 / len(sizes):.2f} ms per slide; "
+          f"slide XML {sum(sizes) / len(sizes) / 1024:.1f} KB avg, {sum(sizes) / 1024:.0f} KB total; "
+          f"deck {len(deck) / 1024:.0f} KB")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
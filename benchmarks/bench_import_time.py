@@ -0,0 +1,70 @@
+"""Import-time budget check for the app modules.
+
+Runs `python -X importtime` in a fresh interpreter, pre-importing streamlit
+so only the app's own share is measured, and fails if:
+  - the median cumulative import time of `app` exceeds the budget, or
+  - a heavy dependency that should load on demand shows up at import.
+
+Usage:
+    python benchmarks/bench_import_time.py [--budget-ms 200] [--runs 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded on first use only; none of them may appear when the app starts
+DEFERRED_MODULES = ["google.generativeai", "pptx", "PIL", "streamlit_extras", "requests"]
+
+def measure(module: str = "app"):
+    """Return (cumulative microseconds for module, set of modules imported)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import streamlit; import {module}"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    cumulative, imported = None, set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumul, name = line.split("|")
+        name = name.strip()
+        imported.add(name)
+        if name == module:
+            cumulative = int(cumul)
+    return cumulative, imported
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float,
+                        default=float(os.getenv("EDUGENIUS_IMPORT_BUDGET_MS", "200")))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--module", default="app")
+    args = parser.parse_args(argv)
+
+    timings, leaked = [], set()
+    for _ in range(args.runs):
+        cumulative, imported = measure(args.module)
+        timings.append(cumulative / 1000)
+        leaked |= {m for m in DEFERRED_MODULES if m in imported}
+
+    median = statistics.median(timings)
+    print(f"import {args.module}: median {median:.1f} ms over {args.runs} runs "
+          f"(min {min(timings):.1f}, max {max(timings):.1f}, budget {args.budget_ms:.0f} ms)")
+
+    failed = False
+    if median > args.budget_ms:
+        print(f"FAIL: import time is over budget by {median - args.budget_ms:.1f} ms")
+        failed = True
+    if leaked:
+        print(f"FAIL: deferred modules imported at start-up: {', '.join(sorted(leaked))}")
+        failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
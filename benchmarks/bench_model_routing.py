@@ -0,0 +1,85 @@
+"""Per-stage latency and output tokens: one model for everything vs. model routing.
+
+Runs the whole Gemini pipeline (validate, suggest, objectives, quiz,
+subtopics, summary) against the stub backends, where fast-tier models
+answer sooner and every output token costs time. "baseline" sends every
+stage to gemini-1.5-flash with default settings; "routed" uses
+model_routing's per-stage routes, downgrading under load.
+
+The results only reflect the stub's own assumption that fast-tier models
+answer sooner; its replies are shorter than every token cap, so the caps
+never bind here. Confirm any saving against recorded live latencies.
+
+Usage:
+    python benchmarks/bench_model_routing.py [--lessons 16] [--concurrency 1,16] [--downgrade-at 8]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+STAGES = ["validate", "suggest", "objectives", "quiz", "subtopics", "summary"]
+
+def run_lesson(n: int):
+    from prompts import validate_topic, suggest_topics
+    from lesson_pipeline import build_lesson
+    # A unique topic per lesson, so single-flight and the response cache don't share calls
+    topic = f"Photosynthesis {n} {uuid.uuid4().hex[:6]}"
+    validate_topic("CBSE", "Grade 8", "Science", topic)
+    suggest_topics("CBSE", "Grade 8", f"Science {topic}")
+    return build_lesson("CBSE", "Grade 8", "Science", topic, include_visuals=False, include_references=False)
+
+def run(lessons: int, concurrency: int):
+    import metrics
+    metrics.reset()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(run_lesson, range(lessons)))
+    elapsed = time.perf_counter() - start
+    rows = {}
+    for stage in STAGES:
+        with metrics._lock:
+            tokens = list(metrics._samples.get(f"gemini.{stage}.output_tokens", ()))
+        rows[stage] = (metrics.percentile(f"upstream.{stage}", 50, 0.0),
+                       statistics.mean(tokens) if tokens else 0.0,
+                       metrics.count(f"gemini.{stage}.downgraded"))
+    return elapsed, rows, sum(result is None for result in results)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lessons", type=int, default=16)
+    parser.add_argument("--concurrency", default="1,16", help="Comma-separated lessons in flight")
+    parser.add_argument("--gemini-latency", type=float, default=0.3, help="Per-call latency of standard models")
+    parser.add_argument("--fast-latency", type=float, default=0.1, help="Per-call latency of fast-tier models")
+    parser.add_argument("--token-latency", type=float, default=0.002, help="Latency per output token")
+    parser.add_argument("--downgrade-at", type=int, default=8, help="In-flight calls that trigger downgrade")
+    args = parser.parse_args(argv)
+
+    import stub_backends
+    import model_routing
+    stub_backends.install(gemini_latency=args.gemini_latency, fast_gemini_latency=args.fast_latency,
+                          token_latency=args.token_latency)
+    model_routing.DOWNGRADE_INFLIGHT = args.downgrade_at
+    routed = dict(model_routing.ROUTES)
+    baseline = {stage: model_routing.StageRoute(model_routing.DEFAULT_MODEL, downgrade_model=None)
+                for stage in routed}
+
+    print(f"{'mode':<9} {'conc':>4} {'total s':>8}  " + "  ".join(f"{stage:>17}" for stage in STAGES))
+    print(f"{'':<9} {'':>4} {'':>8}  " + "  ".join(f"{'p50 ms/tok/down':>17}" for _ in STAGES))
+    for concurrency in [int(c) for c in args.concurrency.split(",")]:
+        for mode, routes in (("baseline", baseline), ("routed", routed)):
+            model_routing.ROUTES = routes
+            elapsed, rows, failed = run(args.lessons, concurrency)
+            cells = "  ".join(f"{p50 * 1000:>7.0f}/{tokens:>4.0f}/{down:>3d}" for p50, tokens, down in rows.values())
+            print(f"{mode:<9} {concurrency:>4} {elapsed:>8.2f}  {cells}"
+                  + (f"  ({failed} failed)" if failed else ""), flush=True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
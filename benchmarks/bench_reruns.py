@@ -0,0 +1,65 @@
+"""Full rerun vs. image-picker fragment cost, measured with AppTest on stubbed APIs.
+
+Generates a lesson, then clicks "Select This" repeatedly and reports the
+p50/p95 of rerun.full (the whole script) and render.image_picker (one
+picker's body). AppTest always reruns the whole script, so the picker
+body stands in for a fragment rerun, which executes only that body; a
+live server records real fragment reruns as rerun.fragment.image_picker
+(shown with EDUGENIUS_SHOW_TIMINGS=1).
+
+Usage:
+    python benchmarks/bench_reruns.py [--runs 20] [--topic Photosynthesis]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app.py")
+sys.path.insert(0, ROOT)
+
+METRICS = ["rerun.full", "render.image_picker"]
+
+def measure(runs: int = 20, topic: str = "Photosynthesis"):
+    """{metric: (count, p50 seconds, p95 seconds)} over `runs` image selections"""
+    from streamlit.testing.v1 import AppTest
+    import metrics
+
+    at = AppTest.from_file(APP, default_timeout=120).run()
+    at.text_input(key="form_subject").input("Science")
+    at.text_input(key="form_topic").input(topic)
+    at.button(key="form_submit").click().run()
+    metrics.reset()  # only the selection reruns count, not generating the lesson
+    for n in range(runs):
+        selects = [button for button in at.button if button.label == "Select This"]
+        if not selects:
+            raise RuntimeError("the lesson has no image picker")
+        selects[n % len(selects)].click().run()
+    return {name: (metrics.count(name), metrics.percentile(name, 50, 0.0), metrics.percentile(name, 95, 0.0))
+            for name in METRICS}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--topic", default="Photosynthesis")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="edugenius-reruns-")
+    os.environ["EDUGENIUS_LIBRARY_PATH"] = os.path.join(workdir, "library.db")
+    os.environ["EDUGENIUS_IMAGE_CACHE_DIR"] = os.path.join(workdir, "images")
+    os.chdir(ROOT)
+    import stub_backends
+    stub_backends.install()
+
+    results = measure(args.runs, args.topic)
+    print(f"{'metric':<22} {'n':>4} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, (count, p50, p95) in results.items():
+        print(f"{name:<22} {count:>4} {p50 * 1000:>8.1f} {p95 * 1000:>8.1f}")
+    full, picker = results["rerun.full"][1], results["render.image_picker"][1]
+    if picker:
+        print(f"a fragment rerun runs one picker: ~{full / picker:.1f}x less script work than a full rerun")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""Unit export throughput: sequential generate_ppt vs. the process pool.
+
+Builds synthetic lessons (no API keys needed). With --images, subtopic
+images are served from a local HTTP server into a fresh image cache, so
+the shared-cache path is exercised too.
+
+Usage:
+    python benchmarks/bench_unit_export.py [--lessons 12] [--workers 1,2,4] [--merged] [--images]
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Set before unit_export is imported so spawned workers share the same cache
+os.environ.setdefault("EDUGENIUS_IMAGE_CACHE_DIR", tempfile.mkdtemp(prefix="edugenius-bench-"))
+
+def serve_images():
+    """Serve one small JPEG per path from a background HTTP server and return its base URL"""
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (1080, 720), (67, 97, 238)).save(buffer, "JPEG")
+    body = buffer.getvalue()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+def synthetic_lesson(n: int, image_base: str = None) -> dict:
+    subtopics = [{
+        "title": f"Part {i}",
+        "content": "Light travels in straight lines and bounces off smooth surfaces. " * 8,
+        "key_concepts": ["reflection", "incidence", "normal"],
+        "examples": ["A plane mirror"],
+        "misconceptions": ["Mirrors reverse top and bottom"],
+    } for i in range(1, 6)]
+    images = {}
+    if image_base:
+        images = {f"Part {i}_{i}": [{"url": f"{image_base}/lesson{n}/part{i}.jpg"}] for i in range(1, 6)}
+    question = {"question": "Which law describes reflection?", "options": ["A", "B", "C", "D"],
+                "answer": "A", "explanation": "The angle of incidence equals the angle of reflection."}
+    return {
+        "curriculum": "CBSE", "grade": "Grade 8", "subject": "Physics", "topic": f"Light, lesson {n}",
+        "objectives": "\n".join(f"Objective {k}" for k in range(1, 6)),
+        "subtopics": subtopics,
+        "summary": "Summary of the lesson. " * 40,
+        "references": [{"title": f"Reference {k}", "url": f"https://example.org/{k}"} for k in range(5)],
+        "quiz_data": {"mcq": [question] * 5, "fillblank": [{"question": "__ light", "answer": "x"}] * 5,
+                      "descriptive": [{"question": "Explain", "key_points": ["a", "b"]}] * 3},
+        "unsplash_images": images,
+        "selected_images": {},
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lessons", type=int, default=12)
+    parser.add_argument("--workers", default=",".join(str(w) for w in sorted({1, 2, os.cpu_count() or 1})),
+                        help="Comma-separated pool sizes to try")
+    parser.add_argument("--merged", action="store_true", help="Export one merged deck instead of a zip")
+    parser.add_argument("--images", action="store_true", help="Add locally served subtopic images")
+    args = parser.parse_args(argv)
+
+    from ppt_maker import generate_ppt
+    import unit_export
+
+    image_base = serve_images() if args.images else None
+    lessons = [synthetic_lesson(n, image_base) for n in range(1, args.lessons + 1)]
+    unit_export.prefetch_images(lessons)  # same starting point for every run below
+
+    start = time.perf_counter()
+    for lesson in lessons:
+        generate_ppt(dict(lesson))
+    baseline = time.perf_counter() - start
+    print(f"sequential generate_ppt: {baseline:.2f}s for {args.lessons} lessons "
+          f"({os.cpu_count()} CPUs)")
+
+    for workers in [int(w) for w in args.workers.split(",")]:
+        unit_export.shutdown_export_pool()
+        unit_export.export_unit(lessons[:workers], merged=args.merged, workers=workers)  # start the pool
+        start = time.perf_counter()
+        output = unit_export.export_unit(lessons, merged=args.merged, workers=workers)
+        elapsed = time.perf_counter() - start
+        print(f"export_unit workers={workers}: {elapsed:.2f}s, speedup {baseline / elapsed:.2f}x, "
+              f"{len(output.getvalue()) / 1e6:.1f} MB {'pptx' if args.merged else 'zip'}")
+    unit_export.shutdown_export_pool()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""Concurrent-session load test for app.py against stubbed APIs.
+
+Drives the app headlessly with Streamlit's AppTest. Every simulated teacher
+submits the lesson form, opens a quiz answer, selects an image and exports
+the deck, and the run is repeated at each concurrency level. Reports
+sessions completed, throughput, latency percentiles per interaction and
+resident memory per session. Exits non-zero if any session errored or
+crashed.
+
+Usage:
+    python benchmarks/load_test.py [--sessions 1,2,4,8] [--rounds 2]
+                                   [--gemini-latency 0.3] [--http-latency 0.05]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app.py")
+sys.path.insert(0, ROOT)
+
+TOPICS = [
+    "Photosynthesis", "Newton's Laws of Motion", "Periodic Table", "Water Cycle",
+    "French Revolution", "Quadratic Equations", "Cell Division", "Electric Circuits",
+    "Plate Tectonics", "Acids and Bases", "Human Digestive System", "Light Reflection",
+    "Probability Basics", "Industrial Revolution", "Food Chains", "Chemical Bonding",
+]
+INTERACTIONS = ["load", "generate", "quiz_answer", "select_image", "export"]
+
+def rss_mb() -> float:
+    """Current resident set size of this process in MB"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource  # peak rather than current RSS, but close enough off Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+def _timed_run(latencies, name, element):
+    start = time.perf_counter()
+    element.run()
+    latencies[name].append(time.perf_counter() - start)
+
+def run_session(session_id: int, rounds: int, latencies, errors, keep, completed):
+    """One simulated teacher: generate, answer, pick an image and export, `rounds` times"""
+    try:
+        from streamlit.testing.v1 import AppTest
+
+        at = AppTest.from_file(APP, default_timeout=120)
+        _timed_run(latencies, "load", at)
+        for r in range(rounds):
+            at.text_input(key="form_subject").input("Science")
+            at.text_input(key="form_topic").input(TOPICS[(session_id * rounds + r) % len(TOPICS)])
+            _timed_run(latencies, "generate", at.button(key="form_submit").click())
+
+            answers = [b for b in at.button if b.label.startswith("Show Answer")]
+            if answers:
+                _timed_run(latencies, "quiz_answer", answers[0].click())
+
+            selects = [b for b in at.button if b.label == "Select This"]
+            if selects:
+                _timed_run(latencies, "select_image", selects[0].click())
+
+            exports = [b for b in at.button if b.key == "export_ppt"]
+            if exports:
+                _timed_run(latencies, "export", exports[0].click())
+
+            if at.exception or at.error:
+                errors.append(f"session {session_id}: " + "; ".join(
+                    [e.value for e in at.error] + [str(e.message) for e in at.exception]))
+        keep.append(at)  # held until the level ends so its memory is counted
+        completed.append(session_id)
+    except Exception:
+        # A crashed session must show up in the report, not just vanish from the numbers
+        errors.append(f"session {session_id} crashed:\n{traceback.format_exc()}")
+
+def run_level(sessions: int, rounds: int):
+    latencies = defaultdict(list)
+    errors, keep, completed = [], [], []
+    rss_before = rss_mb()
+    threads = [threading.Thread(target=run_session, args=(n, rounds, latencies, errors, keep, completed))
+               for n in range(sessions)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    rss_after = rss_mb()
+    keep.clear()
+    return latencies, errors, len(completed), elapsed, (rss_after - rss_before) / sessions, rss_after
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", default="1,2,4,8", help="Comma-separated concurrency levels")
+    parser.add_argument("--rounds", type=int, default=2, help="Lessons generated per session")
+    parser.add_argument("--gemini-latency", type=float, default=0.3, help="Seconds per fake Gemini call")
+    parser.add_argument("--http-latency", type=float, default=0.05, help="Seconds per fake HTTP call")
+    parser.add_argument("--quiz-mode", default="server", choices=["server", "client"],
+                        help="server mode renders answer buttons, which adds a quiz interaction")
+    args = parser.parse_args(argv)
+
+    # Fresh library and image cache so the first round really generates
+    workdir = tempfile.mkdtemp(prefix="edugenius-load-")
+    os.environ["EDUGENIUS_LIBRARY_PATH"] = os.path.join(workdir, "library.db")
+    os.environ["EDUGENIUS_IMAGE_CACHE_DIR"] = os.path.join(workdir, "images")
+    os.environ["EDUGENIUS_QUIZ_MODE"] = args.quiz_mode
+    os.chdir(ROOT)
+
+    import stub_backends
+    stub_backends.install(args.gemini_latency, args.http_latency)
+
+    print(f"{'sessions':>8} {'done':>5} {'wall s':>7} {'int/s':>6} {'MB/sess':>8} {'RSS MB':>7}  "
+          + "  ".join(f"{name + ' p50/p95/p99 ms':>30}" for name in INTERACTIONS))
+    failed = False
+    for sessions in [int(n) for n in args.sessions.split(",")]:
+        latencies, errors, completed, elapsed, per_session, rss = run_level(sessions, args.rounds)
+        total = sum(len(values) for values in latencies.values())
+        cells = []
+        for name in INTERACTIONS:
+            values = latencies.get(name, [])
+            cells.append(f"{percentile(values, 50) * 1000:>8.0f}/{percentile(values, 95) * 1000:>8.0f}/"
+                         f"{percentile(values, 99) * 1000:>8.0f}" if values else f"{'-':>26}")
+        print(f"{sessions:>8} {completed:>5} {elapsed:>7.1f} {total / elapsed:>6.2f} {per_session:>8.1f} {rss:>7.0f}  "
+              + "  ".join(f"{cell:>30}" for cell in cells), flush=True)
+        if completed < sessions:
+            failed = True
+            print(f"  only {completed} of {sessions} sessions completed")
+        for error in errors:
+            failed = True
+            print(f"  error: {error}")
+    print("upstream calls: " + ", ".join(f"{api}={n}" for api, n in stub_backends.CALLS.items()))
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""Spooled storage for exported decks and unit zips, with timed expiry.
+
+Exports are written into a SpooledTemporaryFile that stays in memory up
+to EDUGENIUS_SPOOL_MAX_MEMORY bytes and moves to disk (EDUGENIUS_ARTIFACT_DIR)
+beyond that. Registered artifacts are read back in chunks when a download
+is actually requested and are closed, which deletes any disk copy, once
+they are older than EDUGENIUS_ARTIFACT_TTL seconds.
+"""
+import os
+import time
+import uuid
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+SPOOL_MAX_MEMORY = int(os.getenv("EDUGENIUS_SPOOL_MAX_MEMORY", str(1024 * 1024)))
+ARTIFACT_DIR = os.getenv("EDUGENIUS_ARTIFACT_DIR") or None  # None: the system temp dir
+ARTIFACT_TTL = float(os.getenv("EDUGENIUS_ARTIFACT_TTL", "1800"))
+CHUNK_SIZE = 64 * 1024
+
+_artifacts: Dict[str, Dict] = {}  # id -> {"file", "lock", "created", "size"}
+_artifacts_lock = threading.Lock()
+_sweeper = None
+
+def new_spool():
+    """Writable file for one export; rolls over to disk above SPOOL_MAX_MEMORY"""
+    if ARTIFACT_DIR:
+        os.makedirs(ARTIFACT_DIR, exist_ok=True)
+    return tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY, dir=ARTIFACT_DIR)
+
+@contextmanager
+def spooled_export():
+    """New spool for an export that is closed if building it fails; register it on success"""
+    spool = new_spool()
+    try:
+        yield spool
+    except BaseException:
+        spool.close()
+        raise
+
+def temp_path(suffix: str = "") -> str:
+    """Path for an intermediate file (for example a worker-built deck); the caller removes it"""
+    if ARTIFACT_DIR:
+        os.makedirs(ARTIFACT_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=suffix, prefix="edugenius-", dir=ARTIFACT_DIR)
+    os.close(fd)
+    return path
+
+def _sweep_forever():
+    while True:
+        time.sleep(max(1.0, min(ARTIFACT_TTL / 4, 300)))
+        expire_artifacts()
+
+def _start_sweeper():
+    global _sweeper
+    if _sweeper is None:
+        _sweeper = threading.Thread(target=_sweep_forever, name="edugenius-artifact-sweeper", daemon=True)
+        _sweeper.start()
+
+def register_artifact(spool) -> str:
+    """Keep a finished export until it expires and return its id"""
+    spool.seek(0, os.SEEK_END)
+    artifact_id = uuid.uuid4().hex
+    with _artifacts_lock:
+        _artifacts[artifact_id] = {
+            "file": spool, "lock": threading.Lock(), "created": time.time(), "size": spool.tell(),
+            "readers": 0, "discarded": False,
+        }
+        _start_sweeper()
+    return artifact_id
+
+def artifact_size(artifact_id: str) -> Optional[int]:
+    with _artifacts_lock:
+        artifact = _artifacts.get(artifact_id)
+    return artifact["size"] if artifact else None
+
+def _release(artifact: Dict):
+    """Drop one reader; the last one out closes an artifact that was discarded meanwhile"""
+    with artifact["lock"]:
+        artifact["readers"] -= 1
+        if artifact["discarded"] and not artifact["readers"]:
+            artifact["file"].close()
+
+def iter_artifact(artifact_id: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield an artifact's bytes in chunks; raises FileNotFoundError once it has expired.
+
+    The lock is held only while a chunk is read, so a slow client never
+    blocks other downloads or a discard. A discarded artifact stays open
+    until the downloads already reading it have finished.
+    """
+    with _artifacts_lock:
+        artifact = _artifacts.get(artifact_id)
+    if artifact is None:
+        raise FileNotFoundError("This export has expired; please generate it again")
+    with artifact["lock"]:
+        if artifact["discarded"]:
+            raise FileNotFoundError("This export has expired; please generate it again")
+        artifact["readers"] += 1
+    try:
+        offset = 0
+        while True:
+            with artifact["lock"]:
+                artifact["file"].seek(offset)
+                chunk = artifact["file"].read(chunk_size)
+            if not chunk:
+                break
+            offset += len(chunk)
+            yield chunk
+    finally:
+        _release(artifact)
+
+def read_artifact(artifact_id: str) -> bytes:
+    """An artifact's whole content in a single read; raises FileNotFoundError once it has expired"""
+    with _artifacts_lock:
+        artifact = _artifacts.get(artifact_id)
+    if artifact is None:
+        raise FileNotFoundError("This export has expired; please generate it again")
+    with artifact["lock"]:
+        if artifact["discarded"]:
+            raise FileNotFoundError("This export has expired; please generate it again")
+        artifact["file"].seek(0)
+        return artifact["file"].read()
+
+def artifact_reader(artifact_id: str) -> Callable[[], bytes]:
+    """Deferred download source: the bytes are only read when the user clicks.
+
+    Streamlit's media storage needs the whole file as bytes, so this makes
+    that one copy, at click time, instead of joining a list of chunks.
+    """
+    return lambda: read_artifact(artifact_id)
+
+def discard_artifact(artifact_id: str):
+    """Forget an artifact; it is closed now, or when its last running download ends"""
+    with _artifacts_lock:
+        artifact = _artifacts.pop(artifact_id, None)
+    if artifact:
+        with artifact["lock"]:
+            artifact["discarded"] = True
+            if not artifact["readers"]:
+                artifact["file"].close()
+
+def expire_artifacts(now: float = None) -> int:
+    """Close artifacts older than ARTIFACT_TTL; returns how many were removed"""
+    cutoff = (now or time.time()) - ARTIFACT_TTL
+    with _artifacts_lock:
+        expired = [artifact_id for artifact_id, artifact in _artifacts.items() if artifact["created"] < cutoff]
+    for artifact_id in expired:
+        discard_artifact(artifact_id)
+    return len(expired)
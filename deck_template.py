@@ -0,0 +1,199 @@
+"""Styled slide template for ppt_maker, loaded once per process.
+
+Slides are added from named layouts and only their placeholders are
+filled; fonts, colours, backgrounds and static text (footer, image
+credit) live in the layouts. EDUGENIUS_PPT_TEMPLATE can point at a
+.pptx that provides layouts with the names and placeholder idx values
+below; otherwise the built-in template is generated on first use.
+Either way the template's bytes are cached and every deck starts from a
+copy of them.
+"""
+import io
+import os
+import threading
+from typing import Dict, List, Optional
+
+from pptx import Presentation
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import nsdecls, qn
+from pptx.util import Inches
+
+TEMPLATE_PATH = os.getenv("EDUGENIUS_PPT_TEMPLATE")
+
+TITLE_LAYOUT = "EduGenius Title"
+CONTENT_LAYOUT = "EduGenius Content"
+PICTURE_LAYOUT = "EduGenius Picture"
+SECTION_LAYOUT = "EduGenius Section"
+LAYOUT_NAMES = (TITLE_LAYOUT, CONTENT_LAYOUT, PICTURE_LAYOUT, SECTION_LAYOUT)
+# Placeholder idx values ppt_maker fills on each layout
+LAYOUT_PLACEHOLDERS = {
+    TITLE_LAYOUT: {0, 1},       # title, subtitle
+    CONTENT_LAYOUT: {0, 1},     # title, body
+    PICTURE_LAYOUT: {0, 1, 2},  # title, picture, text
+    SECTION_LAYOUT: {0, 1},     # title, subtitle
+}
+
+# Body text levels of the content layout; ppt_maker picks a level per paragraph
+BODY_LEVELS = [
+    {"size": 20, "color": "282828", "space_after": 6},                 # paragraphs, bullets
+    {"size": 18, "bold": True, "color": "282828", "space_after": 6},   # quiz questions
+    {"size": 16, "color": "282828"},                                  # options and answers
+    {"size": 14, "italic": True, "color": "646464"},                  # explanations
+    {"size": 14, "color": "282828"},                                  # key points
+]
+# Text next to an image is set a little smaller
+PICTURE_LEVELS = [dict(BODY_LEVELS[0], size=18)]
+
+PURPLE = "3A0CA3"
+
+_template_bytes = None
+_template_lock = threading.Lock()
+
+def _level_xml(n: int, style: Dict) -> str:
+    align = style.get("align", "l")
+    attrs = f'sz="{style["size"] * 100}"'
+    if style.get("bold"):
+        attrs += ' b="1"'
+    if style.get("italic"):
+        attrs += ' i="1"'
+    return (
+        f'<a:lvl{n}pPr marL="0" indent="0" algn="{align}">'
+        f'<a:lnSpc><a:spcPct val="100000"/></a:lnSpc>'
+        f'<a:spcBef><a:spcPts val="0"/></a:spcBef>'
+        f'<a:spcAft><a:spcPts val="{int(style.get("space_after", 0) * 100)}"/></a:spcAft>'
+        f'<a:buNone/>'
+        f'<a:defRPr {attrs}><a:solidFill><a:srgbClr val="{style["color"]}"/></a:solidFill></a:defRPr>'
+        f'</a:lvl{n}pPr>'
+    )
+
+def _style_placeholder(placeholder, left: float, top: float, width: float, height: float,
+                       levels: List[Dict], anchor: Optional[str] = None):
+    """Position a layout placeholder and give its text levels fixed styles"""
+    placeholder.left, placeholder.top = Inches(left), Inches(top)
+    placeholder.width, placeholder.height = Inches(width), Inches(height)
+    if not placeholder.has_text_frame:
+        return
+    tx_body = placeholder._element.txBody
+    old = tx_body.find(qn("a:lstStyle"))
+    lst_style = parse_xml(f'<a:lstStyle {nsdecls("a")}>'
+                          + "".join(_level_xml(n, style) for n, style in enumerate(levels, 1))
+                          + '</a:lstStyle>')
+    tx_body.replace(old, lst_style)
+    if anchor:
+        tx_body.bodyPr.set("anchor", anchor)
+
+def _set_background(layout, fill_xml: str):
+    c_sld = layout._element.cSld
+    existing = c_sld.find(qn("p:bg"))
+    if existing is not None:
+        c_sld.remove(existing)
+    c_sld.insert(0, parse_xml(f'<p:bg {nsdecls("p", "a")}><p:bgPr>{fill_xml}'
+                              f'<a:effectLst/></p:bgPr></p:bg>'))
+
+def _solid(color: str) -> str:
+    return f'<a:solidFill><a:srgbClr val="{color}"/></a:solidFill>'
+
+def _gradient(start: str, end: str) -> str:
+    return (f'<a:gradFill rotWithShape="1"><a:gsLst>'
+            f'<a:gs pos="0"><a:srgbClr val="{start}"/></a:gs>'
+            f'<a:gs pos="100000"><a:srgbClr val="{end}"/></a:gs>'
+            f'</a:gsLst><a:lin ang="5400000" scaled="0"/></a:gradFill>')
+
+def _add_static_text(layout, text: str, left: float, top: float, width: float, height: float,
+                     size: int, color: str, align: str = "ctr"):
+    """Text drawn by the layout itself, so slides using it carry no copy of it"""
+    box = layout.shapes._spTree.add_textbox(
+        layout.shapes._next_shape_id, "Static Text", Inches(left), Inches(top), Inches(width), Inches(height)
+    )
+    box.txBody.append(parse_xml(
+        f'<a:p {nsdecls("a")}><a:pPr algn="{align}"/><a:r>'
+        f'<a:rPr lang="en-US" sz="{size * 100}"><a:solidFill><a:srgbClr val="{color}"/></a:solidFill></a:rPr>'
+        f'<a:t>{text}</a:t></a:r></a:p>'
+    ))
+    box.txBody.remove(box.txBody.find(qn("a:p")))
+
+def _drop_footer_placeholders(layout):
+    for placeholder in list(layout.placeholders):
+        if placeholder.placeholder_format.idx >= 10:  # date, footer, slide number
+            placeholder._element.getparent().remove(placeholder._element)
+
+def build_default_template() -> bytes:
+    """Generate the built-in 16:9 template from python-pptx's default one"""
+    prs = Presentation()
+    prs.slide_width = Inches(13.333)
+    prs.slide_height = Inches(7.5)
+    layouts = prs.slide_layouts
+    title, content, section, picture = layouts[0], layouts[1], layouts[2], layouts[8]
+    for layout in [layout for layout in layouts if layout not in (title, content, section, picture)]:
+        layouts.remove(layout)
+
+    heading = [{"size": 36, "bold": True, "color": PURPLE}]
+
+    title.name = TITLE_LAYOUT
+    _drop_footer_placeholders(title)
+    _set_background(title, _gradient(PURPLE, "6A0DAD"))
+    _style_placeholder(title.placeholders[0], 1, 2, 11, 2,
+                       [{"size": 48, "bold": True, "color": "FFFFFF", "align": "ctr"}], anchor="ctr")
+    _style_placeholder(title.placeholders[1], 1, 4, 11, 1,
+                       [{"size": 26, "color": "DCDCFF", "align": "ctr"}], anchor="t")
+    _add_static_text(title, "Generated by EduGenius Pro", 1, 6.8, 11, 0.5, 14, "C8C8FF")
+
+    content.name = CONTENT_LAYOUT
+    _drop_footer_placeholders(content)
+    _style_placeholder(content.placeholders[0], 0.7, 0.5, 12, 1, heading, anchor="ctr")
+    _style_placeholder(content.placeholders[1], 0.7, 1.5, 11.5, 5.2, BODY_LEVELS, anchor="t")
+
+    picture.name = PICTURE_LAYOUT
+    _drop_footer_placeholders(picture)
+    _style_placeholder(picture.placeholders[0], 0.7, 0.5, 12, 1, heading, anchor="ctr")
+    _style_placeholder(picture.placeholders[1], 6.5, 1.5, 6.3, 4.5, [])
+    _style_placeholder(picture.placeholders[2], 0.7, 1.5, 5.5, 5, PICTURE_LEVELS, anchor="t")
+    _add_static_text(picture, "Image from Unsplash", 6.5, 6.1, 4, 0.3, 10, "969696", align="l")
+
+    section.name = SECTION_LAYOUT
+    _drop_footer_placeholders(section)
+    _set_background(section, _solid("4361EE"))
+    _style_placeholder(section.placeholders[0], 1, 2.5, 11, 1.5,
+                       [{"size": 40, "bold": True, "color": "FFFFFF", "align": "ctr"}], anchor="b")
+    _style_placeholder(section.placeholders[1], 1, 4, 11, 1,
+                       [{"size": 24, "color": "DCDCFF", "align": "ctr"}], anchor="t")
+
+    buffer = io.BytesIO()
+    prs.save(buffer)
+    return buffer.getvalue()
+
+def _load_template_file(path: str) -> Optional[bytes]:
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        layouts = {layout.name: layout for layout in Presentation(io.BytesIO(data)).slide_layouts}
+    except Exception as e:
+        print(f"Error loading PPT template {path}: {str(e)}")
+        return None
+    missing = [name for name in LAYOUT_NAMES if name not in layouts]
+    if missing:
+        print(f"PPT template {path} has no layout named {', '.join(missing)}; using the built-in one")
+        return None
+    for name, required in LAYOUT_PLACEHOLDERS.items():
+        found = {placeholder.placeholder_format.idx for placeholder in layouts[name].placeholders}
+        if not required <= found:
+            print(f"PPT template {path}: layout {name} lacks placeholder idx "
+                  f"{', '.join(map(str, sorted(required - found)))}; using the built-in one")
+            return None
+    return data
+
+def template_bytes() -> bytes:
+    """The template every deck is created from, built or read once per process"""
+    global _template_bytes
+    if _template_bytes is None:
+        with _template_lock:
+            if _template_bytes is None:
+                data = _load_template_file(TEMPLATE_PATH) if TEMPLATE_PATH else None
+                _template_bytes = data or build_default_template()
+    return _template_bytes
+
+def new_presentation():
+    return Presentation(io.BytesIO(template_bytes()))
+
+def layout(prs, name: str):
+    return prs.slide_layouts.get_by_name(name)
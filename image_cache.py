@@ -0,0 +1,120 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional
+import api_transport
+
+# Shared by the app, the warm-up job and deck builders (also across processes)
+CACHE_DIR = os.getenv("EDUGENIUS_IMAGE_CACHE_DIR", ".image_cache")
+MEMORY_ITEMS = int(os.getenv("EDUGENIUS_IMAGE_MEMORY_ITEMS", "64"))
+
+_memory = OrderedDict()  # content hash -> bytes, small hot set
+_memory_lock = threading.Lock()
+_url_locks = {}  # url -> [lock, threads using it]; dropped once no download is waiting
+_url_locks_guard = threading.Lock()
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def _blob_path(digest: str) -> str:
+    return os.path.join(CACHE_DIR, "blobs", digest[:2], digest)
+
+def _index_path(url: str) -> str:
+    return os.path.join(CACHE_DIR, "urls", _sha256(url.encode()))
+
+def _write_atomic(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def _remember(digest: str, data: bytes):
+    with _memory_lock:
+        _memory[digest] = data
+        _memory.move_to_end(digest)
+        while len(_memory) > MEMORY_ITEMS:
+            _memory.popitem(last=False)
+
+@contextmanager
+def _url_lock(url: str):
+    """Hold the per-URL download lock, removing it when the last user is done"""
+    with _url_locks_guard:
+        entry = _url_locks.setdefault(url, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _url_locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _url_locks[url]
+
+def cached_digest(url: str) -> Optional[str]:
+    """Content hash stored for a URL, if it has been downloaded before"""
+    try:
+        with open(_index_path(url)) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+def _read_cached(url: str) -> Optional[bytes]:
+    digest = cached_digest(url)
+    if not digest:
+        return None
+    with _memory_lock:
+        if digest in _memory:
+            _memory.move_to_end(digest)
+            return _memory[digest]
+    try:
+        with open(_blob_path(digest), "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    _remember(digest, data)
+    return data
+
+def get_image_bytes(url: str, timeout: int = 10) -> Optional[bytes]:
+    """Return image bytes for a URL, downloading it at most once per cache directory.
+
+    Blobs are stored by content hash, so two URLs serving the same file share
+    one copy on disk.
+    """
+    if not url:
+        return None
+    data = _read_cached(url)
+    if data is not None:
+        return data
+
+    with _url_lock(url):
+        # Another thread may have finished the download while we waited
+        data = _read_cached(url)
+        if data is not None:
+            return data
+
+        try:
+            response = api_transport.get(url, timeout=timeout)
+            response.raise_for_status()
+            data = response.content
+        except Exception as e:
+            print(f"Error downloading image: {str(e)}")
+            return None
+
+        digest = _sha256(data)
+        try:
+            if not os.path.exists(_blob_path(digest)):
+                _write_atomic(_blob_path(digest), data)
+            _write_atomic(_index_path(url), digest.encode())
+        except OSError as e:
+            print(f"Error writing image cache: {str(e)}")
+        _remember(digest, data)
+        return data
+
+def image_variant(img_data: dict, size: str = "regular") -> Optional[str]:
+    """URL of an Unsplash size variant (thumb, small, regular, full, raw), falling back to 'url'"""
+    if not img_data:
+        return None
+    return (img_data.get("urls") or {}).get(size) or img_data.get("url")
@@ -0,0 +1,225 @@
+import os
+import re
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Optional, Tuple
+from topic_keys import TopicIndex
+
+LIBRARY_PATH = os.getenv("EDUGENIUS_LIBRARY_PATH", "lesson_library.db")
+
+# Words that say nothing about what a lesson covers; matching on them finds every lesson
+SEARCH_STOP_WORDS = {
+    "a", "an", "the", "of", "in", "on", "for", "to", "and", "or", "with", "by",
+    "about", "from", "at", "as", "into", "is", "are", "how", "what", "why",
+    "introduction", "intro", "basics", "overview", "lesson", "topic", "unit",
+}
+
+_init_lock = threading.Lock()
+_initialized = {}  # path -> whether FTS5 is available
+
+_index_lock = threading.Lock()
+_topic_indexes = {}  # path -> (TopicIndex, updated_at of the newest lesson indexed)
+
+def _create_schema(conn: sqlite3.Connection) -> bool:
+    """Create the lesson tables and return True if the full-text index could be built"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS lessons (
+            id TEXT PRIMARY KEY,
+            curriculum TEXT NOT NULL,
+            grade TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            topic TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS lessons_level ON lessons (curriculum, grade)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS topic_verdicts (
+            key TEXT PRIMARY KEY,
+            verdict TEXT NOT NULL,
+            source TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        )
+    """)
+    try:
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS lessons_fts USING fts5(
+                id UNINDEXED, topic, subject, content,
+                tokenize = 'porter unicode61'
+            )
+        """)
+        return True
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5: search falls back to LIKE matching
+        return False
+
+@contextmanager
+def _connect(path: str = None):
+    path = path or LIBRARY_PATH
+    conn = sqlite3.connect(path, timeout=10)
+    conn.row_factory = sqlite3.Row
+    try:
+        if path not in _initialized:
+            with _init_lock:
+                if path not in _initialized:
+                    _initialized[path] = _create_schema(conn)
+                    conn.commit()
+        yield conn, _initialized[path]
+        conn.commit()
+    finally:
+        conn.close()
+
+def _searchable_text(lesson: Dict) -> str:
+    """Flatten the parts of a lesson worth searching into one text blob"""
+    parts = [lesson.get('objectives') or '', lesson.get('summary') or '']
+    for subtopic in lesson.get('subtopics') or []:
+        if isinstance(subtopic, dict):
+            parts.append(subtopic.get('title', ''))
+            parts.append(subtopic.get('content', ''))
+            parts.extend(subtopic.get('key_concepts', []))
+    for questions in (lesson.get('quiz_data') or {}).values():
+        parts.extend(q.get('question', '') for q in questions if isinstance(q, dict))
+    return "\n".join(str(part) for part in parts if part)
+
+def save_lesson(lesson: Dict, lesson_id: str = None, path: str = None) -> str:
+    """Insert or update a finished lesson and return its id"""
+    lesson_id = lesson_id or uuid.uuid4().hex
+    now = time.time()
+    payload = json.dumps(lesson, ensure_ascii=False)
+    with _connect(path) as (conn, has_fts):
+        conn.execute("""
+            INSERT INTO lessons (id, curriculum, grade, subject, topic, payload, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                curriculum = excluded.curriculum, grade = excluded.grade,
+                subject = excluded.subject, topic = excluded.topic,
+                payload = excluded.payload, updated_at = excluded.updated_at
+        """, (lesson_id, lesson.get('curriculum', ''), lesson.get('grade', ''),
+              lesson.get('subject', ''), lesson.get('topic', ''), payload, now, now))
+        if has_fts:
+            conn.execute("DELETE FROM lessons_fts WHERE id = ?", (lesson_id,))
+            conn.execute(
+                "INSERT INTO lessons_fts (id, topic, subject, content) VALUES (?, ?, ?, ?)",
+                (lesson_id, lesson.get('topic', ''), lesson.get('subject', ''), _searchable_text(lesson))
+            )
+    return lesson_id
+
+def load_lesson(lesson_id: str, path: str = None) -> Optional[Dict]:
+    """Return the stored lesson payload, or None if the id is unknown"""
+    with _connect(path) as (conn, _):
+        row = conn.execute("SELECT payload FROM lessons WHERE id = ?", (lesson_id,)).fetchone()
+    return json.loads(row['payload']) if row else None
+
+def list_lessons(curriculum: str = None, grade: str = None, subject: str = None,
+                 limit: int = 50, path: str = None) -> List[Dict]:
+    """Stored lessons for a level, most recently updated first"""
+    filters, params = [], []
+    for column, value in (("curriculum", curriculum), ("grade", grade), ("subject", subject)):
+        if value:
+            filters.append(f"{column} = ?")
+            params.append(value)
+    where = f" WHERE {' AND '.join(filters)}" if filters else ""
+    with _connect(path) as (conn, _):
+        rows = conn.execute(f"""
+            SELECT id, curriculum, grade, subject, topic, updated_at
+            FROM lessons{where}
+            ORDER BY updated_at DESC
+            LIMIT ?
+        """, params + [limit]).fetchall()
+    return [dict(row) for row in rows]
+
+def _search_words(text: str) -> List[str]:
+    return [word for word in re.findall(r"\w+", text.lower()) if word not in SEARCH_STOP_WORDS]
+
+def _fts_query(text: str, column: str = None) -> str:
+    """Turn free text into an FTS5 query that requires every content word, optionally in one column"""
+    words = _search_words(text)
+    if not words:
+        return ""
+    match = " AND ".join(f'"{word}"' for word in words)
+    return f"{column} : ({match})" if column else match
+
+def search_lessons(query: str, curriculum: str = None, grade: str = None,
+                   limit: int = 5, path: str = None, topic_only: bool = False) -> List[Dict]:
+    """Find stored lessons containing every content word of the query, best matches first.
+
+    With `topic_only`, the words must all appear in the lesson's topic; a
+    word shared with some lesson's body text is not enough.
+    """
+    match = _fts_query(query, "topic" if topic_only else None)
+    if not match:
+        return []
+
+    filters, params = [], []
+    if curriculum:
+        filters.append("l.curriculum = ?")
+        params.append(curriculum)
+    if grade:
+        filters.append("l.grade = ?")
+        params.append(grade)
+    where = "".join(f" AND {f}" for f in filters)
+
+    with _connect(path) as (conn, has_fts):
+        if has_fts:
+            rows = conn.execute(f"""
+                SELECT l.id, l.curriculum, l.grade, l.subject, l.topic, l.updated_at
+                FROM lessons_fts f JOIN lessons l ON l.id = f.id
+                WHERE lessons_fts MATCH ?{where}
+                ORDER BY bm25(lessons_fts, 10.0, 5.0, 1.0)
+                LIMIT ?
+            """, [match] + params + [limit]).fetchall()
+        else:
+            words = _search_words(query)
+            text = "l.topic" if topic_only else "(l.topic || ' ' || l.subject)"
+            likes = " AND ".join(f"lower({text}) LIKE ?" for _ in words)
+            rows = conn.execute(f"""
+                SELECT l.id, l.curriculum, l.grade, l.subject, l.topic, l.updated_at
+                FROM lessons l WHERE ({likes}){where}
+                ORDER BY l.updated_at DESC
+                LIMIT ?
+            """, [f"%{w}%" for w in words] + params + [limit]).fetchall()
+    return [dict(row) for row in rows]
+
+def _topic_index(path: str = None) -> TopicIndex:
+    """Similarity index over stored lessons, topped up with rows saved since the last call"""
+    path = path or LIBRARY_PATH
+    with _index_lock:
+        index, seen = _topic_indexes.get(path, (None, 0.0))
+        if index is None:
+            index = TopicIndex()
+        with _connect(path) as (conn, _):
+            rows = conn.execute("""
+                SELECT id, curriculum, grade, subject, topic, updated_at
+                FROM lessons WHERE updated_at > ? ORDER BY updated_at
+            """, (seen,)).fetchall()
+        for row in rows:
+            index.add(row['id'], row['curriculum'], row['grade'], row['subject'], row['topic'])
+            seen = row['updated_at']
+        _topic_indexes[path] = (index, seen)
+        return index
+
+def find_similar_lesson(curriculum: str, grade: str, subject: str, topic: str,
+                        threshold: float = None, path: str = None) -> Optional[Tuple[str, float]]:
+    """Return (lesson_id, similarity) of a stored near-duplicate of this request, if any"""
+    return _topic_index(path).lookup(curriculum, grade, subject, topic, threshold)
+
+def get_verdict(key: str, path: str = None) -> Optional[str]:
+    """Stored validation verdict for a normalized topic key"""
+    with _connect(path) as (conn, _):
+        row = conn.execute("SELECT verdict FROM topic_verdicts WHERE key = ?", (key,)).fetchone()
+    return row['verdict'] if row else None
+
+def save_verdict(key: str, verdict: str, source: str, path: str = None):
+    """Remember a validation verdict so the same topic is not checked again"""
+    with _connect(path) as (conn, _):
+        conn.execute("""
+            INSERT INTO topic_verdicts (key, verdict, source, updated_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                verdict = excluded.verdict, source = excluded.source, updated_at = excluded.updated_at
+        """, (key, verdict, source, time.time()))
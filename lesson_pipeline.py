@@ -0,0 +1,175 @@
+from typing import Callable, Dict, List, Optional
+from prompts import (
+    generate_lesson_objectives,
+    generate_subtopics,
+    generate_single_subtopic,
+    fetch_unsplash_image,
+    generate_quiz_questions,
+    generate_quiz_section,
+    generate_lesson_summary,
+    QUIZ_SECTIONS
+)
+from reference_search import search_references
+
+IMAGE_OPTIONS = 3  # candidates shown per subtopic in the image picker
+
+def _noop(api: str):
+    pass
+
+def quiz_lesson_content(topic: str, subject: str, grade: str, objectives: str) -> str:
+    """Context passed to the quiz prompt"""
+    return f"Topic: {topic}\nSubject: {subject}\nGrade: {grade}\nObjectives: {objectives}"
+
+def subtopic_image_key(subtopic: Dict, i: int) -> str:
+    """Key used for a subtopic's images in unsplash_images/selected_images"""
+    return f"{subtopic['title']}_{i}"
+
+def fetch_image_options(title: str, subject: str, grade: str, start_attempt: int = 0,
+                        count: int = IMAGE_OPTIONS, before_call: Callable = _noop) -> List[Dict]:
+    """Fetch up to `count` image candidates for a subtopic, starting at a given attempt"""
+    images = []
+    for attempt in range(start_attempt, start_attempt + count):
+        before_call("unsplash")
+        img_data = fetch_unsplash_image(title, subject, grade, attempt)
+        if img_data:
+            images.append(img_data)
+    return images
+
+def build_lesson(curriculum: str, grade: str, subject: str, topic: str,
+                 include_visuals: bool = True, include_references: bool = True,
+                 before_call: Callable = _noop) -> Optional[Dict]:
+    """Generate a complete lesson payload outside the Streamlit UI.
+
+    The result has the same shape the app saves to the lesson library and
+    hands to generate_ppt. `before_call` is invoked with "gemini", "unsplash"
+    or "search" before each upstream request so callers can pace them.
+    Returns None if any Gemini stage could not be generated.
+    """
+    before_call("gemini")
+    objectives = generate_lesson_objectives(curriculum, grade, subject, topic)
+
+    before_call("gemini")
+    quiz_data = generate_quiz_questions(
+        curriculum, grade, subject, topic,
+        quiz_lesson_content(topic, subject, grade, objectives)
+    )
+
+    before_call("gemini")
+    subtopics = generate_subtopics(curriculum, grade, subject, topic, objectives)
+    if not isinstance(subtopics, dict) or "subtopics" not in subtopics:
+        return None
+
+    subtopic_references = {}
+    unsplash_images = {}
+    selected_images = {}
+    for i, subtopic in enumerate(subtopics["subtopics"], 1):
+        if include_references:
+            before_call("search")
+            subtopic_references[i] = search_references(subtopic['title'], subject, grade)
+        if include_visuals:
+            key = subtopic_image_key(subtopic, i)
+            unsplash_images[key] = fetch_image_options(
+                subtopic['title'], subject, grade, before_call=before_call
+            )
+            selected_images[key] = None
+
+    before_call("gemini")
+    summary = generate_lesson_summary(curriculum, grade, subject, topic, subtopics["subtopics"])
+    if not summary or not objectives:
+        # Gemini was unavailable for part of the lesson; don't hand out a degraded copy
+        return None
+
+    return {
+        "curriculum": curriculum,
+        "grade": grade,
+        "subject": subject,
+        "topic": topic,
+        "objectives": objectives,
+        "subtopics": subtopics["subtopics"],
+        "summary": summary,
+        "references": [ref for i in sorted(subtopic_references) for ref in subtopic_references[i]],
+        "subtopic_references": subtopic_references,
+        "quiz_data": quiz_data,
+        "selected_images": selected_images,
+        "unsplash_images": unsplash_images
+    }
+
+def regenerate_subtopic(lesson: Dict, index: int, include_visuals: bool = True,
+                        include_references: bool = True, refresh_summary: bool = True,
+                        before_call: Callable = _noop) -> Optional[Dict]:
+    """Replace subtopic `index` (1-based) and rebuild only what depends on it.
+
+    Fetches new references and image candidates for that subtopic alone and,
+    if `refresh_summary`, regenerates the summary, which covers all subtopics.
+    Objectives, quiz and the other subtopics are left untouched. Returns an
+    updated copy of the lesson, or None if the new subtopic could not be made.
+    """
+    subtopics = list(lesson.get("subtopics") or [])
+    if not 1 <= index <= len(subtopics):
+        raise IndexError(f"lesson has no subtopic {index}")
+    old = subtopics[index - 1]
+
+    before_call("gemini")
+    new = generate_single_subtopic(
+        lesson["curriculum"], lesson["grade"], lesson["subject"], lesson["topic"],
+        lesson.get("objectives", ""),
+        [other.get("title", "") for i, other in enumerate(subtopics, 1) if i != index],
+        old.get("title", "")
+    )
+    if not isinstance(new, dict) or "error" in new or "title" not in new:
+        return None
+    subtopics[index - 1] = new
+
+    updated = dict(lesson, subtopics=subtopics)
+    unsplash_images = dict(lesson.get("unsplash_images") or {})
+    selected_images = dict(lesson.get("selected_images") or {})
+    unsplash_images.pop(subtopic_image_key(old, index), None)
+    selected_images.pop(subtopic_image_key(old, index), None)
+    if include_visuals:
+        key = subtopic_image_key(new, index)
+        unsplash_images[key] = fetch_image_options(
+            new['title'], lesson["subject"], lesson["grade"], before_call=before_call
+        )
+        selected_images[key] = None
+    updated["unsplash_images"] = unsplash_images
+    updated["selected_images"] = selected_images
+
+    # JSON round trips through the library turn the indexes into strings
+    subtopic_references = {int(i): refs for i, refs in (lesson.get("subtopic_references") or {}).items()}
+    subtopic_references.pop(index, None)
+    if include_references:
+        before_call("search")
+        subtopic_references[index] = search_references(new['title'], lesson["subject"], lesson["grade"])
+    updated["subtopic_references"] = subtopic_references
+    updated["references"] = [ref for i in sorted(subtopic_references) for ref in subtopic_references[i]]
+
+    if refresh_summary:
+        before_call("gemini")
+        summary = generate_lesson_summary(
+            lesson["curriculum"], lesson["grade"], lesson["subject"], lesson["topic"], subtopics
+        )
+        if summary:
+            updated["summary"] = summary
+    return updated
+
+def regenerate_quiz_section(lesson: Dict, section: str,
+                            before_call: Callable = _noop) -> Optional[Dict]:
+    """Replace one quiz section (mcq, fillblank or descriptive) and nothing else.
+
+    Returns an updated copy of the lesson, or None if no questions came back.
+    """
+    if section not in QUIZ_SECTIONS:
+        raise ValueError(f"unknown quiz section: {section}")
+    quiz_data = dict(lesson.get("quiz_data") or {})
+
+    before_call("gemini")
+    questions = generate_quiz_section(
+        lesson["curriculum"], lesson["grade"], lesson["subject"], lesson["topic"],
+        quiz_lesson_content(lesson["topic"], lesson["subject"], lesson["grade"], lesson.get("objectives", "")),
+        section,
+        [q.get("question", "") for q in quiz_data.get(section, [])]
+    )
+    if not questions:
+        return None
+    quiz_data[section] = questions
+    return dict(lesson, quiz_data=quiz_data)
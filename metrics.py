@@ -0,0 +1,63 @@
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Dict
+
+# Recent samples kept per metric; older ones are dropped
+MAX_SAMPLES = int(os.getenv("EDUGENIUS_METRIC_SAMPLES", "500"))
+
+_samples = defaultdict(lambda: deque(maxlen=MAX_SAMPLES))
+_lock = threading.Lock()
+
+def record(name: str, value: float):
+    """Store one sample (seconds for timings) under a metric name"""
+    with _lock:
+        _samples[name].append(value)
+
+@contextmanager
+def timed(name: str):
+    """Time the enclosed block, including blocks left through an exception such as st.rerun"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+def count(name: str) -> int:
+    """Number of recent samples held for a metric"""
+    with _lock:
+        return len(_samples.get(name, ()))
+
+def percentile(name: str, pct: float, default: float = None) -> float:
+    """Return the pct-th percentile of the recent samples for a metric"""
+    with _lock:
+        values = sorted(_samples.get(name, ()))
+    if not values:
+        return default
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+def summary() -> Dict[str, Dict[str, float]]:
+    """Count, p50, p95 and max for every metric recorded so far"""
+    with _lock:
+        names = list(_samples)
+    report = {}
+    for name in sorted(names):
+        with _lock:
+            values = list(_samples[name])
+        if not values:
+            continue
+        report[name] = {
+            "count": len(values),
+            "p50": percentile(name, 50),
+            "p95": percentile(name, 95),
+            "max": max(values),
+        }
+    return report
+
+def reset():
+    """Forget all recorded samples"""
+    with _lock:
+        _samples.clear()
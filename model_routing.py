@@ -0,0 +1,113 @@
+"""Per-stage Gemini model and generation settings.
+
+Each prompt stage gets a model, an output-token cap, a temperature and
+stop sequences sized to what it returns: one word for "validate", a short
+list for "suggest", large JSON for "subtopics" and "quiz". Override any
+field per stage with EDUGENIUS_MODEL_ROUTING, e.g.
+
+    EDUGENIUS_MODEL_ROUTING='{"quiz": {"model": "gemini-1.5-pro", "max_output_tokens": 6144}}'
+
+While EDUGENIUS_DOWNGRADE_INFLIGHT or more Gemini calls are in flight in
+this process, stages switch to their faster `downgrade_model`. Recorded
+cassettes are keyed on the configured model, so replay does not depend on
+whether a call was downgraded.
+"""
+import os
+import json
+import threading
+from contextlib import contextmanager
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import metrics
+
+DEFAULT_MODEL = "gemini-1.5-flash"
+FAST_MODEL = "gemini-1.5-flash-8b"
+# In-flight Gemini calls at which stages move to their downgrade model (0 = never)
+DOWNGRADE_INFLIGHT = int(os.getenv("EDUGENIUS_DOWNGRADE_INFLIGHT", "16"))
+CHARS_PER_TOKEN = 4  # estimate when the response carries no usage data
+
+class StageRoute(NamedTuple):
+    model: str = DEFAULT_MODEL
+    max_output_tokens: Optional[int] = None
+    temperature: Optional[float] = None
+    stop_sequences: Tuple[str, ...] = ()
+    downgrade_model: Optional[str] = FAST_MODEL
+
+    def generation_config(self) -> Dict:
+        config = {"max_output_tokens": self.max_output_tokens, "temperature": self.temperature,
+                  "stop_sequences": list(self.stop_sequences) or None}
+        return {key: value for key, value in config.items() if value is not None}
+
+DEFAULT_ROUTES = {
+    # One word; the first line break ends it so an added explanation is never generated
+    "validate": StageRoute(FAST_MODEL, 8, 0.0, ("\n",), None),
+    "suggest": StageRoute(FAST_MODEL, 160, 0.7, (), None),
+    "objectives": StageRoute(DEFAULT_MODEL, 320, 0.4),
+    "subtopics": StageRoute(DEFAULT_MODEL, 4096, 0.5),
+    "subtopic": StageRoute(DEFAULT_MODEL, 1536, 0.5),
+    "quiz": StageRoute(DEFAULT_MODEL, 4096, 0.3),
+    "quiz_section": StageRoute(DEFAULT_MODEL, 2048, 0.3),
+    "summary": StageRoute(DEFAULT_MODEL, 640, 0.5),
+}
+
+def configure(overrides: Dict = None) -> Dict[str, StageRoute]:
+    """Routes for every stage: the defaults with per-stage field overrides applied"""
+    routes = dict(DEFAULT_ROUTES)
+    for stage, fields in (overrides or {}).items():
+        try:
+            routes[stage] = routes.get(stage, StageRoute())._replace(**fields)
+        except (TypeError, ValueError) as e:
+            print(f"Ignoring model routing for {stage}: {str(e)}")
+    return routes
+
+def _env_overrides() -> Dict:
+    raw = os.getenv("EDUGENIUS_MODEL_ROUTING")
+    if not raw:
+        return {}
+    try:
+        overrides = json.loads(raw)
+        if not isinstance(overrides, dict):
+            raise ValueError("expected a JSON object of stages")
+        return overrides
+    except ValueError as e:
+        print(f"Ignoring EDUGENIUS_MODEL_ROUTING: {str(e)}")
+        return {}
+
+ROUTES = configure(_env_overrides())
+
+_inflight = 0
+_inflight_lock = threading.Lock()
+
+@contextmanager
+def in_flight():
+    """Count a Gemini call as in flight for the load-based downgrade"""
+    global _inflight
+    with _inflight_lock:
+        _inflight += 1
+    try:
+        yield
+    finally:
+        with _inflight_lock:
+            _inflight -= 1
+
+def configured_route(stage: str) -> StageRoute:
+    """The route configured for `stage`, before any load-based downgrade"""
+    return ROUTES.get(stage) or StageRoute()
+
+def route_for(stage: str) -> StageRoute:
+    """The route a call for `stage` should use right now"""
+    route = configured_route(stage)
+    if DOWNGRADE_INFLIGHT and route.downgrade_model and _inflight >= DOWNGRADE_INFLIGHT:
+        metrics.record(f"gemini.{stage}.downgraded", 1)
+        return route._replace(model=route.downgrade_model)
+    return route
+
+def record_usage(stage: str, text: str, usage=None):
+    """Record a call's prompt and output tokens, estimating output from the text if needed"""
+    output_tokens = getattr(usage, "candidates_token_count", None)
+    if output_tokens is None:
+        output_tokens = len(text or "") // CHARS_PER_TOKEN
+    metrics.record(f"gemini.{stage}.output_tokens", output_tokens)
+    prompt_tokens = getattr(usage, "prompt_token_count", None)
+    if prompt_tokens is not None:
+        metrics.record(f"gemini.{stage}.prompt_tokens", prompt_tokens)
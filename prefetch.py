@@ -0,0 +1,84 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+# Upper bound on background Gemini calls across all sessions of this process
+PREFETCH_WORKERS = int(os.getenv("EDUGENIUS_PREFETCH_WORKERS", "2"))
+# How many entries of each suggestion list get their objectives prefetched
+PREFETCH_LIMIT = int(os.getenv("EDUGENIUS_PREFETCH_LIMIT", "2"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_prefetch_executor() -> ThreadPoolExecutor:
+    """Return the shared, bounded executor used for background prefetching"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=PREFETCH_WORKERS,
+                thread_name_prefix="edugenius-prefetch"
+            )
+    return _executor
+
+def run_concurrently(*calls):
+    """Run (func, args) pairs on their own threads and return results in order"""
+    with ThreadPoolExecutor(max_workers=len(calls)) as pool:
+        futures = [pool.submit(func, *args) for func, args in calls]
+        return [future.result() for future in futures]
+
+class Prefetch:
+    """A background call that is skipped if cancelled before it reaches the upstream API.
+
+    Future.cancel() only stops work that is still queued; the flag also
+    covers a job a worker has already picked up.
+    """
+
+    def __init__(self, executor: ThreadPoolExecutor, func: Callable, *args):
+        self.cancelled = threading.Event()
+        self.future = executor.submit(self._run, func, args)
+
+    def _run(self, func, args):
+        if self.cancelled.is_set():
+            return None
+        return func(*args)
+
+    def cancel(self):
+        self.cancelled.set()
+        self.future.cancel()
+
+def prefetch_objectives(generate: Callable, curriculum: str, grade: str, subject: str,
+                        topics: List[str], pending: Dict = None) -> Dict:
+    """Queue objective generation for the first few topics in the background"""
+    pending = pending if pending is not None else {}
+    executor = get_prefetch_executor()
+    for topic in topics[:PREFETCH_LIMIT]:
+        if topic and topic not in pending:
+            pending[topic] = Prefetch(executor, generate, curriculum, grade, subject, topic)
+    return pending
+
+def cancel_prefetches(pending: Dict = None):
+    """Drop prefetches nobody will use; those already calling the API still finish"""
+    for prefetch in (pending or {}).values():
+        prefetch.cancel()
+    if pending:
+        pending.clear()
+
+def resolve_objectives(generate: Callable, curriculum: str, grade: str, subject: str,
+                       topic: str, pending: Dict = None) -> str:
+    """Use a prefetched result for the topic if there is one, otherwise generate it now"""
+    pending = pending or {}
+    prefetch = pending.pop(topic, None)
+
+    # The user has picked a topic, so the other prefetches are not needed
+    cancel_prefetches(pending)
+
+    if prefetch is not None and not prefetch.cancelled.is_set():
+        try:
+            result = prefetch.future.result()
+            if result:
+                return result
+        except Exception as e:
+            print(f"Prefetch failed for '{topic}': {str(e)}")
+    return generate(curriculum, grade, subject, topic)
@@ -0,0 +1,149 @@
+"""Opt-in profiling of app reruns and deck exports.
+
+Off unless EDUGENIUS_PROFILE=1 (every session) or the page is opened with
+?profile=1 (that session only). Full reruns are profiled as "rerun" and
+fragment-only reruns (image picker, server-mode quiz) as "fragment". A
+profiled block writes two files to EDUGENIUS_PROFILE_DIR, named by time,
+kind, session, topic, duration and a short random suffix:
+
+    *.prof       cProfile stats, for `python -m pstats` or snakeviz
+    *.collapsed  stack samples in collapsed form, for flamegraph.pl or speedscope
+
+With EDUGENIUS_PROFILE, EDUGENIUS_PROFILE_RATE profiles only that fraction
+of requests. EDUGENIUS_PROFILE_INTERVAL sets the stack sampling period in
+milliseconds and EDUGENIUS_PROFILE_MIN_MS drops profiles of requests faster
+than that.
+"""
+import os
+import re
+import sys
+import time
+import uuid
+import random
+import pstats
+import cProfile
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+ENABLED = os.getenv("EDUGENIUS_PROFILE", "").lower() in ("1", "true", "yes")
+PROFILE_DIR = os.getenv("EDUGENIUS_PROFILE_DIR", "profiles")
+SAMPLE_RATE = float(os.getenv("EDUGENIUS_PROFILE_RATE", "1.0"))
+SAMPLE_INTERVAL = float(os.getenv("EDUGENIUS_PROFILE_INTERVAL", "5")) / 1000
+MIN_DURATION = float(os.getenv("EDUGENIUS_PROFILE_MIN_MS", "0")) / 1000
+
+_local = threading.local()  # .active/.tags: this thread is inside a profiled block
+
+class StackSampler:
+    """Samples one thread's Python stack on a timer and counts the collapsed stacks"""
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="edugenius-profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def write(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+def _slug(value) -> str:
+    return re.sub(r"[^\w]+", "_", str(value or "")).strip("_")[:40] or "none"
+
+def profile_requested():
+    """True when the page was opened with ?profile=1; None leaves it to EDUGENIUS_PROFILE"""
+    import streamlit as st
+    return True if st.query_params.get("profile") == "1" else None
+
+def _should_profile(enabled) -> bool:
+    if getattr(_local, "active", False):
+        return True  # part of a request that is already being profiled
+    if enabled is not None:
+        return enabled
+    return ENABLED and random.random() < SAMPLE_RATE
+
+def _write(kind: str, tags: dict, elapsed: float, profiler, sampler: StackSampler):
+    # Tag values may be callables, read once the request has finished (the topic may be new)
+    values = {name: (value() if callable(value) else value) for name, value in tags.items()}
+    name = "-".join([time.strftime("%Y%m%d-%H%M%S"), kind]
+                    + [_slug(values[tag]) for tag in sorted(values)]
+                    + [f"{elapsed * 1000:.0f}ms", uuid.uuid4().hex[:6]])  # unique within a second
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        base = os.path.join(PROFILE_DIR, name)
+        if profiler is not None:
+            pstats.Stats(profiler).dump_stats(f"{base}.prof")
+        sampler.write(f"{base}.collapsed")
+    except Exception as e:
+        print(f"Error writing profile {name}: {str(e)}")
+
+@contextmanager
+def profiled(kind: str, enabled: bool = None, **tags):
+    """Profile the enclosed block if profiling is on for this request.
+
+    `enabled` overrides EDUGENIUS_PROFILE (the app passes the ?profile=1
+    flag). Blocks nested in a profiled one are always profiled and inherit
+    its tags: an export inside a profiled rerun gets its own stack samples,
+    while its calls also show up in the rerun's cProfile stats.
+    """
+    if not _should_profile(enabled):
+        yield
+        return
+
+    outer = not getattr(_local, "active", False)
+    parent_tags = {} if outer else _local.tags
+    tags = dict(parent_tags, **tags)
+    _local.active, _local.tags = True, tags
+    profiler = None
+    if outer:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # Python 3.12+ allows one cProfile at a time; keep the stack samples
+            profiler = None
+    sampler = StackSampler(threading.get_ident())
+    sampler.start()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if profiler is not None:
+            profiler.disable()
+        sampler.stop()
+        _local.active, _local.tags = not outer, parent_tags
+        if elapsed >= MIN_DURATION:
+            _write(kind, tags, elapsed, profiler, sampler)
+
+@contextmanager
+def profiled_fragment(name: str, enabled: bool = None, **tags):
+    """Profile a Streamlit fragment when it reruns on its own.
+
+    Inside a full rerun that is already profiled the fragment is part of
+    that profile, so nothing separate is written for it.
+    """
+    if getattr(_local, "active", False):
+        yield
+        return
+    with profiled("fragment", enabled, fragment=name, **tags):
+        yield
@@ -1,12 +1,77 @@
 import os
 import re
 import json
+import hashlib
+import threading
+from collections import OrderedDict
 from dotenv import load_dotenv
-import google.generativeai as genai
-import requests
+from resilience import resilient_call, GenerationUnavailable
+import api_transport
+import single_flight
+import model_routing
 
 load_dotenv()
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+
+_genai = None
+_genai_lock = threading.Lock()
+
+def _get_genai():
+    """Import and configure the Gemini SDK on first use; it is slow to import"""
+    global _genai
+    if _genai is None:
+        with _genai_lock:
+            if _genai is None:
+                import google.generativeai as genai
+                genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+                _genai = genai
+    return _genai
+
+# Last good response per prompt, served when Gemini is unhealthy
+RESPONSE_CACHE_SIZE = int(os.getenv("EDUGENIUS_RESPONSE_CACHE_SIZE", "256"))
+_response_cache = OrderedDict()
+_response_cache_lock = threading.Lock()
+
+def _generate(stage, prompt):
+    """Run one Gemini generation with per-stage deadline, hedging and circuit breaker.
+
+    Falls back to the last good response for the same prompt; raises
+    GenerationUnavailable if there is none.
+    """
+    key = hashlib.sha256(prompt.encode()).hexdigest()
+
+    def call():
+        route = model_routing.route_for(stage)
+        usage = []
+
+        def live():
+            model = _get_genai().GenerativeModel(route.model, generation_config=route.generation_config())
+            response = model.generate_content(prompt)
+            usage.append(getattr(response, "usage_metadata", None))
+            return response.text
+
+        with model_routing.in_flight():
+            text = api_transport.generate_text(route.model, prompt, live,
+                                               key_model=model_routing.configured_route(stage).model)
+        model_routing.record_usage(stage, text, usage[0] if usage else None)
+        return text
+
+    try:
+        # Identical prompts already in flight (same topic from many sessions) share one call
+        text = single_flight.coalesce(f"gemini:{stage}:{key}", resilient_call, stage, call)
+    except GenerationUnavailable as e:
+        with _response_cache_lock:
+            cached = _response_cache.get(key)
+        if cached is None:
+            print(f"Gemini unavailable for {stage}: {str(e)}")
+            raise
+        return cached
+
+    with _response_cache_lock:
+        _response_cache[key] = text
+        _response_cache.move_to_end(key)
+        while len(_response_cache) > RESPONSE_CACHE_SIZE:
+            _response_cache.popitem(last=False)
+    return text
 
 def validate_topic(curriculum, grade, subject, topic):
     prompt = f"""
@@ -23,9 +88,10 @@ def validate_topic(curriculum, grade, subject, topic):
     2. Cognitive level for {grade}
     3. {curriculum} standards
     """
-    model = genai.GenerativeModel("gemini-1.5-flash")
-    response = model.generate_content(prompt)
-    return response.text.strip().lower()
+    try:
+        return _generate("validate", prompt).strip().lower()
+    except GenerationUnavailable:
+        return "unavailable"
 
 def suggest_topics(curriculum, grade, subject):
     prompt = f"""
@@ -44,9 +110,11 @@ def suggest_topics(curriculum, grade, subject):
     - Topic 2
     - Topic 3
     """
-    model = genai.GenerativeModel("gemini-1.5-flash")
-    response = model.generate_content(prompt)
-    return [line[2:] for line in response.text.split("\n") if line.startswith("- ")]
+    try:
+        text = _generate("suggest", prompt)
+    except GenerationUnavailable:
+        return []
+    return [line[2:] for line in text.split("\n") if line.startswith("- ")]
 
 def generate_lesson_objectives(curriculum, grade, subject, topic):
     prompt = f"""
@@ -63,9 +131,10 @@ def generate_lesson_objectives(curriculum, grade, subject, topic):
     
     Format as plain text with one objective per line
     """
-    model = genai.GenerativeModel("gemini-1.5-flash")
-    response = model.generate_content(prompt)
-    return response.text
+    try:
+        return _generate("objectives", prompt)
+    except GenerationUnavailable:
+        return ""
 
 def generate_subtopics(curriculum, grade, subject, topic, objectives=""):
     prompt = f"""
@@ -97,15 +166,66 @@ def generate_subtopics(curriculum, grade, subject, topic, objectives=""):
         ]
     }}
     """
-    model = genai.GenerativeModel("gemini-1.5-flash")
-    response = model.generate_content(prompt)
-    
     try:
-        json_str = re.search(r'\{.*\}', response.text, re.DOTALL).group()
+        text = _generate("subtopics", prompt)
+        json_str = re.search(r'\{.*\}', text, re.DOTALL).group()
         return json.loads(json_str)
     except Exception as e:
         return {"error": f"Failed to generate: {str(e)}"}
 
+def generate_single_subtopic(curriculum, grade, subject, topic, objectives="", other_titles=None, replacing=""):
+    """Generate one replacement subtopic that fits alongside the lesson's other subtopics"""
+    other_titles = other_titles or []
+    prompt = f"""
+    Create 1 comprehensive subtopic for:
+    - Main Topic: {topic}
+    - Subject: {subject}
+    - Grade: {grade}
+    - Curriculum: {curriculum}
+    
+    Using these objectives: {objectives} try to generate the subtopic
+    
+    It replaces the subtopic "{replacing}", so take a different angle from it.
+    The lesson already covers these subtopics, do not repeat them: {", ".join(other_titles)}
+    
+    Provide:
+    1. Title (4-5 word phrase)
+    2. Content (4-5 detailed sentences)
+    3. Key concepts (2-3 items)
+    4. Real-world examples (1-2)
+    5. Common misconceptions (1-2)
+    
+    Return as JSON with this exact structure:
+    {{
+        "title": "Subtopic title",
+        "content": "Detailed explanation...",
+        "key_concepts": ["concept1", "concept2"],
+        "examples": ["example1", "example2"],
+        "misconceptions": ["misconception1", "misconception2"]
+    }}
+    """
+    try:
+        text = _generate("subtopic", prompt)
+        json_str = re.search(r'\{.*\}', text, re.DOTALL).group()
+        subtopic = json.loads(json_str)
+        if "subtopics" in subtopic:
+            subtopic = subtopic["subtopics"][0]
+        return subtopic
+    except Exception as e:
+        return {"error": f"Failed to generate: {str(e)}"}
+
+def _unsplash_search(search_query):
+    url = "https://api.unsplash.com/search/photos"
+    params = {
+        "query": search_query,
+        "per_page": 30,
+        "orientation": "landscape",
+        "client_id": os.getenv("UNSPLASH_ACCESS_KEY")
+    }
+    response = api_transport.get(url, params=params)
+    response.raise_for_status()
+    return response.json()
+
 def fetch_unsplash_image(query, subject, grade, subtopic_index, attempt=0):
     """Fetch a unique educational image from Unsplash for each subtopic"""
     try:
@@ -120,26 +240,20 @@ def fetch_unsplash_image(query, subject, grade, subtopic_index, attempt=0):
         
         search_query = search_terms[subtopic_index % len(search_terms)]
         
-        # Make request to Unsplash API
-        url = "https://api.unsplash.com/search/photos"
-        params = {
-            "query": search_query,
-            "per_page": 30,
-            "orientation": "landscape",
-            "client_id": os.getenv("UNSPLASH_ACCESS_KEY")
-        }
-        
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        
-        data = response.json()
+        # Make request to Unsplash API, shared with identical searches in flight
+        data = single_flight.coalesce(f"unsplash:{search_query}", _unsplash_search, search_query)
         if data['results']:
             # Select different image based on subtopic index and attempt
             selection_index = (subtopic_index + attempt) % min(20, len(data['results']))
+            result = data['results'][selection_index]
             return {
-                "url": data['results'][selection_index]['urls']['regular'],
-                "credit": data['results'][selection_index]['user']['name'],
-                "profile": data['results'][selection_index]['user']['links']['html']
+                "url": result['urls']['regular'],
+                # Every size variant, so the UI can show thumbnails and load the big one on demand
+                "urls": {size: result['urls'][size]
+                         for size in ("thumb", "small", "regular", "full", "raw")
+                         if size in result['urls']},
+                "credit": result['user']['name'],
+                "profile": result['user']['links']['html']
             }
         return None
         
@@ -205,11 +319,9 @@ def generate_quiz_questions(curriculum, grade, subject, topic, lesson_content):
         ]
     }}
     """
-    model = genai.GenerativeModel("gemini-1.5-flash")
-    response = model.generate_content(prompt)
-    
     try:
-        json_str = re.search(r'\{.*\}', response.text, re.DOTALL).group()
+        text = _generate("quiz", prompt)
+        json_str = re.search(r'\{.*\}', text, re.DOTALL).group()
         return json.loads(json_str)
     except Exception as e:
         print(f"Error generating quiz: {str(e)}")
@@ -240,6 +352,81 @@ def generate_lesson_summary(curriculum, grade, subject, topic, subtopics):
     
     Format as markdown with bold headings for each section
     """
-    model = genai.GenerativeModel("gemini-1.5-flash")
-    response = model.generate_content(prompt)
-    return response.text
\ No newline at end of file
+    try:
+        return _generate("summary", prompt)
+    except GenerationUnavailable:
+        return ""
+
+QUIZ_SECTIONS = {
+    "mcq": {
+        "label": "Multiple Choice",
+        "instructions": """
+    - Provide 4 options
+    - Mark the correct answer
+    - Add explanation""",
+        "example": """{
+                "question": "Question text",
+                "options": ["A", "B", "C", "D"],
+                "answer": "Correct option",
+                "explanation": "Explanation text"
+            }""",
+    },
+    "fillblank": {
+        "label": "Fill in the Blank",
+        "instructions": """
+    - Use _____ for blanks
+    - Provide the answer
+    - Add explanation""",
+        "example": """{
+                "question": "Question with _____ blank",
+                "answer": "Correct fill",
+                "explanation": "Explanation text"
+            }""",
+    },
+    "descriptive": {
+        "label": "Descriptive (questions and answer should be short)",
+        "instructions": """
+    - Ask open-ended questions
+    - Provide model answer
+    - List key points""",
+        "example": """{
+                "question": "Open-ended question",
+                "answer": "Model answer",
+                "key_points": ["Key point 1", "Key point 2"]
+            }""",
+    },
+}
+
+def generate_quiz_section(curriculum, grade, subject, topic, lesson_content, section, avoid=None):
+    """Generate the questions for one quiz section (mcq, fillblank or descriptive) only"""
+    spec = QUIZ_SECTIONS[section]
+    avoid = avoid or []
+    prompt = f"""
+    Create quiz questions for this lesson:
+    - Topic: {topic}
+    - Subject: {subject}
+    - Grade: {grade}
+    - Curriculum: {curriculum}
+    
+    Lesson Content:
+    {lesson_content}
+    
+    Generate 3-4 {spec['label']} questions ({section}).
+    {spec['instructions']}
+    
+    Do not reuse these questions: {json.dumps(avoid)}
+    
+    Return as JSON with this exact structure:
+    {{
+        "{section}": [
+            {spec['example']}
+        ]
+    }}
+    """
+    try:
+        text = _generate("quiz_section", prompt)
+        json_str = re.search(r'\{.*\}', text, re.DOTALL).group()
+        return json.loads(json_str).get(section, [])
+    except Exception as e:
+        print(f"Error generating {section} questions: {str(e)}")
+        return []
@@ -1,11 +1,83 @@
+import os
+from html import escape
 import streamlit as st
-from streamlit_extras.stylable_container import stylable_container
+from profiling import profiled_fragment, profile_requested
 
-def render_quiz(quiz_data):
+# "client" toggles answers in the browser, "server" uses a button and a rerun per reveal
+QUIZ_MODE = os.getenv("EDUGENIUS_QUIZ_MODE", "client")
+
+# Server-mode reveals rerun only the quiz when st.fragment is available
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+def _answer_details(summary, body):
+    """Wrap answer HTML in a native details/summary toggle"""
+    return (
+        f'<details class="quiz-answer"><summary>{summary}</summary>'
+        f'<div class="quiz-answer-body">{body}</div></details>'
+    )
+
+def _quiz_card(i, question, extra, body):
+    # Kept on one line: a blank line inside the block would end the HTML in markdown
+    return (
+        f'<div class="quiz-card"><p><b>{i}. {escape(str(question["question"]))}</b></p>'
+        f'{extra}{_answer_details(f"Show Answer {i}", body)}</div>'
+    )
+
+def create_quiz_html(quiz_data):
+    """Build the whole quiz, answers included, as one HTML block"""
+    sections = []
+    
+    if quiz_data.get('mcq'):
+        cards = []
+        for i, question in enumerate(quiz_data['mcq'], 1):
+            options = "".join(f"<li>{escape(str(option))}</li>" for option in question.get('options', []))
+            body = f"<p><b>Correct Answer:</b> {escape(str(question.get('answer', 'N/A')))}</p>"
+            if question.get('explanation'):
+                body += f"<p><b>Explanation:</b> {escape(str(question['explanation']))}</p>"
+            cards.append(_quiz_card(i, question, f"<ul>{options}</ul>", body))
+        sections.append("<h3>📝 Multiple Choice Questions</h3>" + "".join(cards))
+    
+    if quiz_data.get('fillblank'):
+        cards = []
+        for i, question in enumerate(quiz_data['fillblank'], 1):
+            body = f"<p><b>Answer:</b> {escape(str(question.get('answer', 'N/A')))}</p>"
+            if question.get('explanation'):
+                body += f"<p><b>Explanation:</b> {escape(str(question['explanation']))}</p>"
+            cards.append(_quiz_card(i, question, "", body))
+        sections.append("<h3>✍️ Fill in the Blank</h3>" + "".join(cards))
+    
+    if quiz_data.get('descriptive'):
+        cards = []
+        for i, question in enumerate(quiz_data['descriptive'], 1):
+            body = f"<p><b>Model Answer:</b></p><p>{escape(str(question.get('answer', 'No answer provided')))}</p>"
+            if question.get('key_points'):
+                points = "".join(f"<li>{escape(str(point))}</li>" for point in question['key_points'])
+                body += f"<p><b>Key Points:</b></p><ul>{points}</ul>"
+            cards.append(_quiz_card(i, question, "", body))
+        sections.append("<h3>💬 Descriptive Questions</h3>" + "".join(cards))
+    
+    return f'<div class="quiz-container">{"".join(sections)}</div>'
+
+def render_quiz(quiz_data, mode=None):
     """Render the quiz questions with answer toggles"""
     if not quiz_data:
         return
     
+    if (mode or QUIZ_MODE) == "client":
+        # Answers ship with the page and open in the browser, so reveals cost no rerun
+        st.markdown(create_quiz_html(quiz_data), unsafe_allow_html=True)
+        return
+    
+    _render_quiz_with_buttons(quiz_data)
+
+@_fragment
+def _render_quiz_with_buttons(quiz_data):
+    # Answer toggles rerun only this fragment, which the app's rerun profile doesn't see
+    with profiled_fragment("quiz", enabled=profile_requested()):
+        _render_quiz_buttons(quiz_data)
+
+def _render_quiz_buttons(quiz_data):
+    from streamlit_extras.stylable_container import stylable_container
     # Initialize session state for quiz answers
     if 'quiz_answers' not in st.session_state:
         st.session_state.quiz_answers = {}
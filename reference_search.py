@@ -1,9 +1,10 @@
 import os
-import requests
 from urllib.parse import urlparse
 import streamlit as st
 from typing import List, Dict
 from dotenv import load_dotenv
+import api_transport
+import single_flight
 
 
 load_dotenv()  # Make sure this is called before accessing the variables
@@ -26,7 +27,7 @@ def google_custom_search(query: str, num_results: int = 5) -> List[Dict]:
     """Perform a search using Google Custom Search JSON API"""
     try:
         url = f"https://www.googleapis.com/customsearch/v1?q={query}&key={GOOGLE_API_KEY}&cx={SEARCH_ENGINE_ID}&num={num_results}"
-        response = requests.get(url)
+        response = api_transport.get(url)
         response.raise_for_status()
         data = response.json()
         
@@ -49,7 +50,7 @@ def search_references(topic: str, subject: str, grade_level: str, num_results: i
     """Search for credible reference links related to the topic"""
     query = f"{topic} {subject} {grade_level} educational resources"
     
-    search_results = google_custom_search(query, num_results)
+    search_results = single_flight.coalesce(f"search:{query}:{num_results}", google_custom_search, query, num_results)
     
     credible_results = []
     for result in search_results:
@@ -0,0 +1,203 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict
+import metrics
+
+# Seconds a stage may take end to end before the caller gets degraded content
+STAGE_DEADLINES = {
+    "validate": 10,
+    "suggest": 15,
+    "objectives": 20,
+    "subtopics": 45,
+    "quiz": 45,
+    "summary": 30,
+    "subtopic": 25,
+    "quiz_section": 25,
+}
+DEFAULT_DEADLINE = float(os.getenv("EDUGENIUS_DEFAULT_DEADLINE", "30"))
+
+# A duplicate request is sent once the first one is slower than the p95 of the
+# stage's recent attempts (each attempt's own latency, so hedging can't lower it)
+HEDGING_ENABLED = os.getenv("EDUGENIUS_HEDGING", "1") != "0"
+HEDGE_MIN_SAMPLES = 20       # below this, the fixed default delay is used
+HEDGE_DEFAULT_DELAY = 5.0
+HEDGE_MIN_DELAY = 0.5
+# Hedges are only sent while fewer calls than this are outstanding, so duplicates
+# never queue up behind (or starve) first attempts in the shared pool
+HEDGE_MAX_OUTSTANDING = int(os.getenv("EDUGENIUS_HEDGE_MAX_OUTSTANDING", "16"))
+UPSTREAM_WORKERS = 32
+# Attempts still running after their call gave up hold pool workers; past this many,
+# new calls are refused until some finish
+MAX_ABANDONED = int(os.getenv("EDUGENIUS_MAX_ABANDONED", str(UPSTREAM_WORKERS // 2)))
+
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("EDUGENIUS_BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("EDUGENIUS_BREAKER_RESET", "30"))
+
+class GenerationUnavailable(RuntimeError):
+    """The backend is unhealthy or too slow; callers should serve cached or degraded content"""
+
+class CircuitBreaker:
+    """Opens after consecutive failures and lets a single probe through after a cool-down"""
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at >= self.reset_seconds:
+                return "half-open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_seconds or self.probing:
+                return False
+            self.probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.probing = False
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=UPSTREAM_WORKERS, thread_name_prefix="edugenius-upstream")
+_outstanding = 0  # calls submitted to _executor that have not finished yet
+_abandoned = 0    # of those, attempts whose caller has already returned
+_outstanding_lock = threading.Lock()
+
+def _finished(future):
+    global _outstanding
+    with _outstanding_lock:
+        _outstanding -= 1
+
+def _abandoned_finished(future):
+    global _abandoned
+    with _outstanding_lock:
+        _abandoned -= 1
+
+def _abandon(future):
+    """Cancel an attempt the caller no longer waits for, or count it until it finishes"""
+    global _abandoned
+    if future.cancel():
+        return
+    with _outstanding_lock:
+        _abandoned += 1
+    future.add_done_callback(_abandoned_finished)
+
+def _timed(stage: str, func: Callable) -> Callable:
+    """func, recording the attempt's own latency when it succeeds"""
+    def attempt():
+        start = time.perf_counter()
+        result = func()
+        metrics.record(f"upstream.{stage}.attempt", time.perf_counter() - start)
+        return result
+    return attempt
+
+def _submit(func, limit: int = None):
+    """Submit func to the shared pool, or return None if `limit` calls are already outstanding"""
+    global _outstanding
+    with _outstanding_lock:
+        if limit is not None and _outstanding >= limit:
+            return None
+        _outstanding += 1
+    future = _executor.submit(func)
+    future.add_done_callback(_finished)
+    return future
+
+def get_breaker(backend: str) -> CircuitBreaker:
+    with _breakers_lock:
+        if backend not in _breakers:
+            _breakers[backend] = CircuitBreaker()
+        return _breakers[backend]
+
+def hedge_delay(stage: str) -> float:
+    """Delay before a duplicate request is sent, from the p95 of the stage's recent attempts"""
+    name = f"upstream.{stage}.attempt"
+    if metrics.count(name) < HEDGE_MIN_SAMPLES:
+        return HEDGE_DEFAULT_DELAY
+    return max(HEDGE_MIN_DELAY, metrics.percentile(name, 95))
+
+def resilient_call(stage: str, func: Callable, backend: str = "gemini", deadline: float = None):
+    """Run func with a deadline, a hedged duplicate and a circuit breaker; first success wins.
+
+    Only latency triggers a hedge: an attempt that fails is left to the
+    breaker and the caller's fallback. Attempts still running when the call
+    returns are cancelled if they have not started, and otherwise counted
+    as abandoned until they finish.
+
+    Raises GenerationUnavailable if the breaker is open, MAX_ABANDONED
+    attempts are still occupying the pool, every attempt failed, or the
+    deadline passed.
+    """
+    if _abandoned >= MAX_ABANDONED:
+        metrics.record(f"upstream.{stage}.shed", 1)
+        raise GenerationUnavailable(f"{_abandoned} abandoned {backend} calls are still running")
+    breaker = get_breaker(backend)
+    if not breaker.allow():
+        metrics.record(f"upstream.{stage}.short_circuited", 1)
+        raise GenerationUnavailable(f"{backend} circuit is open")
+
+    deadline = deadline or STAGE_DEADLINES.get(stage, DEFAULT_DEADLINE)
+    attempt = _timed(stage, func)
+    start = time.perf_counter()
+    pending = {_submit(attempt)}
+    hedged = not HEDGING_ENABLED
+    last_error = None
+
+    try:
+        while pending:
+            elapsed = time.perf_counter() - start
+            remaining = deadline - elapsed
+            if remaining <= 0:
+                break
+            timeout = remaining if hedged else min(remaining, max(0.0, hedge_delay(stage) - elapsed))
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                if future.exception() is None:
+                    breaker.record_success()
+                    metrics.record(f"upstream.{stage}", time.perf_counter() - start)
+                    return future.result()
+                last_error = future.exception()
+
+            if not hedged and pending and not done:
+                # Slow first attempt: race a duplicate against it if the pool has room
+                hedged = True
+                hedge = _submit(attempt, HEDGE_MAX_OUTSTANDING)
+                if hedge is not None:
+                    pending.add(hedge)
+                    metrics.record(f"upstream.{stage}.hedged", 1)
+                else:
+                    metrics.record(f"upstream.{stage}.hedge_skipped", 1)
+    finally:
+        for future in pending:
+            _abandon(future)
+
+    breaker.record_failure()
+    if pending:
+        metrics.record(f"upstream.{stage}.deadline_exceeded", 1)
+        raise GenerationUnavailable(f"{stage} took longer than {deadline:.0f}s")
+    raise GenerationUnavailable(f"{stage} failed: {last_error}") from last_error
@@ -0,0 +1,130 @@
+"""Share one upstream call between identical requests that are in flight together.
+
+Within a process, the first caller for a key runs the call and everyone
+else arriving before it finishes waits for its result. With
+EDUGENIUS_SINGLE_FLIGHT_DIR set, the leader also holds a lock file there,
+so other worker processes wait too and pick up the JSON result it leaves
+behind (POSIX only; elsewhere coalescing stays per process).
+"""
+import os
+import copy
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable
+
+import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+SHARED_DIR = os.getenv("EDUGENIUS_SINGLE_FLIGHT_DIR")
+# Longest a process waits on another process's call before making its own
+SHARED_WAIT = float(os.getenv("EDUGENIUS_SINGLE_FLIGHT_WAIT", "60"))
+# Result files older than this are removed
+SHARED_MAX_AGE = 600
+
+_inflight = {}  # key -> Future of the leader's result
+_lock = threading.Lock()
+_leader_runs = 0
+
+def _paths(key: str):
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return os.path.join(SHARED_DIR, f"{digest}.lock"), os.path.join(SHARED_DIR, f"{digest}.json")
+
+def _acquire(lock_file, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+
+def _read_shared(result_path: str, since: float):
+    """(True, value) if another process finished this call after `since`"""
+    try:
+        with open(result_path) as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return False, None
+    return (entry.get("at", 0) >= since), entry.get("value")
+
+def _write_shared(result_path: str, value: Any):
+    try:
+        data = json.dumps({"at": time.time(), "value": value})
+    except (TypeError, ValueError):
+        return  # not JSON-friendly; other processes will make their own call
+    tmp = f"{result_path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(data)
+    os.replace(tmp, result_path)
+
+def _cleanup_shared():
+    cutoff = time.time() - SHARED_MAX_AGE
+    for name in os.listdir(SHARED_DIR):
+        path = os.path.join(SHARED_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+def _run_across_processes(key: str, func: Callable, args):
+    global _leader_runs
+    os.makedirs(SHARED_DIR, exist_ok=True)
+    lock_path, result_path = _paths(key)
+    started = time.time()
+    with open(lock_path, "a") as lock_file:
+        if not _acquire(lock_file, SHARED_WAIT):
+            metrics.record("single_flight.shared_timeout", 1)
+            return func(*args)
+        try:
+            found, value = _read_shared(result_path, started)
+            if found:
+                metrics.record("single_flight.shared_process", 1)
+                return value
+            value = func(*args)
+            _write_shared(result_path, value)
+            _leader_runs += 1
+            if _leader_runs % 100 == 0:
+                _cleanup_shared()
+            return value
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def coalesce(key: str, func: Callable, *args):
+    """Return func(*args), sharing the call with identical in-flight requests for `key`.
+
+    Waiters get a copy of the leader's result, or its exception.
+    """
+    with _lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = Future()
+            _inflight[key] = future
+    if not leader:
+        metrics.record("single_flight.shared", 1)
+        return copy.deepcopy(future.result())
+
+    metrics.record("single_flight.leader", 1)
+    try:
+        if SHARED_DIR and fcntl is not None:
+            result = _run_across_processes(key, func, args)
+        else:
+            result = func(*args)
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
@@ -0,0 +1,156 @@
+"""Text measurement and pagination for deck slides, without python-pptx.
+
+Widths come from per-font character tables (fractions of an em), so a
+paragraph's wrapped line count is computed in one pass over its text and
+pages are filled with a running height instead of re-measuring the slide.
+All sizes are in points.
+"""
+from typing import Dict, List, NamedTuple, Tuple
+
+DEFAULT_FONT = "Calibri"  # theme font of the default python-pptx template
+LINE_SPACING = 1.2        # line height as a multiple of the font size
+BOLD_FACTOR = 1.05        # bold glyphs run slightly wider
+TEXT_INSET = 7.2          # default text frame inset on each side (0.1 inch)
+
+def _widths(groups: Dict[str, float]) -> Dict[str, float]:
+    return {char: width for chars, width in groups.items() for char in chars}
+
+# Advance widths as a fraction of the em, grouped by value
+CHAR_WIDTHS = {
+    "Calibri": _widths({
+        " ": 0.226, "il": 0.229, "j": 0.239, "'": 0.221, ".,": 0.251, ":;": 0.268,
+        "|I": 0.252, "f": 0.305, "-()[]{}": 0.303, "t": 0.335, "!": 0.326, "r": 0.349,
+        "J": 0.319, "/\\": 0.386, "s": 0.391, "z": 0.395, "\"": 0.401, "L": 0.420,
+        "c": 0.423, "x": 0.433, "vk": 0.453, "y": 0.453, "S": 0.459, "F": 0.459, "?": 0.463,
+        "Z": 0.468, "g": 0.471, "a": 0.479, "TY": 0.487, "E": 0.488, "e_•": 0.498,
+        "0123456789$#+=<>*^~": 0.507, "P": 0.517, "X": 0.519, "K": 0.520,
+        "bdhnpqu": 0.525, "o": 0.527, "C": 0.533, "RB": 0.544, "V": 0.567, "A": 0.579,
+        "○": 0.600, "D": 0.615, "H": 0.623, "G": 0.631, "U": 0.642, "N": 0.646,
+        "O": 0.662, "Q": 0.673, "w": 0.715, "&%": 0.705, "m": 0.799, "@": 0.899,
+        "M": 0.855, "W": 0.890,
+    }),
+}
+DEFAULT_WIDTH = 0.55  # unknown Latin-ish characters
+WIDE_WIDTH = 1.0      # CJK and other full-width characters
+
+class Block(NamedTuple):
+    """One paragraph as it will be rendered"""
+    text: str
+    size: float
+    bold: bool = False
+    italic: bool = False
+    space_after: float = 0.0
+    level: int = 0  # template text level the paragraph is rendered at
+
+class Box(NamedTuple):
+    """Text frame size in points"""
+    width: float
+    height: float
+
+def box_from_inches(width: float, height: float) -> Box:
+    return Box(width * 72 - 2 * TEXT_INSET, height * 72 - TEXT_INSET)
+
+def char_width(char: str, font: str = DEFAULT_FONT) -> float:
+    width = CHAR_WIDTHS.get(font, CHAR_WIDTHS[DEFAULT_FONT]).get(char)
+    if width is not None:
+        return width
+    return WIDE_WIDTH if ord(char) >= 0x2E80 else DEFAULT_WIDTH
+
+def wrap_lines(text: str, width: float, size: float, bold: bool = False,
+               font: str = DEFAULT_FONT) -> List[Tuple[str, bool]]:
+    """Greedy word wrap; returns (line, ends_with_hard_break) pairs in one pass over the text"""
+    table = CHAR_WIDTHS.get(font, CHAR_WIDTHS[DEFAULT_FONT])
+    scale = size * (BOLD_FACTOR if bold else 1.0)
+    space = table[" "] * scale
+    lines = []
+    for hard_line in text.split("\n"):
+        current, current_width = [], 0.0
+        for word in hard_line.split(" "):
+            word_width = sum(table.get(c) or char_width(c, font) for c in word) * scale
+            if current and current_width + space + word_width > width:
+                lines.append((" ".join(current), False))
+                current, current_width = [], 0.0
+            if word_width > width and not current:
+                # A word longer than the line breaks wherever it runs out of room
+                piece, piece_width = "", 0.0
+                for c in word:
+                    w = (table.get(c) or char_width(c, font)) * scale
+                    if piece and piece_width + w > width:
+                        lines.append((piece, False))
+                        piece, piece_width = "", 0.0
+                    piece += c
+                    piece_width += w
+                current, current_width = [piece], piece_width
+                continue
+            current_width += (space if current else 0.0) + word_width
+            current.append(word)
+        lines.append((" ".join(current), True))
+    return lines
+
+def line_height(size: float) -> float:
+    return size * LINE_SPACING
+
+def block_height(block: Block, width: float, font: str = DEFAULT_FONT) -> float:
+    lines = len(wrap_lines(block.text, width, block.size, block.bold, font))
+    return lines * line_height(block.size) + block.space_after
+
+def _split_block(block: Block, width: float, available: float, font: str):
+    """Split a block so its head fits in `available` points; returns (head, tail)"""
+    lines = wrap_lines(block.text, width, block.size, block.bold, font)
+    fit = int(available // line_height(block.size))
+    if fit <= 0:
+        return None, block
+    if fit >= len(lines):
+        return block, None
+
+    def join(part):
+        return "".join(line + ("\n" if hard else " ") for line, hard in part).rstrip()
+
+    return (block._replace(text=join(lines[:fit]), space_after=0.0),
+            block._replace(text=join(lines[fit:])))
+
+def paginate(groups: List[List[Block]], first_box: Box, next_box: Box = None,
+             font: str = DEFAULT_FONT) -> List[List[Block]]:
+    """Lay groups of blocks out over as many pages as needed, in a single pass.
+
+    A group (say, a quiz question with its options) moves to the next page
+    whole when it doesn't fit; one taller than a page is split line by line.
+    `next_box` is the frame size on continuation pages, if different.
+    """
+    next_box = next_box or first_box
+    pages, page, box, used = [], [], first_box, 0.0
+
+    def new_page():
+        nonlocal page, box, used
+        pages.append(page)
+        page, box, used = [], next_box, 0.0
+
+    for group in groups:
+        heights = [block_height(block, box.width, font) for block in group]
+        if page and used + sum(heights) > box.height:
+            new_page()
+            heights = [block_height(block, box.width, font) for block in group]
+        measured_width = box.width
+        for block, height in zip(group, heights):
+            if box.width != measured_width:
+                # A split earlier in this group moved on to next_box; measure at its width
+                height = block_height(block, box.width, font)
+            while block is not None:
+                if used + height <= box.height:
+                    page.append(block)
+                    used += height
+                    break
+                head, tail = _split_block(block, box.width, box.height - used, font)
+                if head is None and not page:
+                    # Not even one line fits on an empty page; place it anyway
+                    page.append(block)
+                    used += height
+                    break
+                if head is not None:
+                    page.append(head)
+                new_page()
+                block = tail
+                height = block_height(block, box.width, font) if block else 0.0
+    if page or not pages:
+        pages.append(page)
+    return pages
@@ -0,0 +1,170 @@
+"""Offline stand-ins for Gemini, Unsplash, Google Custom Search and image downloads.
+
+Used by the load test and benchmarks so the full app runs without API keys.
+Each fake call sleeps for a configurable latency to mimic upstream time.
+Fake Gemini models honour max_output_tokens and stop_sequences, report
+usage_metadata, and take a per-token latency on top of a per-call one
+that is lower for the fast tier ("-8b" and "lite" models).
+
+    import stub_backends
+    stub_backends.install(gemini_latency=0.5, http_latency=0.1)
+"""
+import io
+import json
+import re
+import threading
+import time
+
+LATENCY = {"gemini": 0.0, "gemini_fast": 0.0, "gemini_token": 0.0, "http": 0.0}
+CHARS_PER_TOKEN = 4
+CALLS = {"gemini": 0, "unsplash": 0, "search": 0, "image": 0}
+_calls_lock = threading.Lock()
+_image_bytes = None
+
+def _count(api: str):
+    with _calls_lock:
+        CALLS[api] += 1
+
+def _subtopic(title: str) -> dict:
+    return {
+        "title": title,
+        "content": f"{title} explained in a few clear sentences for the class. " * 3,
+        "key_concepts": ["concept one", "concept two"],
+        "examples": ["An everyday example"],
+        "misconceptions": ["A common misunderstanding"],
+    }
+
+QUIZ = {
+    "mcq": [{"question": f"Multiple choice question {n}?", "options": ["A", "B", "C", "D"],
+             "answer": "A", "explanation": "Because A."} for n in range(1, 4)],
+    "fillblank": [{"question": f"Fill in blank {n}: ____", "answer": "word",
+                   "explanation": "It completes the sentence."} for n in range(1, 4)],
+    "descriptive": [{"question": f"Explain idea {n}.", "answer": "A short model answer.",
+                     "key_points": ["point one", "point two"]} for n in range(1, 3)],
+}
+
+def fake_completion(prompt: str) -> str:
+    """Plausible Gemini output for each of the app's prompts"""
+    topic = re.search(r"Topic: (.*)", prompt)
+    topic = topic.group(1).strip() if topic else "the topic"
+    if "Return ONLY one word" in prompt:
+        return "valid"
+    if "Suggest 3-5 perfect topics" in prompt:
+        return "- Photosynthesis\n- Cell Structure\n- Food Chains"
+    if "learning objectives" in prompt:
+        return "\n".join(f"Students will be able to explain part {n} of {topic}." for n in range(1, 4))
+    if "Create 1 comprehensive subtopic" in prompt:
+        return json.dumps(_subtopic(f"Another angle on {topic}"))
+    if "Create quiz questions" in prompt:
+        section = re.search(r"questions \((\w+)\)", prompt).group(1)
+        return json.dumps({section: QUIZ[section]})
+    if "comprehensive quiz" in prompt:
+        return json.dumps(QUIZ)
+    if "comprehensive subtopics" in prompt:
+        return json.dumps({"subtopics": [_subtopic(f"{topic} part {n}") for n in range(1, 4)]})
+    return f"**Overview:** A short summary of {topic}.\n- First takeaway\n- Second takeaway"
+
+class _Usage:
+    def __init__(self, prompt_tokens: int, output_tokens: int):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = output_tokens
+
+class _Response:
+    def __init__(self, text: str, usage: _Usage = None):
+        self.text = text
+        self.usage_metadata = usage
+
+def is_fast_model(name: str) -> bool:
+    return "-8b" in name or "lite" in name
+
+class _Model:
+    def __init__(self, name, generation_config=None, **kwargs):
+        self.name = name
+        self.config = dict(generation_config or {})
+
+    def generate_content(self, prompt, **kwargs):
+        _count("gemini")
+        text = fake_completion(prompt)
+        for stop in self.config.get("stop_sequences") or []:
+            text = text.split(stop)[0]
+        max_tokens = self.config.get("max_output_tokens")
+        if max_tokens:
+            text = text[:max_tokens * CHARS_PER_TOKEN]
+        output_tokens = max(1, len(text) // CHARS_PER_TOKEN)
+        latency = LATENCY["gemini_fast"] if is_fast_model(self.name) else LATENCY["gemini"]
+        time.sleep(latency + output_tokens * LATENCY["gemini_token"])
+        return _Response(text, _Usage(len(prompt) // CHARS_PER_TOKEN, output_tokens))
+
+class _GenAI:
+    """Module-shaped stand-in for google.generativeai"""
+    GenerativeModel = _Model
+
+    @staticmethod
+    def configure(**kwargs):
+        pass
+
+class _HTTPResponse:
+    status_code = 200
+
+    def __init__(self, data=None, content=b""):
+        self._data = data
+        self.content = json.dumps(data).encode() if data is not None else content
+        self.text = json.dumps(data) if data is not None else ""
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._data
+
+def _fake_image() -> bytes:
+    global _image_bytes
+    if _image_bytes is None:
+        from PIL import Image
+        buffer = io.BytesIO()
+        Image.new("RGB", (1080, 720), (67, 97, 238)).save(buffer, "JPEG")
+        _image_bytes = buffer.getvalue()
+    return _image_bytes
+
+def fake_get(url, params=None, **kwargs):
+    """requests.get replacement for the Unsplash, Custom Search and image URLs the app calls"""
+    time.sleep(LATENCY["http"])
+    if "api.unsplash.com" in url:
+        _count("unsplash")
+        query = re.sub(r"\W+", "-", (params or {}).get("query", "image"))
+        return _HTTPResponse({"results": [{
+            "urls": {size: f"https://images.stub/{query}/{n}/{size}.jpg"
+                     for size in ("thumb", "small", "regular", "full", "raw")},
+            "user": {"name": "Stub Photographer", "links": {"html": "https://unsplash.com/@stub"}},
+        } for n in range(20)]})
+    if "googleapis.com/customsearch" in url:
+        _count("search")
+        return _HTTPResponse({"items": [{
+            "link": f"https://en.wikipedia.org/wiki/Reference_{n}",
+            "title": f"Reference {n}",
+            "snippet": "A reliable overview.",
+        } for n in range(5)]})
+    _count("image")
+    return _HTTPResponse(content=_fake_image())
+
+def install(gemini_latency: float = 0.0, http_latency: float = 0.0,
+            fast_gemini_latency: float = None, token_latency: float = 0.0):
+    """Route every outbound call of this process to the stubs.
+
+    `fast_gemini_latency` is the per-call latency of fast-tier models
+    (default: the same as `gemini_latency`); `token_latency` is added per
+    output token.
+    """
+    import requests
+    import prompts
+    LATENCY["gemini"] = gemini_latency
+    LATENCY["gemini_fast"] = gemini_latency if fast_gemini_latency is None else fast_gemini_latency
+    LATENCY["gemini_token"] = token_latency
+    LATENCY["http"] = http_latency
+    prompts._genai = _GenAI
+    requests.get = fake_get
+
+def reset_calls():
+    with _calls_lock:
+        for api in CALLS:
+            CALLS[api] = 0
@@ -0,0 +1,142 @@
+import http.client
+import json
+import socket
+import threading
+import time
+
+import pytest
+import requests
+
+import api_server
+import deck_output
+import image_cache
+import lesson_library
+import prompts
+import stub_backends
+
+LESSON = {"curriculum": "CBSE", "grade": "Grade 8", "subject": "Biology", "topic": "Photosynthesis"}
+
+
+@pytest.fixture
+def offline(tmp_path, monkeypatch):
+    monkeypatch.setattr(prompts, "_genai", stub_backends._GenAI)
+    monkeypatch.setattr(requests, "get", stub_backends.fake_get)
+    for name in list(stub_backends.LATENCY):
+        monkeypatch.setitem(stub_backends.LATENCY, name, 0.0)
+    monkeypatch.setattr(lesson_library, "LIBRARY_PATH", str(tmp_path / "library.db"))
+    monkeypatch.setattr(image_cache, "CACHE_DIR", str(tmp_path / "images"))
+    monkeypatch.setattr(deck_output, "ARTIFACT_DIR", str(tmp_path / "artifacts"))
+
+
+@pytest.fixture
+def start_server(offline):
+    servers = []
+
+    def start(workers=2, queue_size=8):
+        server = api_server.serve(port=0, workers=workers, queue_size=queue_size)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server.server_port
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def call(port, method, path, body=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    conn.request(method, path, body=json.dumps(body) if body is not None else None,
+                 headers={"Content-Type": "application/json"})
+    response = conn.getresponse()
+    data = response.read()
+    conn.close()
+    is_json = response.getheader("Content-Type", "").startswith("application/json")
+    return response.status, (json.loads(data) if is_json else data), response
+
+
+def wait_for_job(port, job_id, statuses=("done", "failed"), timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        _, job, _ = call(port, "GET", f"/jobs/{job_id}")
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not reach {statuses}")
+
+
+def test_submit_poll_lesson_and_deck(start_server):
+    port = start_server()
+    status, job, response = call(port, "POST", "/lessons", dict(LESSON, include_visuals=False))
+    assert status == 202 and response.getheader("Location") == f"/jobs/{job['id']}"
+
+    job = wait_for_job(port, job["id"])
+    assert job["status"] == "done" and not job["cached"]
+
+    status, lesson, _ = call(port, "GET", job["lesson_url"])
+    assert status == 200 and lesson["topic"] == "Photosynthesis" and lesson["subtopics"]
+
+    status, deck, response = call(port, "GET", job["deck_url"])
+    assert status == 200 and deck[:2] == b"PK"  # a .pptx is a zip
+    assert response.getheader("Transfer-Encoding") == "chunked"
+
+    # The same topic again comes straight from the library
+    _, again, _ = call(port, "POST", "/lessons", dict(LESSON, include_visuals=False))
+    again = wait_for_job(port, again["id"])
+    assert again["cached"] and again["lesson_id"] == job["lesson_id"]
+
+
+def test_full_queue_answers_429(start_server, monkeypatch):
+    monkeypatch.setitem(stub_backends.LATENCY, "gemini", 0.3)
+    port = start_server(workers=1, queue_size=1)
+    _, running, _ = call(port, "POST", "/lessons", LESSON)
+    wait_for_job(port, running["id"], statuses=("running",))
+
+    status, _, _ = call(port, "POST", "/lessons", dict(LESSON, topic="Cell structure"))
+    assert status == 202
+    status, body, response = call(port, "POST", "/lessons", dict(LESSON, topic="Plant tissue"))
+    assert status == 429 and response.getheader("Retry-After") == str(api_server.RETRY_AFTER)
+    assert "retry" in body["error"]
+
+
+@pytest.mark.parametrize("body, message", [
+    (dict(LESSON, include_visuals="false"), "'include_visuals' must be true or false"),
+    (dict(LESSON, reuse_similar=1), "'reuse_similar' must be true or false"),
+    ({"curriculum": "CBSE"}, "'grade' is required"),
+])
+def test_invalid_requests_answer_400(start_server, body, message):
+    port = start_server()
+    status, error, _ = call(port, "POST", "/lessons", body)
+    assert (status, error["error"]) == (400, message)
+
+
+@pytest.mark.parametrize("length", ["abc", "-5"])
+def test_malformed_content_length_answers_400(start_server, length):
+    port = start_server()
+    with socket.create_connection(("127.0.0.1", port), timeout=10) as sock:
+        sock.sendall(f"POST /lessons HTTP/1.1\r\nHost: test\r\nContent-Length: {length}\r\n\r\n".encode())
+        assert sock.recv(1024).startswith(b"HTTP/1.1 400")
+
+
+def test_expired_deck_is_rebuilt(start_server):
+    port = start_server()
+    _, job, _ = call(port, "POST", "/lessons", dict(LESSON, include_visuals=False))
+    job = wait_for_job(port, job["id"])
+    assert call(port, "GET", job["deck_url"])[0] == 200
+
+    deck_output.discard_artifact(api_server._deck_artifacts[job["lesson_id"]])
+    status, deck, _ = call(port, "GET", job["deck_url"])
+    assert status == 200 and deck[:2] == b"PK"
+
+
+def test_deck_cache_is_bounded(offline, monkeypatch):
+    monkeypatch.setattr(api_server, "MAX_DECKS", 1)
+    monkeypatch.setattr(api_server, "_deck_artifacts", api_server.OrderedDict())
+    import ppt_maker
+    monkeypatch.setattr(ppt_maker, "generate_ppt", lambda lesson, output: output.write(b"deck") and output)
+    first = api_server.lesson_deck("a", LESSON)
+    second = api_server.lesson_deck("b", LESSON)
+
+    assert list(api_server._deck_artifacts.items()) == [("b", second)]
+    assert deck_output.artifact_size(first) is None  # evicted and closed
+    assert not api_server._deck_locks
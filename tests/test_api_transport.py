@@ -0,0 +1,142 @@
+import gzip
+import json
+import os
+
+import pytest
+import requests
+
+import api_transport
+from api_transport import RecordedError, ReplayMiss
+
+IMAGE = bytes(range(256)) * 8
+
+
+class Response:
+    def __init__(self, status_code=200, content=b""):
+        self.status_code = status_code
+        self.content = content
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Fake requests.get that records what it was asked and fails for /down"""
+    calls = []
+
+    def fake_get(url, params=None, **kwargs):
+        calls.append((url, params))
+        if url.endswith("/down"):
+            raise requests.ConnectionError("connection refused")
+        if url.endswith(".jpg"):
+            return Response(content=IMAGE)
+        return Response(404 if url.endswith("/missing") else 200,
+                        json.dumps({"results": [params.get("query")]}).encode())
+    monkeypatch.setattr(requests, "get", fake_get)
+    return calls
+
+
+@pytest.fixture
+def transport(monkeypatch, tmp_path):
+    """Switch api_transport between modes over one cassette file in tmp_path"""
+    monkeypatch.setattr(api_transport, "CASSETTE", str(tmp_path / "run.jsonl.gz"))
+    monkeypatch.setattr(api_transport, "REPLAY_LATENCY_SCALE", 0)
+    monkeypatch.setattr(api_transport, "_writer", None)
+    monkeypatch.setattr(api_transport, "_tape", None)
+
+    def switch(mode):
+        if api_transport._writer is not None:
+            api_transport._writer.close()
+            monkeypatch.setattr(api_transport, "_writer", None)
+        monkeypatch.setattr(api_transport, "MODE", mode)
+    yield switch
+    switch("live")
+
+
+def cassette_entries(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_redact_url_strips_keys_and_sorts_the_rest():
+    assert api_transport.redact_url("https://api.example/search?q=cells&key=SECRET&cx=ENGINE&a=1") == \
+        "https://api.example/search?a=1&q=cells"
+    assert api_transport.redact_url("https://images.example/a.jpg") == "https://images.example/a.jpg"
+
+
+def test_http_round_trip_without_network(transport, upstream, tmp_path):
+    transport("record")
+    live = api_transport.get("https://api.unsplash.com/search/photos?client_id=SECRET",
+                             params={"query": "leaf", "client_id": "SECRET"})
+    api_transport.get("https://images.example/leaf.jpg")
+    api_transport.get("https://images.example/leaf.jpg")
+    api_transport.get("https://api.example/missing", params={"query": "gone"})
+
+    transport("replay")
+    upstream.clear()
+    replayed = api_transport.get("https://api.unsplash.com/search/photos?client_id=OTHER",
+                                 params={"query": "leaf", "client_id": "OTHER"})
+    assert replayed.status_code == live.status_code
+    assert replayed.json() == {"results": ["leaf"]}
+    assert api_transport.get("https://images.example/leaf.jpg").content == IMAGE
+    missing = api_transport.get("https://api.example/missing", params={"query": "gone"})
+    with pytest.raises(requests.HTTPError):
+        missing.raise_for_status()
+    assert upstream == []
+
+    # No secrets on tape, and the image body is stored once, outside the cassette
+    raw = gzip.open(tmp_path / "run.jsonl.gz", "rt").read()
+    assert "SECRET" not in raw
+    images = [e for e in cassette_entries(tmp_path / "run.jsonl.gz") if "body_sha256" in e]
+    assert len(images) == 2 and "body" not in images[0]
+    blobs = [name for _, _, names in os.walk(tmp_path / "blobs") for name in names]
+    assert blobs == [images[0]["body_sha256"]]
+
+
+def test_replay_miss_and_recorded_errors(transport, upstream):
+    transport("record")
+    with pytest.raises(requests.ConnectionError):
+        api_transport.get("https://api.example/down")
+
+    transport("replay")
+    with pytest.raises(RecordedError, match="connection refused"):
+        api_transport.get("https://api.example/down")
+    with pytest.raises(ReplayMiss):
+        api_transport.get("https://api.example/never-recorded")
+    with pytest.raises(ReplayMiss):
+        api_transport.generate_text("gemini-1.5-flash", "never recorded", lambda: "live")
+
+
+def test_repeated_requests_replay_in_order_then_repeat_the_last(transport):
+    replies = iter(["first", "second"])
+    transport("record")
+    for _ in range(2):
+        api_transport.generate_text("gemini-1.5-flash", "same prompt", lambda: next(replies))
+
+    transport("replay")
+    assert [api_transport.generate_text("gemini-1.5-flash", "same prompt", lambda: "live")
+            for _ in range(3)] == ["first", "second", "second"]
+
+
+def test_truncated_cassette_keeps_complete_entries(transport, tmp_path):
+    transport("record")
+    api_transport.generate_text("gemini-1.5-flash", "kept", lambda: "kept reply")
+    transport("live")
+    data = (tmp_path / "run.jsonl.gz").read_bytes()
+    (tmp_path / "run.jsonl.gz").write_bytes(data + gzip.compress(b'{"key": "cut')[:-8])
+
+    transport("replay")
+    assert api_transport.generate_text("gemini-1.5-flash", "kept", lambda: "live") == "kept reply"
+
+
+def test_cassette_path_is_a_directory_only_when_it_says_so(monkeypatch, tmp_path):
+    monkeypatch.setattr(api_transport, "MODE", "record")
+    monkeypatch.setattr(api_transport, "_writer", None)
+    monkeypatch.setattr(api_transport, "CASSETTE", str(tmp_path / "run.jsonl"))
+    api_transport.generate_text("gemini-1.5-flash", "p", lambda: "r")
+    api_transport._writer.close()
+    assert (tmp_path / "run.jsonl").is_file()
+
+    monkeypatch.setattr(api_transport, "_writer", None)
+    monkeypatch.setattr(api_transport, "CASSETTE", os.path.join(str(tmp_path / "tapes"), ""))
+    api_transport.generate_text("gemini-1.5-flash", "p", lambda: "r")
+    api_transport._writer.close()
+    assert [name.endswith(".jsonl.gz") for name in os.listdir(tmp_path / "tapes")] == [True]
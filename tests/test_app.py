@@ -0,0 +1,89 @@
+import os
+
+import pytest
+import requests
+from streamlit.testing.v1 import AppTest
+
+import deck_output
+import image_cache
+import lesson_library
+import metrics
+import prompts
+import stub_backends
+from benchmarks import bench_reruns
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """The app against stubbed APIs, with a fresh library and image cache"""
+    monkeypatch.setattr(prompts, "_genai", stub_backends._GenAI)
+    monkeypatch.setattr(requests, "get", stub_backends.fake_get)
+    monkeypatch.setattr(lesson_library, "LIBRARY_PATH", str(tmp_path / "library.db"))
+    monkeypatch.setattr(image_cache, "CACHE_DIR", str(tmp_path / "images"))
+    monkeypatch.setattr(deck_output, "ARTIFACT_DIR", str(tmp_path))
+    return AppTest.from_file(APP, default_timeout=60).run()
+
+
+def generate(at, topic="Photosynthesis"):
+    at.text_input(key="form_subject").input("Science")
+    at.text_input(key="form_topic").input(topic)
+    return at.button(key="form_submit").click().run()
+
+
+def test_expired_deck_download_asks_for_a_new_deck(app):
+    generate(app)
+    app.button(key="export_ppt").click().run()
+    assert [button.label for button in app.download_button] == ["⬇️ Download PowerPoint"]
+
+    deck_output.discard_artifact(app.session_state["deck_artifact"])  # as the sweeper would
+    app.download_button[0].click().run()
+    assert [warning.value for warning in app.warning] == ["That deck download has expired. Please regenerate the deck."]
+    assert not app.exception
+    assert not app.run().warning
+
+
+def test_picker_time_in_full_reruns_is_not_counted_as_a_fragment_rerun(app):
+    generate(app)
+    metrics.reset()
+    next(button for button in app.button if button.label == "Select This").click().run()
+    # AppTest reruns the whole script, so only the full-rerun share of the picker shows up
+    assert metrics.count("render.image_picker") > 0
+    assert metrics.count("rerun.fragment.image_picker") == 0
+
+
+def test_rerun_benchmark_reports_both_costs(app):
+    results = bench_reruns.measure(runs=2)
+    assert results["rerun.full"][0] >= 2 and results["render.image_picker"][0] >= 2
+    assert 0 < results["render.image_picker"][1] < results["rerun.full"][1]
+
+
+def rfind_trim(summary):
+    """create_summary_card's trimming as it was before the single-pass version"""
+    cleaned = summary.replace("#*", "").replace("🧠", "").strip()
+    if not cleaned.endswith("</div>"):
+        cleaned += "</div>"
+    while cleaned.count("</div>") > 1:
+        cleaned = cleaned[:cleaned.rfind("</div>")]
+    return cleaned
+
+
+@pytest.mark.parametrize("summary", [
+    "", "plain summary", "ends</div>", "a</div>b", "a</div>b</div>", "a</div>b</div>c</div>d",
+    "#* **Overview** 🧠 text", "</div></div></div>", "<div>nested<div>x</div></div>tail",
+])
+def test_summary_trim_matches_the_old_rfind_loop(summary):
+    import app as app_module  # renders nothing at import; main() only runs as a script
+    card = app_module.create_summary_card(summary)
+    body = card.split('<div class="summary-content">', 1)[1].rsplit("</div>", 2)[0].strip()
+    assert body == rfind_trim(summary)
+
+
+def test_new_lesson_drops_cached_cards(app):
+    generate(app, "Photosynthesis")
+    assert "Photosynthesis" in app.session_state["render_cache"][("summary",)]
+    generate(app, "Electric Circuits")
+    summary = app.session_state["render_cache"][("summary",)]
+    assert "Electric Circuits" in summary and "Photosynthesis" not in summary
+    assert not any("Photosynthesis" in html for html in app.session_state["render_cache"].values())
@@ -0,0 +1,88 @@
+import threading
+
+import pytest
+
+import deck_output
+
+
+@pytest.fixture(autouse=True)
+def small_spools(tmp_path, monkeypatch):
+    monkeypatch.setattr(deck_output, "ARTIFACT_DIR", str(tmp_path))
+    monkeypatch.setattr(deck_output, "SPOOL_MAX_MEMORY", 1024)
+    return tmp_path
+
+
+def test_artifact_is_read_back_in_chunks():
+    with deck_output.spooled_export() as spool:
+        spool.write(b"x" * 5000)
+    artifact_id = deck_output.register_artifact(spool)
+    assert spool._rolled  # over SPOOL_MAX_MEMORY, so it lives on disk
+
+    assert deck_output.artifact_size(artifact_id) == 5000
+    assert [len(chunk) for chunk in deck_output.iter_artifact(artifact_id, chunk_size=2048)] == [2048, 2048, 904]
+    assert deck_output.artifact_reader(artifact_id)() == b"x" * 5000
+
+    deck_output.discard_artifact(artifact_id)
+    assert spool.closed
+    with pytest.raises(FileNotFoundError):
+        deck_output.artifact_reader(artifact_id)()
+
+
+def test_failed_export_closes_its_spool():
+    with pytest.raises(RuntimeError):
+        with deck_output.spooled_export() as spool:
+            spool.write(b"partial deck")
+            raise RuntimeError("python-pptx failed")
+    assert spool.closed
+
+
+def test_old_artifacts_expire(monkeypatch):
+    with deck_output.spooled_export() as spool:
+        spool.write(b"deck")
+    artifact_id = deck_output.register_artifact(spool)
+    monkeypatch.setattr(deck_output, "ARTIFACT_TTL", 60)
+    now = deck_output._artifacts[artifact_id]["created"]
+
+    deck_output.expire_artifacts(now + 30)
+    assert deck_output.artifact_size(artifact_id) == 4
+    assert deck_output.expire_artifacts(now + 61) >= 1
+    assert deck_output.artifact_size(artifact_id) is None and spool.closed
+
+
+def _finishes(func, timeout=2):
+    """Run func in a thread and report whether it returned within the timeout"""
+    thread = threading.Thread(target=func, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    return not thread.is_alive()
+
+
+def test_stalled_download_blocks_neither_readers_nor_discard():
+    with deck_output.spooled_export() as spool:
+        spool.write(b"abcdef" * 1000)
+    artifact_id = deck_output.register_artifact(spool)
+
+    stalled = deck_output.iter_artifact(artifact_id, chunk_size=100)
+    assert next(stalled) == b"abcdef" * 16 + b"abcd"  # a client that stops reading here
+
+    downloads = []
+    assert _finishes(lambda: downloads.append(deck_output.artifact_reader(artifact_id)()))
+    assert downloads == [b"abcdef" * 1000]
+    assert _finishes(lambda: deck_output.discard_artifact(artifact_id))
+
+    # The running download still completes; the file closes when it is done
+    assert not spool.closed
+    assert b"".join(stalled) == (b"abcdef" * 1000)[100:]
+    assert spool.closed
+    with pytest.raises(FileNotFoundError):
+        deck_output.artifact_reader(artifact_id)()
+
+
+def test_read_artifact_returns_the_whole_file():
+    with deck_output.spooled_export() as spool:
+        spool.write(b"deck" * 1000)
+    artifact_id = deck_output.register_artifact(spool)
+    assert deck_output.read_artifact(artifact_id) == b"deck" * 1000
+    deck_output.discard_artifact(artifact_id)
+    with pytest.raises(FileNotFoundError):
+        deck_output.read_artifact(artifact_id)
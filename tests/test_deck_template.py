@@ -0,0 +1,86 @@
+import io
+
+import pytest
+from PIL import Image
+from pptx.shapes.placeholder import PicturePlaceholder
+
+import deck_template
+import ppt_maker
+
+
+def png():
+    buffer = io.BytesIO()
+    Image.new("RGB", (40, 30), "blue").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def empty_placeholders(prs):
+    return [(slide.slide_layout.name, shape.name) for slide in prs.slides for shape in slide.placeholders
+            if isinstance(shape, PicturePlaceholder)
+            or (shape.has_text_frame and not shape.text_frame.text.strip())]
+
+
+def test_template_is_built_once_with_every_layout():
+    assert deck_template.template_bytes() is deck_template.template_bytes()
+    prs = deck_template.new_presentation()
+    assert {layout.name for layout in prs.slide_layouts} == set(deck_template.LAYOUT_NAMES)
+
+
+def test_template_without_the_layouts_is_rejected(tmp_path):
+    path = tmp_path / "plain.pptx"
+    ppt_maker.Presentation().save(path)
+    assert deck_template._load_template_file(str(path)) is None
+
+
+def test_template_with_other_placeholder_idx_is_rejected(tmp_path, monkeypatch):
+    path = tmp_path / "custom.pptx"
+    path.write_bytes(deck_template.build_default_template())
+    assert deck_template._load_template_file(str(path)) is not None
+
+    prs = ppt_maker.Presentation(str(path))
+    text = prs.slide_layouts.get_by_name(deck_template.PICTURE_LAYOUT).placeholders[2]
+    text.element.xpath("./p:nvSpPr/p:nvPr/p:ph")[0].set("idx", "7")
+    prs.save(path)
+    assert deck_template._load_template_file(str(path)) is None
+
+    # Decks then come from the built-in template instead of failing on every export
+    monkeypatch.setattr(deck_template, "TEMPLATE_PATH", str(path))
+    monkeypatch.setattr(deck_template, "_template_bytes", None)
+    monkeypatch.setattr(ppt_maker, "download_image", lambda url: io.BytesIO(png()))
+    prs = deck_template.new_presentation()
+    ppt_maker.add_content_slide(prs, "Light", "Plants use light.", image_url="https://img/1")
+    assert prs.slides[0].placeholders[2].text_frame.text == "Plants use light."
+
+
+def test_picture_slide_fills_both_columns(monkeypatch):
+    monkeypatch.setattr(ppt_maker, "download_image", lambda url: io.BytesIO(png()))
+    prs = deck_template.new_presentation()
+    ppt_maker.add_content_slide(prs, "Leaves", "Leaves make food.", image_url="https://img/1")
+    assert [slide.slide_layout.name for slide in prs.slides] == [deck_template.PICTURE_LAYOUT]
+    assert not empty_placeholders(prs)
+
+
+def test_failed_picture_leaves_no_empty_placeholder(monkeypatch):
+    monkeypatch.setattr(ppt_maker, "download_image", lambda url: io.BytesIO(png()))
+
+    def fail(self, image_file):
+        raise ValueError("unsupported image")
+
+    monkeypatch.setattr(PicturePlaceholder, "insert_picture", fail)
+    prs = deck_template.new_presentation()
+    ppt_maker.add_content_slide(prs, "Leaves", "Leaves make food.", image_url="https://img/1")
+    assert not empty_placeholders(prs)
+
+
+@pytest.mark.parametrize("subtitle", ["", "Biology: Photosynthesis"])
+def test_section_slide_without_subtitle_has_no_empty_placeholder(subtitle):
+    prs = deck_template.new_presentation()
+    ppt_maker.add_section_slide(prs, "Lesson 1", subtitle)
+    assert not empty_placeholders(prs)
+
+
+def test_slide_without_text_has_no_empty_body():
+    prs = deck_template.new_presentation()
+    ppt_maker.add_content_slide(prs, "Summary", "")
+    assert len(prs.slides) == 1
+    assert not empty_placeholders(prs)
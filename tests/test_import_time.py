@@ -0,0 +1,7 @@
+from benchmarks import bench_import_time
+
+
+def test_app_import_defers_heavy_modules():
+    cumulative, imported = bench_import_time.measure("app")
+    assert cumulative is not None
+    assert not [module for module in bench_import_time.DEFERRED_MODULES if module in imported]
@@ -0,0 +1,61 @@
+import pytest
+
+import lesson_library
+
+
+def lesson(topic, subject="Biology", grade="Grade 9", content="Cells make energy from food."):
+    return {
+        "curriculum": "CBSE", "grade": grade, "subject": subject, "topic": topic,
+        "objectives": content, "subtopics": [{"title": topic, "content": content}],
+    }
+
+
+@pytest.fixture
+def library(tmp_path):
+    return str(tmp_path / "library.db")
+
+
+def test_round_trip(library):
+    lesson_id = lesson_library.save_lesson(lesson("Cell Division"), path=library)
+    assert lesson_library.load_lesson(lesson_id, path=library)["topic"] == "Cell Division"
+    assert lesson_library.load_lesson("missing", path=library) is None
+
+
+def test_search_requires_every_topic_word(library):
+    lesson_library.save_lesson(lesson("Cell Division"), path=library)
+    topics = lambda query: [hit["topic"] for hit in lesson_library.search_lessons(
+        query, "CBSE", "Grade 9", path=library, topic_only=True)]
+
+    assert topics("Cell Division") == ["Cell Division"]
+    assert topics("Introduction to cell division") == ["Cell Division"]
+    # One shared word is not the same topic
+    assert topics("Cell Structure") == []
+    # Words that only occur in the body or the subject don't count
+    assert topics("Energy") == []
+    assert topics("Biology") == []
+
+
+def test_search_is_scoped_to_level(library):
+    lesson_library.save_lesson(lesson("Cell Division"), path=library)
+    assert lesson_library.search_lessons("Cell Division", "CBSE", "Grade 10", path=library) == []
+
+
+def test_stop_words_alone_find_nothing(library):
+    lesson_library.save_lesson(lesson("Cell Division"), path=library)
+    assert lesson_library.search_lessons("the introduction of", path=library) == []
+
+
+def test_find_similar_lesson_keeps_numbered_topics_apart(library):
+    ww1 = lesson_library.save_lesson(lesson("World War I", subject="History"), path=library)
+    assert lesson_library.find_similar_lesson("CBSE", "Grade 9", "History", "World War II", path=library) is None
+    assert lesson_library.find_similar_lesson("CBSE", "Grade 9", "History", "world war I", path=library) == (ww1, 1.0)
+
+
+def test_renamed_lesson_no_longer_matches_its_old_topic(library):
+    lesson_id = lesson_library.save_lesson(lesson("Cell Division"), path=library)
+    assert lesson_library.find_similar_lesson("CBSE", "Grade 9", "Biology", "Cell Division",
+                                              path=library) == (lesson_id, 1.0)
+    lesson_library.save_lesson(lesson("Photosynthesis"), lesson_id=lesson_id, path=library)
+    assert lesson_library.find_similar_lesson("CBSE", "Grade 9", "Biology", "Cell Division", path=library) is None
+    assert lesson_library.find_similar_lesson("CBSE", "Grade 9", "Biology", "Photosynthesis",
+                                              path=library) == (lesson_id, 1.0)
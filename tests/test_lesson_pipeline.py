@@ -0,0 +1,68 @@
+import pytest
+
+import lesson_pipeline
+
+
+def lesson():
+    subtopics = [{"title": "Light", "content": "..."}, {"title": "Chlorophyll", "content": "..."}]
+    return {
+        "curriculum": "CBSE", "grade": "Grade 8", "subject": "Biology", "topic": "Photosynthesis",
+        "objectives": "Explain photosynthesis", "subtopics": subtopics, "summary": "old summary",
+        # Keys as they come back from the library's JSON
+        "subtopic_references": {"1": ["ref light"], "2": ["ref chlorophyll"]},
+        "references": ["ref light", "ref chlorophyll"],
+        "unsplash_images": {"Light_1": ["light.jpg"], "Chlorophyll_2": ["leaf.jpg"]},
+        "selected_images": {"Light_1": "light.jpg", "Chlorophyll_2": "leaf.jpg"},
+        "quiz_data": {"mcq": [{"question": "Q1"}], "fillblank": [{"question": "F1"}]},
+    }
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    monkeypatch.setattr(lesson_pipeline, "generate_single_subtopic",
+                        lambda *args: {"title": "Stomata", "content": "new"})
+    monkeypatch.setattr(lesson_pipeline, "fetch_image_options",
+                        lambda title, *args, **kwargs: [f"{title}.jpg"])
+    monkeypatch.setattr(lesson_pipeline, "search_references", lambda title, *args: [f"ref {title}"])
+    monkeypatch.setattr(lesson_pipeline, "generate_lesson_summary", lambda *args: "new summary")
+    monkeypatch.setattr(lesson_pipeline, "generate_quiz_section", lambda *args: [{"question": "Q2"}])
+
+
+def test_regenerate_subtopic_replaces_only_its_parts(upstream):
+    calls = []
+    original = lesson()
+    updated = lesson_pipeline.regenerate_subtopic(original, 2, before_call=calls.append)
+
+    assert [s["title"] for s in updated["subtopics"]] == ["Light", "Stomata"]
+    assert updated["unsplash_images"] == {"Light_1": ["light.jpg"], "Stomata_2": ["Stomata.jpg"]}
+    assert updated["selected_images"] == {"Light_1": "light.jpg", "Stomata_2": None}
+    assert updated["subtopic_references"] == {1: ["ref light"], 2: ["ref Stomata"]}
+    assert updated["references"] == ["ref light", "ref Stomata"]
+    assert updated["summary"] == "new summary"
+    assert updated["quiz_data"] == original["quiz_data"]
+    assert calls == ["gemini", "search", "gemini"]
+    assert original == lesson()  # the input is not modified
+
+
+def test_regenerate_subtopic_keeps_summary_when_asked(upstream):
+    updated = lesson_pipeline.regenerate_subtopic(lesson(), 1, include_visuals=False,
+                                                  include_references=False, refresh_summary=False)
+    assert updated["summary"] == "old summary"
+    assert "Stomata_1" not in updated["unsplash_images"]
+    assert updated["subtopic_references"] == {2: ["ref chlorophyll"]}
+
+
+def test_regenerate_subtopic_failure_returns_none(upstream, monkeypatch):
+    monkeypatch.setattr(lesson_pipeline, "generate_single_subtopic", lambda *args: {"error": "quota"})
+    assert lesson_pipeline.regenerate_subtopic(lesson(), 1) is None
+    with pytest.raises(IndexError):
+        lesson_pipeline.regenerate_subtopic(lesson(), 3)
+
+
+def test_regenerate_quiz_section_replaces_one_section(upstream):
+    updated = lesson_pipeline.regenerate_quiz_section(lesson(), "mcq")
+    assert updated["quiz_data"] == {"mcq": [{"question": "Q2"}], "fillblank": [{"question": "F1"}]}
+    assert updated["subtopics"] == lesson()["subtopics"]
+
+    with pytest.raises(ValueError):
+        lesson_pipeline.regenerate_quiz_section(lesson(), "essay")
@@ -0,0 +1,114 @@
+from collections import OrderedDict
+
+import pytest
+
+import api_transport
+import metrics
+import model_routing
+import prompts
+import stub_backends
+from model_routing import DEFAULT_MODEL, FAST_MODEL, StageRoute
+
+
+@pytest.fixture
+def load(monkeypatch):
+    """Set the in-flight count the downgrade check sees"""
+    monkeypatch.setattr(model_routing, "DOWNGRADE_INFLIGHT", 4)
+
+    def set_inflight(n):
+        monkeypatch.setattr(model_routing, "_inflight", n)
+    return set_inflight
+
+
+def test_configure_applies_overrides_and_skips_bad_ones():
+    routes = model_routing.configure({
+        "quiz": {"model": "gemini-1.5-pro", "max_output_tokens": 6144},
+        "summary": {"no_such_field": 1},
+        "glossary": {"temperature": 0.2},
+    })
+    assert routes["quiz"].model == "gemini-1.5-pro"
+    assert routes["quiz"].max_output_tokens == 6144
+    assert routes["quiz"].temperature == model_routing.DEFAULT_ROUTES["quiz"].temperature
+    assert routes["summary"] == model_routing.DEFAULT_ROUTES["summary"]
+    assert routes["glossary"] == StageRoute(temperature=0.2)
+
+
+def test_generation_config_drops_unset_fields():
+    assert StageRoute().generation_config() == {}
+    assert model_routing.DEFAULT_ROUTES["validate"].generation_config() == {
+        "max_output_tokens": 8, "temperature": 0.0, "stop_sequences": ["\n"]}
+
+
+def test_downgrade_only_at_the_inflight_threshold(load):
+    load(3)
+    assert model_routing.route_for("quiz").model == DEFAULT_MODEL
+    load(4)
+    route = model_routing.route_for("quiz")
+    assert route.model == FAST_MODEL
+    assert route.max_output_tokens == model_routing.DEFAULT_ROUTES["quiz"].max_output_tokens
+    assert model_routing.configured_route("quiz").model == DEFAULT_MODEL
+
+
+def test_stages_without_downgrade_model_keep_theirs(load, monkeypatch):
+    load(100)
+    assert model_routing.route_for("validate") == model_routing.DEFAULT_ROUTES["validate"]
+    monkeypatch.setattr(model_routing, "DOWNGRADE_INFLIGHT", 0)
+    assert model_routing.route_for("quiz").model == DEFAULT_MODEL
+
+
+def test_in_flight_counts_and_releases():
+    before = model_routing._inflight
+    with pytest.raises(RuntimeError):
+        with model_routing.in_flight():
+            assert model_routing._inflight == before + 1
+            raise RuntimeError
+    assert model_routing._inflight == before
+
+
+def test_record_usage_estimates_missing_counts(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(metrics, "record", lambda name, value: recorded.append((name, value)))
+    model_routing.record_usage("summary", "x" * 40)
+    model_routing.record_usage("quiz", "ignored", stub_backends._Usage(12, 30))
+    assert recorded == [("gemini.summary.output_tokens", 10),
+                        ("gemini.quiz.output_tokens", 30), ("gemini.quiz.prompt_tokens", 12)]
+
+
+@pytest.fixture
+def transport(monkeypatch, tmp_path):
+    monkeypatch.setattr(prompts, "_genai", stub_backends._GenAI)
+    monkeypatch.setattr(api_transport, "CASSETTE", str(tmp_path / "run.jsonl.gz"))
+    monkeypatch.setattr(api_transport, "REPLAY_LATENCY_SCALE", 0)
+    monkeypatch.setattr(api_transport, "_writer", None)
+    monkeypatch.setattr(api_transport, "_tape", None)
+
+    def switch(mode):
+        monkeypatch.setattr(api_transport, "MODE", mode)
+        monkeypatch.setattr(prompts, "_response_cache", OrderedDict())
+    yield switch
+    if api_transport._writer is not None:
+        api_transport._writer.close()
+
+
+def test_replay_ignores_a_downgrade_made_while_recording(transport, load):
+    prompt = "Summarise photosynthesis for Grade 8"
+    transport("record")
+    load(10)
+    recorded = prompts._generate("summary", prompt)
+    api_transport._writer.close()
+
+    transport("replay")
+    load(0)
+    assert prompts._generate("summary", prompt) == recorded
+
+
+def test_replay_of_an_undowngraded_recording_under_load(transport, load):
+    prompt = "Summarise the water cycle for Grade 6"
+    transport("record")
+    load(0)
+    recorded = prompts._generate("summary", prompt)
+    api_transport._writer.close()
+
+    transport("replay")
+    load(10)
+    assert prompts._generate("summary", prompt) == recorded
@@ -0,0 +1,85 @@
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+import prefetch
+
+
+class Objectives:
+    """Stub for generate_lesson_objectives that records the topics it was asked for"""
+
+    def __init__(self):
+        self.topics = []
+        self._lock = threading.Lock()
+
+    def __call__(self, curriculum, grade, subject, topic):
+        with self._lock:
+            self.topics.append(topic)
+        return f"objectives for {topic}"
+
+
+class StartedExecutor:
+    """Executor whose jobs are already running, so Future.cancel() can't stop them"""
+
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, func, *args):
+        future = Future()
+        future.set_running_or_notify_cancel()
+        self.jobs.append((future, func, args))
+        return future
+
+    def run_all(self):
+        for future, func, args in self.jobs:
+            future.set_result(func(*args))
+
+
+@pytest.fixture
+def generate():
+    return Objectives()
+
+
+def test_prefetched_topic_is_not_generated_again(generate):
+    pending = prefetch.prefetch_objectives(generate, "CBSE", "Grade 8", "Science", ["Light"])
+    pending["Light"].future.result()
+    assert prefetch.resolve_objectives(generate, "CBSE", "Grade 8", "Science", "Light", pending) == \
+        "objectives for Light"
+    assert generate.topics == ["Light"]
+    assert pending == {}
+
+
+def test_topic_without_a_prefetch_is_generated_now(generate):
+    assert prefetch.resolve_objectives(generate, "CBSE", "Grade 8", "Science", "Sound", {}) == \
+        "objectives for Sound"
+    assert generate.topics == ["Sound"]
+
+
+def test_failed_or_empty_prefetch_falls_back_to_a_live_call(generate):
+    pending = prefetch.prefetch_objectives(lambda *args: "", "CBSE", "Grade 8", "Science", ["Light"])
+    assert prefetch.resolve_objectives(generate, "CBSE", "Grade 8", "Science", "Light", pending) == \
+        "objectives for Light"
+    assert generate.topics == ["Light"]
+
+
+def test_abandoned_prefetch_skips_the_upstream_call_even_once_started(generate, monkeypatch):
+    executor = StartedExecutor()
+    monkeypatch.setattr(prefetch, "get_prefetch_executor", lambda: executor)
+    pending = prefetch.prefetch_objectives(generate, "CBSE", "Grade 8", "Science", ["Light", "Sound"])
+
+    prefetch.resolve_objectives(generate, "CBSE", "Grade 8", "Science", "Heat", pending)
+    assert generate.topics == ["Heat"]
+    executor.run_all()  # the workers get to the abandoned jobs only now
+    assert generate.topics == ["Heat"]
+    assert [future.result() for future, _, _ in executor.jobs] == [None, None]
+
+
+def test_only_the_first_topics_are_prefetched(generate, monkeypatch):
+    monkeypatch.setattr(prefetch, "PREFETCH_LIMIT", 2)
+    executor = StartedExecutor()
+    monkeypatch.setattr(prefetch, "get_prefetch_executor", lambda: executor)
+    pending = prefetch.prefetch_objectives(generate, "CBSE", "Grade 8", "Science", ["A", "B", "C"])
+    assert list(pending) == ["A", "B"]
+    prefetch.cancel_prefetches(pending)
+    assert pending == {}
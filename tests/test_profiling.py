@@ -0,0 +1,38 @@
+import pytest
+
+import profiling
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def kinds(directory):
+    return sorted(path.name.split("-")[2] for path in directory.glob("*.collapsed"))
+
+
+def test_profiles_in_the_same_second_do_not_overwrite_each_other(profile_dir):
+    for _ in range(3):
+        with profiling.profiled("export", enabled=True, topic="Photosynthesis"):
+            pass
+    assert len(list(profile_dir.glob("*.collapsed"))) == 3
+
+
+def test_fragment_is_profiled_only_when_it_reruns_alone(profile_dir):
+    with profiling.profiled("rerun", enabled=True, topic="Photosynthesis"):
+        with profiling.profiled_fragment("image_picker", enabled=True):
+            pass
+    assert kinds(profile_dir) == ["rerun"]
+
+    with profiling.profiled_fragment("image_picker", enabled=True, topic="Photosynthesis"):
+        pass
+    assert kinds(profile_dir) == ["fragment", "rerun"]
+    assert any("image_picker" in path.name for path in profile_dir.glob("*fragment*.collapsed"))
+
+
+def test_nothing_is_written_when_disabled(profile_dir):
+    with profiling.profiled_fragment("quiz", enabled=False):
+        pass
+    assert not list(profile_dir.iterdir())
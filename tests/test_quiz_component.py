@@ -0,0 +1,38 @@
+import re
+
+from quiz_component import create_quiz_html
+
+QUIZ = {
+    "mcq": [{"question": "Is 2 < 3 & 3 > 2?", "options": ["<b>Yes</b>", "No"], "answer": "<b>Yes</b>",
+             "explanation": "Both <script>alert(1)</script> hold"}],
+    "fillblank": [{"question": "Plants need ___", "answer": "light & water"}],
+    "descriptive": [{"question": "Why \"photo\"?", "answer": "Light <i>drives</i> it",
+                     "key_points": ["light", "<chlorophyll>"]}],
+}
+
+
+def test_model_text_is_escaped():
+    html = create_quiz_html(QUIZ)
+    assert "<script>" not in html and "<b>Yes</b>" not in html and "<chlorophyll>" not in html
+    assert "Is 2 &lt; 3 &amp; 3 &gt; 2?" in html
+    assert "&lt;b&gt;Yes&lt;/b&gt;" in html
+    assert "light &amp; water" in html
+    assert "Why &quot;photo&quot;?" in html
+    assert "&lt;chlorophyll&gt;" in html
+
+
+def test_every_question_gets_a_details_toggle_with_its_answer():
+    html = create_quiz_html(QUIZ)
+    toggles = re.findall(r'<details class="quiz-answer"><summary>(.*?)</summary>'
+                         r'<div class="quiz-answer-body">(.*?)</div></details>', html)
+    assert [summary for summary, _ in toggles] == ["Show Answer 1"] * 3
+    assert "Correct Answer:</b> &lt;b&gt;Yes&lt;/b&gt;" in toggles[0][1]
+    assert "Explanation:" in toggles[0][1] and "Explanation:" not in toggles[1][1]
+    assert "<li>&lt;chlorophyll&gt;</li>" in toggles[2][1]
+
+
+def test_html_has_no_blank_lines_and_only_present_sections():
+    html = create_quiz_html({"fillblank": QUIZ["fillblank"]})
+    assert "\n\n" not in html  # a blank line would end the HTML block in markdown
+    assert "Fill in the Blank" in html and "Multiple Choice" not in html and "Descriptive" not in html
+    assert create_quiz_html({}) == '<div class="quiz-container"></div>'
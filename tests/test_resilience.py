@@ -0,0 +1,124 @@
+import itertools
+import threading
+import time
+
+import pytest
+
+import metrics
+import resilience
+from resilience import CircuitBreaker, GenerationUnavailable, resilient_call
+
+_backends = itertools.count()
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    monkeypatch.setattr(resilience, "HEDGING_ENABLED", True)
+    monkeypatch.setattr(resilience, "hedge_delay", lambda stage: 0.05)
+    return f"test-{next(_backends)}"
+
+
+class Upstream:
+    """Callable whose n-th call sleeps for delays[n] and then returns or raises"""
+
+    def __init__(self, *delays, error=None):
+        self.delays = delays
+        self.error = error
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            n = self.calls
+            self.calls += 1
+        time.sleep(self.delays[min(n, len(self.delays) - 1)])
+        if self.error:
+            raise self.error
+        return f"reply {n}"
+
+
+def test_fast_reply_is_not_hedged(backend):
+    upstream = Upstream(0)
+    assert resilient_call("summary", upstream, backend) == "reply 0"
+    assert upstream.calls == 1
+
+
+def test_slow_reply_is_hedged_and_first_success_wins(backend):
+    upstream = Upstream(1.0, 0)
+    assert resilient_call("summary", upstream, backend) == "reply 1"
+    assert upstream.calls == 2
+
+
+def test_failure_is_not_hedged(backend):
+    upstream = Upstream(0, error=ValueError("quota"))
+    with pytest.raises(GenerationUnavailable, match="quota"):
+        resilient_call("summary", upstream, backend)
+    assert upstream.calls == 1
+
+
+def test_hedge_is_skipped_when_the_pool_is_busy(backend, monkeypatch):
+    monkeypatch.setattr(resilience, "HEDGE_MAX_OUTSTANDING", 0)
+    upstream = Upstream(0.2, 0)
+    assert resilient_call("summary", upstream, backend) == "reply 0"
+    assert upstream.calls == 1
+
+
+def test_deadline_raises(backend):
+    with pytest.raises(GenerationUnavailable, match="longer than"):
+        resilient_call("summary", Upstream(0.5), backend, deadline=0.1)
+
+
+def test_breaker_opens_and_lets_one_probe_through():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()  # only one probe at a time
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_open_breaker_short_circuits(backend):
+    breaker = resilience.get_breaker(backend)
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    upstream = Upstream(0)
+    with pytest.raises(GenerationUnavailable, match="circuit is open"):
+        resilient_call("summary", upstream, backend)
+    assert upstream.calls == 0
+
+
+def wait_for_abandoned_attempts():
+    for _ in range(200):
+        if not resilience._abandoned:
+            return
+        time.sleep(0.01)
+    raise AssertionError("abandoned attempts never finished")
+
+
+def test_hedge_delay_learns_from_each_attempts_own_latency(backend):
+    wait_for_abandoned_attempts()
+    before = metrics.count("upstream.quiz_section.attempt")
+    assert resilient_call("quiz_section", Upstream(0.3, 0), backend) == "reply 1"
+    wait_for_abandoned_attempts()  # the slow first attempt still reports when it ends
+    samples = metrics.count("upstream.quiz_section.attempt") - before
+    assert samples == 2
+    assert metrics.percentile("upstream.quiz_section.attempt", 100) >= 0.3
+
+
+def test_calls_are_refused_while_too_many_attempts_are_abandoned(backend, monkeypatch):
+    wait_for_abandoned_attempts()
+    monkeypatch.setattr(resilience, "MAX_ABANDONED", 1)
+    with pytest.raises(GenerationUnavailable, match="longer than"):
+        resilient_call("summary", Upstream(0.3), backend, deadline=0.1)
+    upstream = Upstream(0)
+    with pytest.raises(GenerationUnavailable, match="abandoned"):
+        resilient_call("summary", upstream, backend)
+    assert upstream.calls == 0
+
+    wait_for_abandoned_attempts()
+    assert resilient_call("summary", upstream, backend) == "reply 0"
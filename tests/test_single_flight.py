@@ -0,0 +1,71 @@
+import threading
+import time
+
+import pytest
+
+import single_flight
+
+
+class SlowCall:
+    def __init__(self, result=None, error=None, delay=0.2):
+        self.result, self.error, self.delay = result, error, delay
+        self.calls = 0
+
+    def __call__(self, *args):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.result
+
+
+def run_together(n, target):
+    results, errors = [], []
+
+    def worker():
+        try:
+            results.append(target())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_identical_calls_share_one_upstream_call():
+    call = SlowCall(result={"subtopics": ["a"]})
+    results, errors = run_together(5, lambda: single_flight.coalesce("same", call, "prompt"))
+    assert call.calls == 1 and not errors
+    assert results == [{"subtopics": ["a"]}] * 5
+    # Every caller gets its own copy
+    assert len({id(result) for result in results}) == 5
+
+
+def test_waiters_get_the_leaders_exception():
+    call = SlowCall(error=RuntimeError("quota"))
+    results, errors = run_together(3, lambda: single_flight.coalesce("failing", call))
+    assert call.calls == 1 and not results
+    assert [str(e) for e in errors] == ["quota"] * 3
+
+
+def test_finished_calls_are_not_reused():
+    call = SlowCall(result="text", delay=0)
+    single_flight.coalesce("again", call)
+    single_flight.coalesce("again", call)
+    assert call.calls == 2
+
+
+@pytest.mark.skipif(single_flight.fcntl is None, reason="cross-process coalescing needs fcntl")
+def test_processes_pick_up_the_leaders_result(tmp_path, monkeypatch):
+    monkeypatch.setattr(single_flight, "SHARED_DIR", str(tmp_path))
+    call = SlowCall(result=["shared"])
+    # Each thread stands in for a process: the file lock is per open file
+    results, errors = run_together(
+        3, lambda: single_flight._run_across_processes("cross", call, ())
+    )
+    assert call.calls == 1 and not errors
+    assert results == [["shared"]] * 3
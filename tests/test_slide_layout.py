@@ -0,0 +1,65 @@
+from slide_layout import Block, Box, block_height, char_width, paginate, wrap_lines
+
+WIDTH = 200.0
+SIZE = 12.0
+
+
+def text_width(text):
+    return sum(char_width(c) for c in text) * SIZE
+
+
+def test_wrap_keeps_every_word_and_fits_the_width():
+    text = " ".join(f"word{n}" for n in range(60))
+    lines = wrap_lines(text, WIDTH, SIZE)
+    assert " ".join(line for line, _ in lines) == text
+    assert all(text_width(line) <= WIDTH for line, _ in lines)
+    assert [hard for _, hard in lines] == [False] * (len(lines) - 1) + [True]
+
+
+def test_wrap_honours_hard_breaks_and_splits_long_words():
+    assert wrap_lines("one\ntwo", WIDTH, SIZE) == [("one", True), ("two", True)]
+    lines = wrap_lines("x" * 200, WIDTH, SIZE)
+    assert "".join(line for line, _ in lines) == "x" * 200
+    assert len(lines) > 1 and all(text_width(line) <= WIDTH for line, _ in lines)
+
+
+def test_bold_text_needs_more_room():
+    text = "The quick brown fox jumps over the lazy dog " * 4
+    assert len(wrap_lines(text, WIDTH, SIZE, bold=True)) >= len(wrap_lines(text, WIDTH, SIZE))
+
+
+def page_heights(pages, box):
+    return [sum(block_height(block, box.width) for block in page) for page in pages]
+
+
+def test_groups_move_to_the_next_page_whole():
+    box = Box(WIDTH, 60.0)  # room for one question (three lines) but not two
+    question = [Block("Which gas do plants take in?", SIZE, bold=True), Block("a) Oxygen", SIZE),
+                Block("b) Carbon dioxide", SIZE)]
+    pages = paginate([question] * 3, box)
+    assert [len(page) for page in pages] == [3, 3, 3]
+    assert all(height <= box.height for height in page_heights(pages, box))
+
+
+def test_tall_group_is_split_line_by_line_without_losing_text():
+    box = Box(WIDTH, 100.0)
+    text = " ".join(f"sentence{n}" for n in range(120))
+    pages = paginate([[Block(text, SIZE, space_after=6.0)]], box, next_box=Box(WIDTH, 150.0))
+    assert len(pages) > 1
+    assert " ".join(block.text for page in pages for block in page) == text
+    assert page_heights(pages[:1], box)[0] <= box.height
+    assert all(height <= 150.0 for height in page_heights(pages[1:], Box(WIDTH, 150.0)))
+
+
+def test_empty_input_gives_one_empty_page():
+    assert paginate([], Box(WIDTH, 100.0)) == [[]]
+
+
+def test_blocks_after_a_split_are_measured_on_the_narrower_next_box():
+    first, narrow = Box(400.0, 30.0), Box(120.0, 160.0)
+    long_text = " ".join(f"word{n}" for n in range(30))  # four lines on the first box
+    short_text = " ".join(f"term{n}" for n in range(22))  # three lines there, eight on the narrow one
+    pages = paginate([[Block(long_text, SIZE), Block(short_text, SIZE)]], first, narrow)
+    assert page_heights(pages[:1], first)[0] <= first.height
+    assert all(height <= narrow.height for height in page_heights(pages[1:], narrow))
+    assert " ".join(block.text for page in pages for block in page) == f"{long_text} {short_text}"
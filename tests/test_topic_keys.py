@@ -0,0 +1,66 @@
+import pytest
+
+from topic_keys import TopicIndex, canonical_topic, number_tokens, topic_key
+
+
+def index_with(*topics):
+    index = TopicIndex()
+    for n, topic in enumerate(topics):
+        index.add(f"lesson-{n}", "CBSE", "Grade 9", "History", topic)
+    return index
+
+
+def test_canonical_topic_ignores_filler_order_and_plurals():
+    assert canonical_topic("Process of Photosynthesis") == canonical_topic("photosynthesis")
+    assert canonical_topic("The Water Cycle") == canonical_topic("Water cycles")
+    assert topic_key("CBSE", "Grade 8", "Science", "Cells") == topic_key("cbse", "grade 8", "science", "Cell")
+
+
+def test_number_tokens():
+    assert number_tokens(canonical_topic("World War II")) == {"ii"}
+    assert number_tokens(canonical_topic("Class 10 Algebra")) == {"10"}
+    assert number_tokens(canonical_topic("Photosynthesis")) == frozenset()
+
+
+@pytest.mark.parametrize("saved, requested", [
+    ("World War I", "World War II"),
+    ("Class 9 Algebra", "Class 10 Algebra"),
+    ("Fractions Part 1", "Fractions Part 2"),
+    ("Fractions Part 1", "Fractions"),
+])
+def test_numbered_topics_are_distinct(saved, requested):
+    assert index_with(saved).lookup("CBSE", "Grade 9", "History", requested) is None
+
+
+def test_near_duplicates_match():
+    index = index_with("Newton's Laws of Motion", "World War II")
+    lesson_id, similarity = index.lookup("CBSE", "Grade 9", "History", "Newtons Laws of Motion")
+    assert lesson_id == "lesson-0" and similarity < 1.0
+
+
+def test_exact_key_match_scores_one():
+    assert index_with("Process of Photosynthesis").lookup(
+        "CBSE", "Grade 9", "History", "Photosynthesis") == ("lesson-0", 1.0)
+
+
+def test_lookup_is_scoped_to_level_and_subject():
+    index = index_with("World War II")
+    assert index.lookup("CBSE", "Grade 10", "History", "World War II") is None
+    assert index.lookup("CBSE", "Grade 9", "Geography", "World War II") is None
+
+
+def test_re_adding_a_lesson_drops_its_old_topic():
+    index = index_with("World War II")
+    index.add("lesson-0", "CBSE", "Grade 9", "History", "French Revolution")
+    assert index.lookup("CBSE", "Grade 9", "History", "World War II") is None
+    assert index.lookup("CBSE", "Grade 9", "History", "World War 2") is None
+    assert index.lookup("CBSE", "Grade 9", "History", "French Revolution") == ("lesson-0", 1.0)
+
+
+def test_removing_one_lesson_keeps_another_with_the_same_topic():
+    index = index_with("World War II", "World War II")  # the newer one owns the exact key
+    index.remove("lesson-0")
+    assert index.lookup("CBSE", "Grade 9", "History", "World War II") == ("lesson-1", 1.0)
+    index.remove("lesson-1")
+    assert index.lookup("CBSE", "Grade 9", "History", "World War II") is None
+    assert not index._buckets
@@ -0,0 +1,66 @@
+import pytest
+
+import lesson_library
+from topic_validator import classify_offline, grade_level, validate_topic_fast
+
+
+@pytest.fixture(autouse=True)
+def library(tmp_path, monkeypatch):
+    monkeypatch.setattr(lesson_library, "LIBRARY_PATH", str(tmp_path / "library.db"))
+
+
+@pytest.mark.parametrize("grade, subject, topic", [
+    ("Grade 8", "Biology", "Photosynthesis in plants"),
+    ("Grade 6", "Chemistry", "States of Matter"),
+    ("Grade 12", "Mathematics", "Calculus"),
+    ("Grade 10", "Biology", "Meiosis"),
+    ("College", "Physics", "Quantum thermodynamics"),
+])
+def test_clear_topics_are_valid_offline(grade, subject, topic):
+    assert classify_offline(grade, subject, topic) == "valid"
+
+
+@pytest.mark.parametrize("grade, subject, topic", [
+    ("Grade 1", "Mathematics", "Calculus"),
+    ("Grade 2", "Maths", "Integration"),
+    ("Grade 3", "Physics", "Quantum thermodynamics"),
+    ("Grade 4", "Biology", "Meiosis"),
+    ("Kindergarten", "Maths", "Addition"),
+    ("Grade 8", "Biology", "Photosynthesis and cricket"),
+])
+def test_advanced_or_unclear_topics_are_left_to_gemini(grade, subject, topic):
+    assert classify_offline(grade, subject, topic) is None
+
+
+@pytest.mark.parametrize("topic", ["Gore Vidal essay", "Al Gore and climate change",
+                                   "Nudes in Renaissance painting", "Dangers of sexting"])
+def test_ambiguous_words_are_not_harmful(topic):
+    assert classify_offline("Grade 9", "English", topic) != "harmful"
+
+
+def test_harmful_topics_are_caught_below_college():
+    assert classify_offline("Grade 8", "Chemistry", "How to make a bomb") == "harmful"
+    assert classify_offline("Grade 8", "Art", "Gore videos") == "harmful"
+    assert classify_offline("College", "Art", "Gore videos") is None
+
+
+def test_grade_level():
+    assert grade_level("Grade 7") == 7
+    assert grade_level("Class 10") == 10
+    assert grade_level("College") == 13
+    assert grade_level("Kindergarten") is None
+
+
+def test_gemini_verdicts_are_stored():
+    calls = []
+    llm = lambda *args: calls.append(args) or "harmful"
+    request = ("CBSE", "Grade 2", "Maths", "Integration")
+
+    assert validate_topic_fast(*request, llm_validate=llm) == "harmful"
+    assert validate_topic_fast(*request, llm_validate=llm) == "harmful"
+    assert len(calls) == 1
+
+
+def test_offline_verdict_skips_gemini():
+    llm = lambda *args: pytest.fail("Gemini should not be asked")
+    assert validate_topic_fast("CBSE", "Grade 12", "Mathematics", "Calculus", llm_validate=llm) == "valid"
@@ -0,0 +1,84 @@
+import io
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from pptx import Presentation
+
+import deck_output
+import unit_export
+
+
+def lesson(topic):
+    return {
+        "curriculum": "CBSE", "grade": "Grade 8", "subject": "Biology", "topic": topic,
+        "objectives": "Explain the topic\nGive an example",
+        "subtopics": [{"title": f"{topic} basics", "content": "Plants make food from light.",
+                       "key_concepts": ["light", "food"], "examples": ["leaf"], "misconceptions": ["Plants eat soil"]}],
+        "summary": "**Summary** Plants make food.",
+        "quiz_data": {"mcq": [{"question": "What do plants make?", "options": ["Food", "Rocks"],
+                               "answer": "Food", "explanation": "They make food."}]},
+        "references": [], "selected_images": {}, "unsplash_images": {},
+    }
+
+
+@pytest.fixture
+def artifact_dir(tmp_path, monkeypatch):
+    # The environment variable reaches spawned workers; the attribute this process
+    monkeypatch.setenv("EDUGENIUS_ARTIFACT_DIR", str(tmp_path))
+    monkeypatch.setattr(deck_output, "ARTIFACT_DIR", str(tmp_path))
+    yield tmp_path
+    unit_export.shutdown_export_pool()
+    assert not list(tmp_path.glob("*.pptx"))  # worker decks are cleaned up
+
+
+def test_pool_is_reused_until_the_size_changes(artifact_dir):
+    pool = unit_export.get_export_pool(2)
+    assert unit_export.get_export_pool(2) is pool
+    resized = unit_export.get_export_pool(3)
+    assert resized is not pool
+    assert resized._max_workers == 3
+
+
+def test_zip_export_in_process(artifact_dir):
+    lessons = [lesson("Photosynthesis"), lesson("Respiration")]
+    output = unit_export.export_unit(lessons, workers=1)
+    with zipfile.ZipFile(output) as archive:
+        assert archive.namelist() == ["01_Biology_Photosynthesis.pptx", "02_Biology_Respiration.pptx"]
+
+
+def test_merged_export_on_the_pool(artifact_dir):
+    lessons = [lesson("Photosynthesis"), lesson("Respiration")]
+    single = Presentation(unit_export.export_unit(lessons[:1], merged=True, workers=1))
+    merged = Presentation(unit_export.export_unit(lessons, merged=True, workers=2, output=io.BytesIO()))
+    # Title and closing slides once, then a divider and the slides of each lesson
+    assert len(merged.slides) == 2 + 2 * (len(single.slides) - 2)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_failed_build_removes_the_decks_already_built(artifact_dir, workers, monkeypatch):
+    build_deck = unit_export._build_deck
+
+    def failing_build(lesson, section=None):
+        if lesson["topic"] == "Respiration":
+            raise RuntimeError("python-pptx failed")
+        return build_deck(lesson, section)
+    monkeypatch.setattr(unit_export, "_build_deck", failing_build)
+    # Threads stand in for the spawned workers, which would not see the patch
+    pool = ThreadPoolExecutor(max_workers=workers)
+    monkeypatch.setattr(unit_export, "get_export_pool", lambda workers=None: pool)
+
+    with pytest.raises(RuntimeError):
+        unit_export.export_unit([lesson("Photosynthesis"), lesson("Respiration"), lesson("Digestion")],
+                                workers=workers)
+    pool.shutdown()
+    # artifact_dir checks that no .pptx is left behind
+
+
+def test_empty_examples_and_misconceptions_build(artifact_dir):
+    sparse = lesson("Respiration")
+    sparse["subtopics"][0].update(examples=[], misconceptions=[])
+    deck = Presentation(unit_export.export_unit([sparse], merged=True, workers=1))
+    text = "\n".join(shape.text_frame.text for slide in deck.slides
+                     for shape in slide.shapes if shape.has_text_frame)
+    assert "Example: N/A" in text and "Common Misconception: N/A" in text
@@ -0,0 +1,52 @@
+import io
+
+import warm_cache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_pacer_bursts_up_to_the_quota_then_waits_for_the_window(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(warm_cache.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(warm_cache.time, "sleep", clock.sleep)
+    pacer = warm_cache.RatePacer({"search": (3, 100)})
+
+    for _ in range(3):
+        pacer("search")
+    assert clock.now == 0
+
+    pacer("search")
+    assert clock.now == 100
+    assert pacer.calls == {"search": 4}
+    assert pacer.waited == 100
+
+    pacer("gemini")  # no limit configured
+    assert clock.now == 100
+
+
+def test_warm_skips_rejected_topics(monkeypatch):
+    verdicts = {"Photosynthesis": "valid", "Bomb making": "harmful", "Cricket scores": "irrelevant"}
+    built, saved = [], []
+    monkeypatch.setattr(warm_cache, "find_similar_lesson", lambda *args: None)
+    monkeypatch.setattr(warm_cache, "validate_topic_fast",
+                        lambda curriculum, grade, subject, topic, llm_validate=None: verdicts[topic])
+    monkeypatch.setattr(warm_cache, "build_lesson",
+                        lambda curriculum, grade, subject, topic, *args, **kwargs:
+                        built.append(topic) or {"topic": topic})
+    monkeypatch.setattr(warm_cache, "save_lesson", saved.append)
+
+    topics = [("CBSE", "Grade 8", "Biology", topic) for topic in verdicts]
+    counts = warm_cache.warm(topics, pacer=warm_cache.RatePacer({}), out=io.StringIO())
+
+    assert built == ["Photosynthesis"]
+    assert [lesson["topic"] for lesson in saved] == ["Photosynthesis"]
+    assert counts == {"generated": 1, "cached": 0, "rejected": 2, "failed": 0}
@@ -0,0 +1,182 @@
+import os
+import re
+import hashlib
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+# Near-duplicate topics at or above this estimated Jaccard similarity share a lesson
+SIMILARITY_THRESHOLD = float(os.getenv("EDUGENIUS_TOPIC_SIMILARITY", "0.8"))
+
+NUM_PERMUTATIONS = 64
+BANDS = 16  # 16 bands x 4 rows: pairs at 0.7 similarity or better are near-certain candidates
+
+# Numbers and roman numerals ("World War II", "Class 10", "Part 2") name different lessons
+# however similar the rest of the topic is
+_ROMAN = re.compile(r"^(?=[ivxlc]+$)c{0,3}(xc|xl|l?x{0,3})(ix|iv|v?i{0,3})$")
+SHINGLE_SIZE = 3
+
+STOP_WORDS = {
+    "a", "an", "the", "of", "in", "on", "for", "to", "and", "or", "with", "by",
+    "about", "from", "at", "as", "into", "its", "their", "is", "are", "how", "what",
+    "why", "vs", "versus",
+    # Filler that teachers add around a topic without changing it
+    "process", "introduction", "intro", "basics", "basic", "overview", "concept",
+    "concepts", "understanding", "study", "lesson", "topic", "fundamentals", "unit",
+}
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+def _permutations():
+    """Deterministic (a, b) pairs for the MinHash permutations"""
+    params = []
+    for i in range(NUM_PERMUTATIONS):
+        digest = hashlib.sha256(f"edugenius-minhash-{i}".encode()).digest()
+        a = int.from_bytes(digest[:8], "big") % _MERSENNE_PRIME or 1
+        b = int.from_bytes(digest[8:16], "big") % _MERSENNE_PRIME
+        params.append((a, b))
+    return params
+
+_PERMUTATIONS = _permutations()
+
+def _singular(word: str) -> str:
+    """Very light plural folding ("cells" -> "cell", "species" stays)"""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is", "ies")):
+        return word[:-1]
+    return word
+
+def normalize_text(text: str) -> str:
+    """Lowercase, strip accents and punctuation, and collapse whitespace"""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(text.split())
+
+def canonical_topic(topic: str) -> str:
+    """Order-independent canonical form of a topic or subject string"""
+    words = [_singular(w) for w in normalize_text(topic).split() if w not in STOP_WORDS]
+    if not words:
+        # Everything was a stop word; keep the plain normalized text instead of nothing
+        return normalize_text(topic)
+    return " ".join(sorted(set(words)))
+
+def topic_key(curriculum: str, grade: str, subject: str, topic: str) -> str:
+    """Exact cache key for a (curriculum, grade, subject, topic) request"""
+    return "|".join([
+        normalize_text(curriculum),
+        normalize_text(grade),
+        canonical_topic(subject),
+        canonical_topic(topic),
+    ])
+
+def number_tokens(canonical: str) -> frozenset:
+    """Numeric and roman-numeral words of a canonical topic"""
+    return frozenset(word for word in canonical.split() if word.isdigit() or _ROMAN.match(word))
+
+def _shingles(text: str) -> set:
+    text = f" {text} "
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+def minhash_signature(text: str) -> Tuple[int, ...]:
+    """MinHash signature over character trigrams of the canonical text"""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big")
+        for shingle in _shingles(text)
+    ]
+    return tuple(
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+def signature_similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures"""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+class TopicIndex:
+    """In-memory MinHash/LSH index of previously generated lesson keys.
+
+    Entries are grouped by (curriculum, grade, subject) so only topics at the
+    same level and subject are ever compared.
+    """
+
+    def __init__(self, threshold: float = None):
+        self.threshold = SIMILARITY_THRESHOLD if threshold is None else threshold
+        self._exact: Dict[str, str] = {}
+        self._signatures: Dict[str, Tuple[Tuple[int, ...], frozenset]] = {}
+        self._buckets: Dict[Tuple, set] = {}
+        self._entries: Dict[str, Tuple[str, List[Tuple]]] = {}  # value -> (exact key, band keys)
+
+    @staticmethod
+    def _scope(curriculum: str, grade: str, subject: str) -> Tuple[str, str, str]:
+        return normalize_text(curriculum), normalize_text(grade), canonical_topic(subject)
+
+    def _bands(self, scope, signature):
+        rows = NUM_PERMUTATIONS // BANDS
+        for band in range(BANDS):
+            yield scope + (band, signature[band * rows:(band + 1) * rows])
+
+    def add(self, value: str, curriculum: str, grade: str, subject: str, topic: str):
+        """Register a stored lesson (value is usually its library id), replacing its old entry"""
+        self.remove(value)
+        key = topic_key(curriculum, grade, subject, topic)
+        self._exact[key] = value
+        scope = self._scope(curriculum, grade, subject)
+        canonical = canonical_topic(topic)
+        signature = minhash_signature(canonical)
+        self._signatures[value] = (signature, number_tokens(canonical))
+        band_keys = list(self._bands(scope, signature))
+        for band_key in band_keys:
+            self._buckets.setdefault(band_key, set()).add(value)
+        self._entries[value] = (key, band_keys)
+
+    def remove(self, value: str):
+        """Forget a lesson, for example before re-adding it under a changed topic"""
+        entry = self._entries.pop(value, None)
+        if entry is None:
+            return
+        key, band_keys = entry
+        if self._exact.get(key) == value:
+            del self._exact[key]
+        self._signatures.pop(value, None)
+        for band_key in band_keys:
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(value)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def lookup(self, curriculum: str, grade: str, subject: str, topic: str,
+               threshold: float = None) -> Optional[Tuple[str, float]]:
+        """Return (value, similarity) for the closest stored topic above the threshold.
+
+        Topics whose numbers or roman numerals differ never match.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        key = topic_key(curriculum, grade, subject, topic)
+        if key in self._exact:
+            return self._exact[key], 1.0
+
+        scope = self._scope(curriculum, grade, subject)
+        canonical = canonical_topic(topic)
+        signature = minhash_signature(canonical)
+        numbers = number_tokens(canonical)
+        candidates = set()
+        for band_key in self._bands(scope, signature):
+            candidates.update(self._buckets.get(band_key, ()))
+
+        best = None
+        for value in candidates:
+            stored_signature, stored_numbers = self._signatures[value]
+            if stored_numbers != numbers:
+                continue
+            similarity = signature_similarity(signature, stored_signature)
+            if similarity >= threshold and (best is None or similarity > best[1]):
+                best = (value, similarity)
+        return best
+
+    def __len__(self):
+        return len(self._signatures)
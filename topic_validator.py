@@ -0,0 +1,189 @@
+import re
+from typing import Callable, Dict, Optional
+import metrics
+from topic_keys import topic_key, canonical_topic, normalize_text
+from lesson_library import get_verdict, save_verdict
+
+VERDICTS = {"valid", "irrelevant", "harmful"}
+
+# Phrases that are never appropriate below college, whatever the subject. Words
+# with innocent uses ("gore" in "Al Gore", "nude" in art history, "sexting" in
+# online-safety lessons) only count in a harmful context, or are left to Gemini.
+HARMFUL_PATTERNS = [
+    r"\bporn\w*", r"\bnsfw\b", r"\berotic (stor|fiction|video|image|picture|photo)\w*",
+    r"\bnude (video|image|picture|photo|selfie)s?\b",
+    r"\bhow to (make|build) (a )?(bomb|explosive|weapon|gun)s?\b",
+    r"\bbomb making\b", r"\bsuicide method\w*", r"\bself harm method\w*",
+    r"\bbuying drugs\b", r"\bdrug dealing\b", r"\bgambling strateg\w*",
+    r"\bhate speech\b", r"\bgore (video|image|picture|photo)s?\b",
+]
+_HARMFUL = re.compile("|".join(HARMFUL_PATTERNS))
+
+COLLEGE_GRADE = 13
+
+# Core school vocabulary per subject, keyed by the lowest grade each word is
+# taught at. A topic made only of words taught by the requested grade is a
+# clear match; anything else (including advanced words at a lower grade) is
+# left to Gemini.
+SUBJECT_VOCABULARY = {
+    "biology": {
+        1: {"plant", "animal", "food", "habitat", "life", "cycle", "human", "body"},
+        4: {"chain", "web", "heart", "blood", "skeleton", "muscle", "adaptation",
+            "classification", "digestion", "digestive", "organ"},
+        6: {"cell", "photosynthesis", "respiration", "ecosystem", "circulatory", "respiratory",
+            "nervous", "system", "tissue", "microorganism", "bacteria", "virus", "reproduction",
+            "nutrition", "biodiversity", "structure", "function"},
+        9: {"genetics", "gene", "dna", "heredity", "evolution", "mitosis", "meiosis", "enzyme",
+            "membrane", "nucleus", "protein"},
+    },
+    "chemistry": {
+        4: {"state", "matter", "mixture", "solution", "gas", "metal"},
+        6: {"atom", "molecule", "element", "compound", "acid", "base", "salt", "nonmetal",
+            "chemical", "reaction"},
+        9: {"atomic", "periodic", "table", "bond", "bonding", "ph", "carbon", "oxidation",
+            "reduction", "structure", "equation", "balancing", "electrolysis", "ion", "ionic",
+            "covalent", "valency", "law", "rate"},
+        11: {"organic", "mole"},
+    },
+    "physics": {
+        1: {"light", "sound", "heat", "force", "motion"},
+        4: {"energy", "gravity", "magnetism", "magnetic", "temperature", "machine", "mirror",
+            "speed", "electricity", "circuit", "friction", "reflection"},
+        6: {"work", "power", "pressure", "wave", "current", "lens", "kinetic", "potential",
+            "refraction"},
+        9: {"newton", "law", "gravitation", "velocity", "acceleration", "momentum", "optics",
+            "nuclear"},
+        11: {"thermodynamics", "quantum"},
+    },
+    "mathematics": {
+        1: {"number", "addition", "subtraction"},
+        4: {"multiplication", "division", "fraction", "decimal", "perimeter", "area", "angle",
+            "triangle", "circle", "factor", "prime", "graph"},
+        6: {"percentage", "ratio", "proportion", "algebra", "equation", "integer", "exponent",
+            "volume", "geometry", "coordinate", "statistics", "probability", "set", "arithmetic",
+            "linear", "mean", "median", "mode"},
+        9: {"quadratic", "polynomial", "mensuration", "trigonometry", "theorem", "pythagoras",
+            "sequence", "series", "function"},
+        11: {"calculus", "derivative", "integral", "integration", "differentiation", "matrix",
+             "matrices"},
+    },
+    "history": {
+        4: {"ancient", "egyptian", "roman", "greek", "kingdom", "civilization", "empire", "dynasty"},
+        6: {"medieval", "mughal", "harappan", "indus", "valley", "freedom", "struggle",
+            "independence", "revolution", "war", "world", "modern", "movement", "french",
+            "american", "industrial", "russian"},
+        9: {"renaissance", "colonialism", "nationalism", "cold", "partition", "reformation"},
+    },
+    "geography": {
+        1: {"weather", "river", "mountain", "ocean", "forest", "water", "map", "desert"},
+        4: {"climate", "soil", "continent", "landform", "volcano", "earthquake", "cycle",
+            "natural", "resource", "vegetation", "wildlife", "agriculture", "population"},
+        6: {"latitude", "longitude", "monsoon", "atmosphere", "erosion"},
+        9: {"plate", "tectonic"},
+    },
+    "computer science": {
+        4: {"programming", "loop", "internet", "web", "data", "security", "cyber"},
+        6: {"algorithm", "variable", "binary", "boolean", "logic", "python", "html", "network",
+            "database", "list", "array", "function", "sorting", "searching", "operating", "system"},
+        9: {"java", "structure", "recursion", "object", "oriented"},
+    },
+    "english": {
+        1: {"letter", "story", "poem", "noun", "verb", "sentence", "vocabulary"},
+        4: {"pronoun", "adjective", "adverb", "preposition", "conjunction", "paragraph",
+            "punctuation", "tense", "writing", "poetry", "comprehension", "grammar", "narrative"},
+        6: {"essay", "speech", "figure", "voice", "active", "passive", "reported", "direct",
+            "indirect"},
+    },
+}
+
+SUBJECT_ALIASES = {
+    "math": "mathematics", "maths": "mathematics",
+    "computer": "computer science", "computing": "computer science", "informatics": "computer science",
+    "literature": "english",
+}
+
+# Same normalization as incoming topics (plural folding etc.) so lookups line up;
+# each subject maps word -> lowest grade
+_VOCABULARY = {
+    canonical_topic(name): {canonical_topic(term): grade for grade, terms in bands.items() for term in terms}
+    for name, bands in SUBJECT_VOCABULARY.items()
+}
+_ALIASES = {canonical_topic(alias): canonical_topic(name) for alias, name in SUBJECT_ALIASES.items()}
+
+def _merge(vocabulary: Dict[str, int], terms: Dict[str, int]):
+    for term, grade in terms.items():
+        vocabulary[term] = min(grade, vocabulary.get(term, grade))
+
+def _subject_vocabulary(subject: str) -> Optional[Dict[str, int]]:
+    """Word -> lowest grade for a free-text subject such as "Grade 8 Biology" or "Maths" """
+    words = set(canonical_topic(subject).split())
+    vocabulary = {}
+    for name, terms in _VOCABULARY.items():
+        if set(name.split()) <= words:
+            _merge(vocabulary, terms)
+    for alias, name in _ALIASES.items():
+        if alias in words:
+            _merge(vocabulary, _VOCABULARY[name])
+    return vocabulary or None
+
+def grade_level(grade: str) -> Optional[int]:
+    """Numeric level of "Grade 7", "Class 10" or "College", or None if it can't be told"""
+    text = normalize_text(grade)
+    if text == "college":
+        return COLLEGE_GRADE
+    match = re.search(r"\d+", text)
+    return int(match.group()) if match else None
+
+def classify_offline(grade: str, subject: str, topic: str) -> Optional[str]:
+    """Keyword verdict for clear-cut topics, or None when the topic is ambiguous.
+
+    Only harmful and valid are decided here. A topic is valid offline only
+    if the grade is known and every word is taught by that grade; whether an
+    advanced topic is too much for a younger class is for Gemini to judge.
+    """
+    level = grade_level(grade)
+    text = normalize_text(topic)
+    if _HARMFUL.search(text) and level != COLLEGE_GRADE:
+        return "harmful"
+
+    vocabulary = _subject_vocabulary(subject)
+    words = [w for w in canonical_topic(topic).split() if len(w) > 1]
+    if level is not None and vocabulary and words and all(
+        vocabulary.get(word, COLLEGE_GRADE + 1) <= level for word in words
+    ):
+        return "valid"
+    return None
+
+def validate_topic_fast(curriculum: str, grade: str, subject: str, topic: str,
+                        llm_validate: Callable = None) -> str:
+    """Validate a topic locally where possible and fall back to Gemini for the rest.
+
+    Order: stored verdict for the normalized key, then the offline keyword
+    check, then `llm_validate` (prompts.validate_topic by default). Gemini
+    verdicts are stored for next time.
+    """
+    key = topic_key(curriculum, grade, subject, topic)
+    try:
+        stored = get_verdict(key)
+    except Exception as e:
+        print(f"Error reading topic verdicts: {str(e)}")
+        stored = None
+    if stored:
+        metrics.record("validate.stored", 1)
+        return stored
+
+    verdict = classify_offline(grade, subject, topic)
+    if verdict:
+        metrics.record("validate.offline", 1)
+        return verdict
+
+    if llm_validate is None:
+        from prompts import validate_topic as llm_validate
+    verdict = llm_validate(curriculum, grade, subject, topic)
+    metrics.record("validate.llm", 1)
+    if verdict in VERDICTS:
+        try:
+            save_verdict(key, verdict, "gemini")
+        except Exception as e:
+            print(f"Error saving topic verdict: {str(e)}")
+    return verdict
@@ -0,0 +1,161 @@
+import io
+import os
+import re
+import threading
+import zipfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+
+import metrics
+from image_cache import get_image_bytes
+from deck_output import temp_path
+
+# Deck-building processes; python-pptx is CPU-bound so threads don't help
+EXPORT_WORKERS = int(os.getenv("EDUGENIUS_EXPORT_WORKERS", str(os.cpu_count() or 1)))
+# Parallel image downloads while warming the shared cache before a build
+IMAGE_FETCH_WORKERS = int(os.getenv("EDUGENIUS_EXPORT_IMAGE_WORKERS", "8"))
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+def get_export_pool(workers: int = None) -> ProcessPoolExecutor:
+    """Shared process pool, started on first use and reused across exports.
+
+    Asking for a different number of workers replaces the pool; work already
+    queued on the old one still finishes. Uses "spawn" so workers don't
+    inherit the web server's threads and locks.
+    """
+    global _pool, _pool_workers
+    workers = workers or EXPORT_WORKERS
+    with _pool_lock:
+        if _pool is not None and _pool_workers != workers:
+            _pool.shutdown(wait=False)
+            _pool = None
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            _pool_workers = workers
+    return _pool
+
+def shutdown_export_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+def _build_deck(lesson: Dict, section: Optional[str] = None) -> str:
+    """Build one lesson's deck in a worker; with `section`, build it as a part of a merged unit.
+
+    The deck is written to a temporary file and its path returned, so decks
+    don't travel back through the pool's pipe; the caller removes the file.
+    """
+    from ppt_maker import (new_presentation, add_title_slide, add_section_slide,
+                           add_lesson_slides, add_closing_slide, save_presentation)
+    prs = new_presentation()
+    if section:
+        add_section_slide(prs, section, f"{lesson.get('subject', '')}: {lesson.get('topic', '')}")
+        add_lesson_slides(prs, lesson)
+    else:
+        add_title_slide(prs, lesson)
+        add_lesson_slides(prs, lesson)
+        add_closing_slide(prs)
+    path = temp_path(".pptx")
+    save_presentation(prs, path)
+    return path
+
+def prefetch_images(lessons: List[Dict]) -> int:
+    """Download every image the unit needs into the shared cache, once per URL.
+
+    Workers then read images from disk instead of racing each other for them.
+    """
+    from ppt_maker import lesson_image_urls
+    urls = sorted({url for lesson in lessons for url in lesson_image_urls(lesson)})
+    if urls:
+        with ThreadPoolExecutor(max_workers=min(IMAGE_FETCH_WORKERS, len(urls))) as pool:
+            list(pool.map(get_image_bytes, urls))
+    return len(urls)
+
+def _remove_decks(decks: List[str]):
+    for deck in decks:
+        try:
+            os.remove(deck)
+        except OSError:
+            pass
+
+def _build_all(lessons: List[Dict], sections: List[Optional[str]], workers: int) -> List[str]:
+    """Build every deck and return their temporary paths; if one fails, none are left behind"""
+    if workers <= 1 or len(lessons) == 1:
+        decks = []
+        try:
+            for lesson, section in zip(lessons, sections):
+                decks.append(_build_deck(lesson, section))
+        except BaseException:
+            _remove_decks(decks)
+            raise
+        return decks
+
+    pool = get_export_pool(workers)
+    futures = [pool.submit(_build_deck, lesson, section) for lesson, section in zip(lessons, sections)]
+    try:
+        return [future.result() for future in futures]
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        # Decks still being built are waited for so their files can be removed too
+        wait(futures)
+        _remove_decks([future.result() for future in futures
+                       if not future.cancelled() and future.exception() is None])
+        raise
+
+def deck_filename(lesson: Dict, n: int = None) -> str:
+    name = re.sub(r"[^\w]+", "_", f"{lesson.get('subject', '')}_{lesson.get('topic', '')}").strip("_")
+    return f"{n:02d}_{name[:60]}.pptx" if n is not None else f"{name[:60]}.pptx"
+
+def export_unit(lessons: List[Dict], merged: bool = False, unit_title: str = None,
+                workers: int = None, output=None):
+    """Export several lessons as a zip of decks, or as one deck with a divider per lesson.
+
+    Decks are built in parallel on the shared process pool; `workers=1`
+    builds them in this process. The result is written into `output` (a
+    writable, seekable file such as a deck_output spool) or a new BytesIO,
+    and returned rewound.
+    """
+    if not lessons:
+        raise ValueError("no lessons to export")
+    workers = workers or EXPORT_WORKERS
+
+    with metrics.timed("export.unit"):
+        prefetch_images(lessons)
+        sections = [f"Lesson {n}" if merged else None for n in range(1, len(lessons) + 1)]
+        decks = _build_all(lessons, sections, workers)
+
+        buffer = io.BytesIO() if output is None else output
+        try:
+            if merged:
+                from ppt_maker import new_presentation, add_title_slide, append_slides, add_closing_slide
+                first = lessons[0]
+                prs = new_presentation()
+                add_title_slide(prs, {
+                    'subject': first.get('subject', 'Subject'),
+                    'topic': unit_title or " · ".join(lesson.get('topic', '') for lesson in lessons),
+                    'grade': first.get('grade', 'Grade'),
+                    'curriculum': first.get('curriculum', 'Curriculum'),
+                })
+                for deck in decks:
+                    append_slides(prs, deck)
+                add_closing_slide(prs)
+                prs.save(buffer)
+            else:
+                # Decks are already compressed; storing them keeps the zip step cheap
+                with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+                    for n, (lesson, deck) in enumerate(zip(lessons, decks), 1):
+                        archive.write(deck, deck_filename(lesson, n))
+        finally:
+            _remove_decks(decks)
+        buffer.seek(0)
+        return buffer
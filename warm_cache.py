@@ -0,0 +1,167 @@
+"""Pre-generate lessons into the local lesson library during off-hours.
+
+Examples:
+    python warm_cache.py --topics term1_topics.csv
+    python warm_cache.py --seed CBSE "Grade 8" Science --seed IB "Grade 10" Chemistry
+
+The topics CSV needs the columns curriculum, grade, subject and topic.
+Every topic is validated like a typed-in one; harmful or off-subject
+topics are skipped. Upstream calls are kept inside each API's quota
+window. The free Custom Search quota (100 queries a day) covers roughly
+25 lessons with references a day; use --no-references for larger runs.
+"""
+import argparse
+import csv
+import sys
+import time
+from collections import deque
+from typing import Dict, List, Tuple
+
+from prompts import suggest_topics, validate_topic
+from lesson_pipeline import build_lesson
+from lesson_library import save_lesson, find_similar_lesson
+from topic_validator import validate_topic_fast
+
+# Default quotas as (requests, window in seconds), matching the API table in the readme
+DEFAULT_LIMITS = {
+    "gemini": (60, 60),        # 60 requests per minute
+    "unsplash": (50, 3600),    # 50 requests per hour
+    "search": (100, 86400),    # 100 queries per day
+}
+
+class RatePacer:
+    """Keeps each API under its quota: at most `count` calls in any `window` seconds.
+
+    Calls go through at once while the window has room and wait only once
+    the quota is used up, so short runs are not slowed to the average rate.
+    """
+
+    def __init__(self, limits: Dict[str, Tuple[int, float]]):
+        self.limits = {api: (int(count), window) for api, (count, window) in limits.items() if count > 0}
+        self.recent = {api: deque() for api in self.limits}
+        self.calls = {}
+        self.waited = 0.0
+
+    def __call__(self, api: str):
+        if api in self.limits:
+            count, window = self.limits[api]
+            recent = self.recent[api]
+            now = time.monotonic()
+            while recent and recent[0] <= now - window:
+                recent.popleft()
+            if len(recent) >= count:
+                wait = recent[0] + window - now
+                time.sleep(wait)
+                self.waited += wait
+                recent.popleft()
+                now += wait
+            recent.append(now)
+        self.calls[api] = self.calls.get(api, 0) + 1
+
+def read_topics_csv(path: str) -> List[Tuple[str, str, str, str]]:
+    with open(path, newline='', encoding='utf-8') as f:
+        return [
+            (row['curriculum'].strip(), row['grade'].strip(), row['subject'].strip(), row['topic'].strip())
+            for row in csv.DictReader(f)
+            if row.get('topic', '').strip()
+        ]
+
+def seed_topics(seeds: List[List[str]], pacer: RatePacer) -> List[Tuple[str, str, str, str]]:
+    """Ask Gemini for core topics of each (curriculum, grade, subject) seed"""
+    topics = []
+    for curriculum, grade, subject in seeds:
+        pacer("gemini")
+        for topic in suggest_topics(curriculum, grade, subject):
+            topics.append((curriculum, grade, subject, topic.strip()))
+    return topics
+
+def warm(topics, include_visuals=True, include_references=True, pacer=None,
+         skip_existing=True, backoff=30.0, out=sys.stdout) -> Dict[str, int]:
+    """Generate and store every topic, printing one progress line per lesson"""
+    pacer = pacer or RatePacer(DEFAULT_LIMITS)
+    counts = {"generated": 0, "cached": 0, "rejected": 0, "failed": 0}
+    started = time.monotonic()
+    total = len(topics)
+
+    for n, (curriculum, grade, subject, topic) in enumerate(topics, 1):
+        label = f"[{n}/{total}] {curriculum} {grade} {subject}: {topic}"
+        if skip_existing and find_similar_lesson(curriculum, grade, subject, topic):
+            counts["cached"] += 1
+            print(f"{label} ... already cached", file=out, flush=True)
+            continue
+
+        def paced_validate(*args):
+            pacer("gemini")
+            return validate_topic(*args)
+
+        verdict = validate_topic_fast(curriculum, grade, subject, topic, llm_validate=paced_validate)
+        if verdict in ("harmful", "irrelevant"):
+            counts["rejected"] += 1
+            print(f"{label} ... skipped, topic is {verdict}", file=out, flush=True)
+            continue
+
+        lesson_start = time.monotonic()
+        try:
+            lesson = None if verdict == "unavailable" else build_lesson(curriculum, grade, subject, topic,
+                                  include_visuals, include_references, before_call=pacer)
+        except Exception as e:
+            lesson = None
+            print(f"{label} ... error: {str(e)}", file=out, flush=True)
+
+        if lesson is None:
+            counts["failed"] += 1
+            print(f"{label} ... failed, backing off {backoff:.0f}s", file=out, flush=True)
+            time.sleep(backoff)
+            continue
+
+        save_lesson(lesson)
+        counts["generated"] += 1
+        elapsed = time.monotonic() - started
+        remaining = (total - n) * elapsed / n
+        print(f"{label} ... ok ({time.monotonic() - lesson_start:.1f}s, "
+              f"~{remaining / 60:.0f} min left)", file=out, flush=True)
+
+    calls = ", ".join(f"{api}={count}" for api, count in sorted(pacer.calls.items()))
+    print(f"Done in {(time.monotonic() - started) / 60:.1f} min: {counts['generated']} generated, "
+          f"{counts['cached']} already cached, {counts['rejected']} rejected, {counts['failed']} failed "
+          f"({calls}; {pacer.waited:.0f}s spent pacing)", file=out, flush=True)
+    return counts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-generate lessons into the lesson library")
+    parser.add_argument("--topics", help="CSV with curriculum, grade, subject, topic columns")
+    parser.add_argument("--seed", nargs=3, action="append", default=[],
+                        metavar=("CURRICULUM", "GRADE", "SUBJECT"),
+                        help="Seed topics from suggest_topics (repeatable)")
+    parser.add_argument("--gemini-rpm", type=int, default=60, help="Gemini requests per minute")
+    parser.add_argument("--unsplash-rph", type=int, default=50, help="Unsplash requests per hour")
+    parser.add_argument("--search-rpd", type=int, default=100, help="Custom Search queries per day")
+    parser.add_argument("--no-visuals", action="store_true", help="Skip Unsplash image candidates")
+    parser.add_argument("--no-references", action="store_true", help="Skip reference search")
+    parser.add_argument("--force", action="store_true", help="Regenerate topics that are already cached")
+    parser.add_argument("--backoff", type=float, default=30.0, help="Seconds to wait after a failed lesson")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the topics that would be warmed")
+    args = parser.parse_args(argv)
+
+    if not args.topics and not args.seed:
+        parser.error("pass --topics and/or --seed")
+
+    pacer = RatePacer({
+        "gemini": (args.gemini_rpm, 60),
+        "unsplash": (args.unsplash_rph, 3600),
+        "search": (args.search_rpd, 86400),
+    })
+    topics = read_topics_csv(args.topics) if args.topics else []
+    topics += seed_topics(args.seed, pacer)
+
+    if args.dry_run:
+        for curriculum, grade, subject, topic in topics:
+            print(f"{curriculum} | {grade} | {subject} | {topic}")
+        return 0
+
+    counts = warm(topics, not args.no_visuals, not args.no_references, pacer,
+                  skip_existing=not args.force, backoff=args.backoff)
+    return 1 if counts["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())